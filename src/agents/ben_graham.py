@@ -4,10 +4,10 @@ from tools.api import get_financial_metrics, get_market_cap, search_line_items
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
+from utils.serialization import dumps
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from utils.llm import call_llm_for_tickers
 import math
 
 
@@ -67,19 +67,22 @@ def ben_graham_agent(state: AgentState):
         analysis_data[ticker] = {"signal": signal, "score": total_score, "max_score": max_possible_score, "earnings_analysis": earnings_analysis, "strength_analysis": strength_analysis, "valuation_analysis": valuation_analysis}
 
         progress.update_status("ben_graham_agent", ticker, "Generating Graham-style analysis")
-        graham_output = generate_graham_output(
-            ticker=ticker,
-            analysis_data=analysis_data,
-            model_name=state["metadata"]["model_name"],
-            model_provider=state["metadata"]["model_provider"],
-        )
 
+    # Ask the LLM for every ticker at once instead of one after another
+    graham_outputs = generate_graham_outputs(
+        tickers=list(analysis_data.keys()),
+        analysis_data=analysis_data,
+        model_name=state["metadata"]["model_name"],
+        model_provider=state["metadata"]["model_provider"],
+    )
+
+    for ticker, graham_output in graham_outputs.items():
         graham_analysis[ticker] = {"signal": graham_output.signal, "confidence": graham_output.confidence, "reasoning": graham_output.reasoning}
 
         progress.update_status("ben_graham_agent", ticker, "Done")
 
     # Wrap results in a single message for the chain
-    message = HumanMessage(content=json.dumps(graham_analysis), name="ben_graham_agent")
+    message = HumanMessage(content=dumps(graham_analysis), name="ben_graham_agent")
 
     # Optionally display reasoning
     if state["metadata"]["show_reasoning"]:
@@ -322,47 +325,55 @@ def generate_graham_output(
     - Value emphasis, margin of safety, net-nets, conservative balance sheet, stable earnings.
     - Return the result in a JSON structure: { signal, confidence, reasoning }.
     """
+    return generate_graham_outputs([ticker], analysis_data, model_name, model_provider)[ticker]
+
+
+BEN_GRAHAM_TEMPLATE = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """You are a Benjamin Graham AI agent, making investment decisions using his principles:
+        1. Insist on a margin of safety by buying below intrinsic value (e.g., using Graham Number, net-net).
+        2. Emphasize the company's financial strength (low leverage, ample current assets).
+        3. Prefer stable earnings over multiple years.
+        4. Consider dividend record for extra safety.
+        5. Avoid speculative or high-growth assumptions; focus on proven metrics.
+                    
+        Return a rational recommendation: bullish, bearish, or neutral, with a confidence level (0-100) and concise reasoning.
+
+        Return JSON exactly in this format:
+        {{
+          "signal": "bullish" or "bearish" or "neutral",
+          "confidence": float (0-100),
+          "reasoning": "string"
+        }}
+        """
+    ),
+    (
+        "human",
+        """Based on the following analysis, create a Graham-style investment signal:
+
+        Analysis Data for {ticker}:
+        {analysis_data}
+        """
+    )
+])
+
 
-    template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a Benjamin Graham AI agent, making investment decisions using his principles:
-            1. Insist on a margin of safety by buying below intrinsic value (e.g., using Graham Number, net-net).
-            2. Emphasize the company's financial strength (low leverage, ample current assets).
-            3. Prefer stable earnings over multiple years.
-            4. Consider dividend record for extra safety.
-            5. Avoid speculative or high-growth assumptions; focus on proven metrics.
-                        
-            Return a rational recommendation: bullish, bearish, or neutral, with a confidence level (0-100) and concise reasoning.
-            """
-        ),
-        (
-            "human",
-            """Based on the following analysis, create a Graham-style investment signal:
-
-            Analysis Data for {ticker}:
-            {analysis_data}
-
-            Return JSON exactly in this format:
-            {{
-              "signal": "bullish" or "bearish" or "neutral",
-              "confidence": float (0-100),
-              "reasoning": "string"
-            }}
-            """
-        )
-    ])
-
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
-        "ticker": ticker
-    })
+def generate_graham_outputs(
+    tickers: list[str],
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> dict[str, BenGrahamSignal]:
+    """Generates Graham-style decisions for several tickers from concurrent or batched LLM calls."""
 
     def create_default_ben_graham_signal():
         return BenGrahamSignal(signal="neutral", confidence=0.0, reasoning="Error in generating analysis; defaulting to neutral.")
 
-    return call_llm(
-        prompt=prompt,
+    return call_llm_for_tickers(
+        template=BEN_GRAHAM_TEMPLATE,
+        tickers=tickers,
+        analysis_data=analysis_data,
         model_name=model_name,
         model_provider=model_provider,
         pydantic_model=BenGrahamSignal,
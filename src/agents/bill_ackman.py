@@ -4,10 +4,10 @@ from tools.api import get_financial_metrics, get_market_cap, search_line_items
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
+from utils.serialization import dumps
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from utils.llm import call_llm_for_tickers
 
 class BillAckmanSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -85,13 +85,16 @@ def bill_ackman_agent(state: AgentState):
         }
         
         progress.update_status("bill_ackman_agent", ticker, "Generating Ackman analysis")
-        ackman_output = generate_ackman_output(
-            ticker=ticker, 
-            analysis_data=analysis_data,
-            model_name=state["metadata"]["model_name"],
-            model_provider=state["metadata"]["model_provider"],
-        )
-        
+
+    # Ask the LLM for every ticker at once instead of one after another
+    ackman_outputs = generate_ackman_outputs(
+        tickers=list(analysis_data.keys()),
+        analysis_data=analysis_data,
+        model_name=state["metadata"]["model_name"],
+        model_provider=state["metadata"]["model_provider"],
+    )
+
+    for ticker, ackman_output in ackman_outputs.items():
         ackman_analysis[ticker] = {
             "signal": ackman_output.signal,
             "confidence": ackman_output.confidence,
@@ -99,10 +102,10 @@ def bill_ackman_agent(state: AgentState):
         }
         
         progress.update_status("bill_ackman_agent", ticker, "Done")
-    
+
     # Wrap results in a single message for the chain
     message = HumanMessage(
-        content=json.dumps(ackman_analysis),
+        content=dumps(ackman_analysis),
         name="bill_ackman_agent"
     )
     
@@ -346,48 +349,55 @@ def generate_ackman_output(
     """
     Generates investment decisions in the style of Bill Ackman.
     """
-    template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a Bill Ackman AI agent, making investment decisions using his principles:
+    return generate_ackman_outputs([ticker], analysis_data, model_name, model_provider)[ticker]
 
-            1. Seek high-quality businesses with durable competitive advantages (moats).
-            2. Prioritize consistent free cash flow and growth potential.
-            3. Advocate for strong financial discipline (reasonable leverage, efficient capital allocation).
-            4. Valuation matters: target intrinsic value and margin of safety.
-            5. Invest with high conviction in a concentrated portfolio for the long term.
-            6. Potential activist approach if management or operational improvements can unlock value.
-            
-            Rules:
-            - Evaluate brand strength, market position, or other moats.
-            - Check free cash flow generation, stable or growing earnings.
-            - Analyze balance sheet health (reasonable debt, good ROE).
-            - Buy at a discount to intrinsic value; higher discount => stronger conviction.
-            - Engage if management is suboptimal or if there's a path for strategic improvements.
-            - Provide a rational, data-driven recommendation (bullish, bearish, or neutral)."""
-        ),
-        (
-            "human",
-            """Based on the following analysis, create an Ackman-style investment signal.
 
-            Analysis Data for {ticker}:
-            {analysis_data}
+BILL_ACKMAN_TEMPLATE = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """You are a Bill Ackman AI agent, making investment decisions using his principles:
 
-            Return the trading signal in this JSON format:
-            {{
-              "signal": "bullish/bearish/neutral",
-              "confidence": float (0-100),
-              "reasoning": "string"
-            }}
-            """
-        )
-    ])
+        1. Seek high-quality businesses with durable competitive advantages (moats).
+        2. Prioritize consistent free cash flow and growth potential.
+        3. Advocate for strong financial discipline (reasonable leverage, efficient capital allocation).
+        4. Valuation matters: target intrinsic value and margin of safety.
+        5. Invest with high conviction in a concentrated portfolio for the long term.
+        6. Potential activist approach if management or operational improvements can unlock value.
+        
+        Rules:
+        - Evaluate brand strength, market position, or other moats.
+        - Check free cash flow generation, stable or growing earnings.
+        - Analyze balance sheet health (reasonable debt, good ROE).
+        - Buy at a discount to intrinsic value; higher discount => stronger conviction.
+        - Engage if management is suboptimal or if there's a path for strategic improvements.
+        - Provide a rational, data-driven recommendation (bullish, bearish, or neutral).
+
+        Return the trading signal in this JSON format:
+        {{
+          "signal": "bullish/bearish/neutral",
+          "confidence": float (0-100),
+          "reasoning": "string"
+        }}
+        """
+    ),
+    (
+        "human",
+        """Based on the following analysis, create an Ackman-style investment signal.
+
+        Analysis Data for {ticker}:
+        {analysis_data}
+        """
+    )
+])
 
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
-        "ticker": ticker
-    })
 
+def generate_ackman_outputs(
+    tickers: list[str],
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> dict[str, BillAckmanSignal]:
+    """Generates Ackman-style decisions for several tickers from concurrent or batched LLM calls."""
     def create_default_bill_ackman_signal():
         return BillAckmanSignal(
             signal="neutral",
@@ -395,11 +405,13 @@ def generate_ackman_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
-        prompt=prompt, 
-        model_name=model_name, 
-        model_provider=model_provider, 
-        pydantic_model=BillAckmanSignal, 
-        agent_name="bill_ackman_agent", 
+    return call_llm_for_tickers(
+        template=BILL_ACKMAN_TEMPLATE,
+        tickers=tickers,
+        analysis_data=analysis_data,
+        model_name=model_name,
+        model_provider=model_provider,
+        pydantic_model=BillAckmanSignal,
+        agent_name="bill_ackman_agent",
         default_factory=create_default_bill_ackman_signal,
     )
@@ -4,10 +4,10 @@ from tools.api import get_financial_metrics, get_market_cap, search_line_items
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
+from utils.serialization import dumps
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from utils.llm import call_llm_for_tickers
 
 class CathieWoodSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -92,13 +92,16 @@ def cathie_wood_agent(state: AgentState):
         }
 
         progress.update_status("cathie_wood_agent", ticker, "Generating Cathie Wood style analysis")
-        cw_output = generate_cathie_wood_output(
-            ticker=ticker,
-            analysis_data=analysis_data,
-            model_name=state["metadata"]["model_name"],
-            model_provider=state["metadata"]["model_provider"],
-        )
 
+    # Ask the LLM for every ticker at once instead of one after another
+    cw_outputs = generate_cathie_wood_outputs(
+        tickers=list(analysis_data.keys()),
+        analysis_data=analysis_data,
+        model_name=state["metadata"]["model_name"],
+        model_provider=state["metadata"]["model_provider"],
+    )
+
+    for ticker, cw_output in cw_outputs.items():
         cw_analysis[ticker] = {
             "signal": cw_output.signal,
             "confidence": cw_output.confidence,
@@ -108,7 +111,7 @@ def cathie_wood_agent(state: AgentState):
         progress.update_status("cathie_wood_agent", ticker, "Done")
 
     message = HumanMessage(
-        content=json.dumps(cw_analysis),
+        content=dumps(cw_analysis),
         name="cathie_wood_agent"
     )
 
@@ -431,38 +434,44 @@ def generate_cathie_wood_output(
     """
     Generates investment decisions in the style of Cathie Wood.
     """
-    template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a Cathie Wood AI agent, making investment decisions using her principles:\n\n"
-            "1. Seek companies leveraging disruptive innovation.\n"
-            "2. Emphasize exponential growth potential, large TAM.\n"
-            "3. Focus on technology, healthcare, or other future-facing sectors.\n"
-            "4. Consider multi-year time horizons for potential breakthroughs.\n"
-            "5. Accept higher volatility in pursuit of high returns.\n"
-            "6. Evaluate management's vision and ability to invest in R&D.\n\n"
-            "Rules:\n"
-            "- Identify disruptive or breakthrough technology.\n"
-            "- Evaluate strong potential for multi-year revenue growth.\n"
-            "- Check if the company can scale effectively in a large market.\n"
-            "- Use a growth-biased valuation approach.\n"
-            "- Provide a data-driven recommendation (bullish, bearish, or neutral)."""
-        ),
-        (
-            "human",
-            """Based on the following analysis, create a Cathie Wood-style investment signal.\n\n"
-            "Analysis Data for {ticker}:\n"
-            "{analysis_data}\n\n"
-            "Return the trading signal in this JSON format:\n"
-            "{{\n  \"signal\": \"bullish/bearish/neutral\",\n  \"confidence\": float (0-100),\n  \"reasoning\": \"string\"\n}}"""
-        )
-    ])
+    return generate_cathie_wood_outputs([ticker], analysis_data, model_name, model_provider)[ticker]
+
+
+CATHIE_WOOD_TEMPLATE = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """You are a Cathie Wood AI agent, making investment decisions using her principles:\n\n"
+        "1. Seek companies leveraging disruptive innovation.\n"
+        "2. Emphasize exponential growth potential, large TAM.\n"
+        "3. Focus on technology, healthcare, or other future-facing sectors.\n"
+        "4. Consider multi-year time horizons for potential breakthroughs.\n"
+        "5. Accept higher volatility in pursuit of high returns.\n"
+        "6. Evaluate management's vision and ability to invest in R&D.\n\n"
+        "Rules:\n"
+        "- Identify disruptive or breakthrough technology.\n"
+        "- Evaluate strong potential for multi-year revenue growth.\n"
+        "- Check if the company can scale effectively in a large market.\n"
+        "- Use a growth-biased valuation approach.\n"
+        "- Provide a data-driven recommendation (bullish, bearish, or neutral).\n\n"
+        "Return the trading signal in this JSON format:\n"
+        "{{\n  \"signal\": \"bullish/bearish/neutral\",\n  \"confidence\": float (0-100),\n  \"reasoning\": \"string\"\n}}"""
+    ),
+    (
+        "human",
+        """Based on the following analysis, create a Cathie Wood-style investment signal.\n\n"
+        "Analysis Data for {ticker}:\n"
+        "{analysis_data}"""
+    )
+])
 
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
-        "ticker": ticker
-    })
 
+def generate_cathie_wood_outputs(
+    tickers: list[str],
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> dict[str, CathieWoodSignal]:
+    """Generates Cathie Wood-style decisions for several tickers from concurrent or batched LLM calls."""
     def create_default_cathie_wood_signal():
         return CathieWoodSignal(
             signal="neutral",
@@ -470,8 +479,10 @@ def generate_cathie_wood_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
-        prompt=prompt,
+    return call_llm_for_tickers(
+        template=CATHIE_WOOD_TEMPLATE,
+        tickers=tickers,
+        analysis_data=analysis_data,
         model_name=model_name,
         model_provider=model_provider,
         pydantic_model=CathieWoodSignal,
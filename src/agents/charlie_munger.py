@@ -4,10 +4,10 @@ from tools.api import get_financial_metrics, get_market_cap, search_line_items,
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
+from utils.serialization import dumps
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from utils.llm import call_llm_for_tickers
 
 class CharlieMungerSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -122,13 +122,16 @@ def charlie_munger_agent(state: AgentState):
         }
         
         progress.update_status("charlie_munger_agent", ticker, "Generating Munger analysis")
-        munger_output = generate_munger_output(
-            ticker=ticker, 
-            analysis_data=analysis_data,
-            model_name=state["metadata"]["model_name"],
-            model_provider=state["metadata"]["model_provider"],
-        )
-        
+
+    # Ask the LLM for every ticker at once instead of one after another
+    munger_outputs = generate_munger_outputs(
+        tickers=list(analysis_data.keys()),
+        analysis_data=analysis_data,
+        model_name=state["metadata"]["model_name"],
+        model_provider=state["metadata"]["model_provider"],
+    )
+
+    for ticker, munger_output in munger_outputs.items():
         munger_analysis[ticker] = {
             "signal": munger_output.signal,
             "confidence": munger_output.confidence,
@@ -136,10 +139,10 @@ def charlie_munger_agent(state: AgentState):
         }
         
         progress.update_status("charlie_munger_agent", ticker, "Done")
-    
+
     # Wrap results in a single message for the chain
     message = HumanMessage(
-        content=json.dumps(munger_analysis),
+        content=dumps(munger_analysis),
         name="charlie_munger_agent"
     )
     
@@ -669,54 +672,61 @@ def generate_munger_output(
     """
     Generates investment decisions in the style of Charlie Munger.
     """
-    template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a Charlie Munger AI agent, making investment decisions using his principles:
+    return generate_munger_outputs([ticker], analysis_data, model_name, model_provider)[ticker]
 
-            1. Focus on the quality and predictability of the business.
-            2. Rely on mental models from multiple disciplines to analyze investments.
-            3. Look for strong, durable competitive advantages (moats).
-            4. Emphasize long-term thinking and patience.
-            5. Value management integrity and competence.
-            6. Prioritize businesses with high returns on invested capital.
-            7. Pay a fair price for wonderful businesses.
-            8. Never overpay, always demand a margin of safety.
-            9. Avoid complexity and businesses you don't understand.
-            10. "Invert, always invert" - focus on avoiding stupidity rather than seeking brilliance.
-            
-            Rules:
-            - Praise businesses with predictable, consistent operations and cash flows.
-            - Value businesses with high ROIC and pricing power.
-            - Prefer simple businesses with understandable economics.
-            - Admire management with skin in the game and shareholder-friendly capital allocation.
-            - Focus on long-term economics rather than short-term metrics.
-            - Be skeptical of businesses with rapidly changing dynamics or excessive share dilution.
-            - Avoid excessive leverage or financial engineering.
-            - Provide a rational, data-driven recommendation (bullish, bearish, or neutral)."""
-        ),
-        (
-            "human",
-            """Based on the following analysis, create a Munger-style investment signal.
 
-            Analysis Data for {ticker}:
-            {analysis_data}
+CHARLIE_MUNGER_TEMPLATE = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """You are a Charlie Munger AI agent, making investment decisions using his principles:
 
-            Return the trading signal in this JSON format:
-            {{
-              "signal": "bullish/bearish/neutral",
-              "confidence": float (0-100),
-              "reasoning": "string"
-            }}
-            """
-        )
-    ])
+        1. Focus on the quality and predictability of the business.
+        2. Rely on mental models from multiple disciplines to analyze investments.
+        3. Look for strong, durable competitive advantages (moats).
+        4. Emphasize long-term thinking and patience.
+        5. Value management integrity and competence.
+        6. Prioritize businesses with high returns on invested capital.
+        7. Pay a fair price for wonderful businesses.
+        8. Never overpay, always demand a margin of safety.
+        9. Avoid complexity and businesses you don't understand.
+        10. "Invert, always invert" - focus on avoiding stupidity rather than seeking brilliance.
+        
+        Rules:
+        - Praise businesses with predictable, consistent operations and cash flows.
+        - Value businesses with high ROIC and pricing power.
+        - Prefer simple businesses with understandable economics.
+        - Admire management with skin in the game and shareholder-friendly capital allocation.
+        - Focus on long-term economics rather than short-term metrics.
+        - Be skeptical of businesses with rapidly changing dynamics or excessive share dilution.
+        - Avoid excessive leverage or financial engineering.
+        - Provide a rational, data-driven recommendation (bullish, bearish, or neutral).
+
+        Return the trading signal in this JSON format:
+        {{
+          "signal": "bullish/bearish/neutral",
+          "confidence": float (0-100),
+          "reasoning": "string"
+        }}
+        """
+    ),
+    (
+        "human",
+        """Based on the following analysis, create a Munger-style investment signal.
+
+        Analysis Data for {ticker}:
+        {analysis_data}
+        """
+    )
+])
 
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
-        "ticker": ticker
-    })
 
+def generate_munger_outputs(
+    tickers: list[str],
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> dict[str, CharlieMungerSignal]:
+    """Generates Munger-style decisions for several tickers from concurrent or batched LLM calls."""
     def create_default_charlie_munger_signal():
         return CharlieMungerSignal(
             signal="neutral",
@@ -724,11 +734,13 @@ def generate_munger_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
-        prompt=prompt, 
-        model_name=model_name, 
-        model_provider=model_provider, 
-        pydantic_model=CharlieMungerSignal, 
-        agent_name="charlie_munger_agent", 
+    return call_llm_for_tickers(
+        template=CHARLIE_MUNGER_TEMPLATE,
+        tickers=tickers,
+        analysis_data=analysis_data,
+        model_name=model_name,
+        model_provider=model_provider,
+        pydantic_model=CharlieMungerSignal,
+        agent_name="charlie_munger_agent",
         default_factory=create_default_charlie_munger_signal,
     )
\ No newline at end of file
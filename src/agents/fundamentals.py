@@ -1,7 +1,7 @@
 from langchain_core.messages import HumanMessage
 from graph.state import AgentState, show_agent_reasoning
 from utils.progress import progress
-import json
+from utils.serialization import dumps
 
 from tools.api import get_financial_metrics
 
@@ -142,7 +142,7 @@ def fundamentals_agent(state: AgentState):
 
     # Create the fundamental analysis message
     message = HumanMessage(
-        content=json.dumps(fundamental_analysis),
+        content=dumps(fundamental_analysis),
         name="fundamentals_agent",
     )
 
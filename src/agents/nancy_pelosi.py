@@ -2,10 +2,10 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from graph.state import AgentState, show_agent_reasoning
 from pydantic import BaseModel, Field
-import json
+from utils.serialization import dumps
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from utils.llm import call_llm_for_tickers
 
 from tools.api import get_financial_metrics, get_market_cap, search_line_items, get_company_news, get_insider_trades
 
@@ -111,13 +111,16 @@ def nancy_pelosi_agent(state: AgentState):
         }
         
         progress.update_status("nancy_pelosi_agent", ticker, "Generating congressional trading analysis")
-        pelosi_output = generate_pelosi_output(
-            ticker=ticker,
-            analysis_data=analysis_data,
-            model_name=state["metadata"]["model_name"],
-            model_provider=state["metadata"]["model_provider"],
-        )
-        
+
+    # Ask the LLM for every ticker at once instead of one after another
+    pelosi_outputs = generate_pelosi_outputs(
+        tickers=list(analysis_data.keys()),
+        analysis_data=analysis_data,
+        model_name=state["metadata"]["model_name"],
+        model_provider=state["metadata"]["model_provider"],
+    )
+
+    for ticker, pelosi_output in pelosi_outputs.items():
         # Store analysis in consistent format with other agents
         pelosi_analysis[ticker] = {
             "signal": pelosi_output.signal,
@@ -126,10 +129,10 @@ def nancy_pelosi_agent(state: AgentState):
         }
         
         progress.update_status("nancy_pelosi_agent", ticker, "Done")
-    
+
     # Create the message
     message = HumanMessage(
-        content=json.dumps(pelosi_analysis),
+        content=dumps(pelosi_analysis),
         name="nancy_pelosi_agent"
     )
     
@@ -518,56 +521,63 @@ def generate_pelosi_output(
     model_provider: str,
 ) -> NancyPelosiSignal:
     """Generate congressional trading style investment decision from LLM."""
-    template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You analyze stocks based on information advantage and policy knowledge:
+    return generate_pelosi_outputs([ticker], analysis_data, model_name, model_provider)[ticker]
 
-            1. Identify regulatory arbitrage opportunities where policy knowledge creates profit
-            2. Evaluate companies positioned to benefit from upcoming legislation
-            3. Find asymmetric information opportunities before public market awareness
-            4. Determine which companies have direct government revenue streams
-            5. Track actual congressional trading patterns for confirming signals
-            
-            Key investment principles:
-            - Use advanced knowledge of policy directions before market prices adjust
-            - Identify legislation impacts on specific companies before wide awareness
-            - Position ahead of government contract awards and appropriations
-            - Monitor committee activities for sector impacts
-            - Leverage information advantages legally but aggressively
-            
-            Your analysis is purely profit-focused, logical, and direct. You prioritize identifying information asymmetry that creates actionable trading opportunities.
-            """
-        ),
-        (
-            "human",
-            """Based on the following policy-driven analysis, create an investment signal:
 
-            Analysis Data for {ticker}:
-            {analysis_data}
+NANCY_PELOSI_TEMPLATE = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """You analyze stocks based on information advantage and policy knowledge:
 
-            Return the trading signal in the following JSON format:
-            {{
-              "signal": "bullish/bearish/neutral",
-              "confidence": float (0-100),
-              "reasoning": "string"
-            }}
-            """
-        )
-    ])
+        1. Identify regulatory arbitrage opportunities where policy knowledge creates profit
+        2. Evaluate companies positioned to benefit from upcoming legislation
+        3. Find asymmetric information opportunities before public market awareness
+        4. Determine which companies have direct government revenue streams
+        5. Track actual congressional trading patterns for confirming signals
+        
+        Key investment principles:
+        - Use advanced knowledge of policy directions before market prices adjust
+        - Identify legislation impacts on specific companies before wide awareness
+        - Position ahead of government contract awards and appropriations
+        - Monitor committee activities for sector impacts
+        - Leverage information advantages legally but aggressively
+        
+        Your analysis is purely profit-focused, logical, and direct. You prioritize identifying information asymmetry that creates actionable trading opportunities.
 
-    # Generate the prompt
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
-        "ticker": ticker
-    })
+        Return the trading signal in the following JSON format:
+        {{
+          "signal": "bullish/bearish/neutral",
+          "confidence": float (0-100),
+          "reasoning": "string"
+        }}
+        """
+    ),
+    (
+        "human",
+        """Based on the following policy-driven analysis, create an investment signal:
+
+        Analysis Data for {ticker}:
+        {analysis_data}
+        """
+    )
+])
 
+
+def generate_pelosi_outputs(
+    tickers: list[str],
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> dict[str, NancyPelosiSignal]:
+    """Generates Pelosi-style decisions for several tickers from concurrent or batched LLM calls."""
     # Create default factory for NancyPelosiSignal
     def create_default_signal():
         return NancyPelosiSignal(signal="neutral", confidence=0.0, reasoning="Error in analysis, defaulting to neutral")
 
-    return call_llm(
-        prompt=prompt,
+    return call_llm_for_tickers(
+        template=NANCY_PELOSI_TEMPLATE,
+        tickers=tickers,
+        analysis_data=analysis_data,
         model_name=model_name,
         model_provider=model_provider,
         pydantic_model=NancyPelosiSignal,
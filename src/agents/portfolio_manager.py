@@ -1,4 +1,4 @@
-import json
+from utils.serialization import dumps
 from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
 
@@ -7,6 +7,7 @@ from pydantic import BaseModel, Field
 from typing_extensions import Literal
 from utils.progress import progress
 from utils.llm import call_llm
+from utils.prompt_compaction import compact_json, compact_ticker_data
 
 
 class PortfolioDecision(BaseModel):
@@ -78,7 +79,7 @@ def portfolio_management_agent(state: AgentState):
 
     # Create the portfolio management message
     message = HumanMessage(
-        content=json.dumps(decisions_dict),
+        content=dumps(decisions_dict),
         name="portfolio_management_agent",
     )
 
@@ -94,6 +95,83 @@ def portfolio_management_agent(state: AgentState):
     }
 
 
+PORTFOLIO_MANAGER_TEMPLATE = ChatPromptTemplate.from_messages(
+    [
+        (
+          "system",
+          """You are a portfolio manager making final trading decisions based on multiple tickers.
+
+          Trading Rules:
+          - For long positions:
+            * Only buy if you have available cash
+            * Only sell if you currently hold long shares of that ticker
+            * Sell quantity must be ≤ current long position shares
+            * Buy quantity must be ≤ max_shares for that ticker
+          
+          - For short positions:
+            * Only short if you have available margin (50% of position value required)
+            * Only cover if you currently have short shares of that ticker
+            * Cover quantity must be ≤ current short position shares
+            * Short quantity must respect margin requirements
+          
+          - The max_shares values are pre-calculated to respect position limits
+          - Consider both long and short opportunities based on signals
+          - Maintain appropriate risk management with both long and short exposure
+
+          Available Actions:
+          - "buy": Open or add to long position
+          - "sell": Close or reduce long position
+          - "short": Open or add to short position
+          - "cover": Close or reduce short position
+          - "hold": No action
+
+          Inputs:
+          - signals_by_ticker: dictionary of ticker → signals
+          - max_shares: maximum shares allowed per ticker
+          - portfolio_cash: current cash in portfolio
+          - portfolio_positions: current positions (both long and short)
+          - current_prices: current prices for each ticker
+          - margin_requirement: current margin requirement for short positions
+
+          Output strictly in JSON with the following structure:
+          {{
+            "decisions": {{
+              "TICKER1": {{
+                "action": "buy/sell/short/cover/hold",
+                "quantity": integer,
+                "confidence": float,
+                "reasoning": "string"
+              }},
+              "TICKER2": {{
+                ...
+              }},
+              ...
+            }}
+          }}
+          """,
+        ),
+        (
+          "human",
+          """Based on the team's analysis, make your trading decisions for each ticker.
+
+          Here are the signals by ticker:
+          {signals_by_ticker}
+
+          Current Prices:
+          {current_prices}
+
+          Maximum Shares Allowed For Purchases:
+          {max_shares}
+
+          Portfolio Cash: {portfolio_cash}
+          Current Positions: {portfolio_positions}
+          Current Margin Requirement: {margin_requirement}
+          """,
+        ),
+    ]
+)
+
+
 def generate_trading_decision(
     tickers: list[str],
     signals_by_ticker: dict[str, dict],
@@ -104,91 +182,14 @@ def generate_trading_decision(
     model_provider: str,
 ) -> PortfolioManagerOutput:
     """Attempts to get a decision from the LLM with retry logic"""
-    # Create the prompt template
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-              "system",
-              """You are a portfolio manager making final trading decisions based on multiple tickers.
-
-              Trading Rules:
-              - For long positions:
-                * Only buy if you have available cash
-                * Only sell if you currently hold long shares of that ticker
-                * Sell quantity must be ≤ current long position shares
-                * Buy quantity must be ≤ max_shares for that ticker
-              
-              - For short positions:
-                * Only short if you have available margin (50% of position value required)
-                * Only cover if you currently have short shares of that ticker
-                * Cover quantity must be ≤ current short position shares
-                * Short quantity must respect margin requirements
-              
-              - The max_shares values are pre-calculated to respect position limits
-              - Consider both long and short opportunities based on signals
-              - Maintain appropriate risk management with both long and short exposure
-
-              Available Actions:
-              - "buy": Open or add to long position
-              - "sell": Close or reduce long position
-              - "short": Open or add to short position
-              - "cover": Close or reduce short position
-              - "hold": No action
-
-              Inputs:
-              - signals_by_ticker: dictionary of ticker → signals
-              - max_shares: maximum shares allowed per ticker
-              - portfolio_cash: current cash in portfolio
-              - portfolio_positions: current positions (both long and short)
-              - current_prices: current prices for each ticker
-              - margin_requirement: current margin requirement for short positions
-              """,
-            ),
-            (
-              "human",
-              """Based on the team's analysis, make your trading decisions for each ticker.
-
-              Here are the signals by ticker:
-              {signals_by_ticker}
-
-              Current Prices:
-              {current_prices}
-
-              Maximum Shares Allowed For Purchases:
-              {max_shares}
-
-              Portfolio Cash: {portfolio_cash}
-              Current Positions: {portfolio_positions}
-              Current Margin Requirement: {margin_requirement}
-
-              Output strictly in JSON with the following structure:
-              {{
-                "decisions": {{
-                  "TICKER1": {{
-                    "action": "buy/sell/short/cover/hold",
-                    "quantity": integer,
-                    "confidence": float,
-                    "reasoning": "string"
-                  }},
-                  "TICKER2": {{
-                    ...
-                  }},
-                  ...
-                }}
-              }}
-              """,
-            ),
-        ]
-    )
-
     # Generate the prompt
-    prompt = template.invoke(
+    prompt = PORTFOLIO_MANAGER_TEMPLATE.invoke(
         {
-            "signals_by_ticker": json.dumps(signals_by_ticker, indent=2),
-            "current_prices": json.dumps(current_prices, indent=2),
-            "max_shares": json.dumps(max_shares, indent=2),
+            "signals_by_ticker": compact_ticker_data(signals_by_ticker),
+            "current_prices": compact_json(current_prices),
+            "max_shares": compact_json(max_shares),
             "portfolio_cash": f"{portfolio.get('cash', 0):.2f}",
-            "portfolio_positions": json.dumps(portfolio.get('positions', {}), indent=2),
+            "portfolio_positions": compact_json(portfolio.get('positions', {})),
             "margin_requirement": f"{portfolio.get('margin_requirement', 0):.2f}",
         }
     )
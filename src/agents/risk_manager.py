@@ -1,8 +1,8 @@
 from langchain_core.messages import HumanMessage
 from graph.state import AgentState, show_agent_reasoning
 from utils.progress import progress
-from tools.api import get_prices, prices_to_df
-import json
+from tools.api import get_price_data
+from utils.serialization import dumps
 
 
 ##### Risk Management Agent #####
@@ -19,18 +19,17 @@ def risk_management_agent(state: AgentState):
     for ticker in tickers:
         progress.update_status("risk_management_agent", ticker, "Analyzing price data")
 
-        prices = get_prices(
+        # Reads a zero-copy slice of the shared price panel when one is attached
+        prices_df = get_price_data(
             ticker=ticker,
             start_date=data["start_date"],
             end_date=data["end_date"],
         )
 
-        if not prices:
+        if prices_df.empty:
             progress.update_status("risk_management_agent", ticker, "Failed: No price data found")
             continue
 
-        prices_df = prices_to_df(prices)
-
         progress.update_status("risk_management_agent", ticker, "Calculating position limits")
 
         # Calculate portfolio value
@@ -67,7 +66,7 @@ def risk_management_agent(state: AgentState):
         progress.update_status("risk_management_agent", ticker, "Done")
 
     message = HumanMessage(
-        content=json.dumps(risk_analysis),
+        content=dumps(risk_analysis),
         name="risk_management_agent",
     )
 
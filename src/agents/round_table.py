@@ -2,10 +2,10 @@ from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
 from graph.state import AgentState, show_agent_reasoning
 from pydantic import BaseModel, Field
-import json
 from typing_extensions import Literal
 from utils.progress import progress
 from utils.llm import call_llm
+from utils.prompt_compaction import compact_json
 from colorama import Fore, Style
 
 class RoundTableOutput(BaseModel):
@@ -170,105 +170,106 @@ def get_signal_color(signal: str) -> str:
         return Fore.YELLOW
 
 
-def simulate_round_table(
-    ticker: str,
-    ticker_signals: dict[str, any],
-    model_name: str,
-    model_provider: str,
-) -> RoundTableOutput:
-    """Simulate a round table discussion among analysts and reach a decision."""
-    template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are the moderator of an Investment Round Table where various financial analysts 
-            discuss an investment decision. Design a logical, natural conversation where:
+ROUND_TABLE_TEMPLATE = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """You are the moderator of an Investment Round Table where various financial analysts 
+        discuss an investment decision. Design a logical, natural conversation where:
 
-            1. Each analyst only speaks when they have something valuable to contribute
-            2. The discussion flows organically like a real meeting, not a scripted round-robin
-            3. Analysts respond directly to points made by others when relevant
-            4. Points of disagreement are naturally explored until resolution
-            5. The conversation continues until a well-reasoned decision is reached
-            6. No artificial turn-taking or forced contributions
+        1. Each analyst only speaks when they have something valuable to contribute
+        2. The discussion flows organically like a real meeting, not a scripted round-robin
+        3. Analysts respond directly to points made by others when relevant
+        4. Points of disagreement are naturally explored until resolution
+        5. The conversation continues until a well-reasoned decision is reached
+        6. No artificial turn-taking or forced contributions
 
-            Key requirements:
-            - CONCISE: Every statement should be direct and to the point
-            - LOGICAL: The conversation should follow a natural flow of ideas
-            - NO BS: Cut ruthlessly any jargon, fluff, or unnecessary explanation
-            - NO SCRIPT: Don't force every analyst to speak - only when they have something useful to say
-            - REAL DISAGREEMENT: Allow analysts to challenge each other directly
-            - NATURAL RESOLUTION: Let the consensus emerge organically from the discourse
-            - COMPLETE ANALYSIS: Continue until all important aspects have been considered
+        Key requirements:
+        - CONCISE: Every statement should be direct and to the point
+        - LOGICAL: The conversation should follow a natural flow of ideas
+        - NO BS: Cut ruthlessly any jargon, fluff, or unnecessary explanation
+        - NO SCRIPT: Don't force every analyst to speak - only when they have something useful to say
+        - REAL DISAGREEMENT: Allow analysts to challenge each other directly
+        - NATURAL RESOLUTION: Let the consensus emerge organically from the discourse
+        - COMPLETE ANALYSIS: Continue until all important aspects have been considered
 
-            Analyst Personas (maintain authentic personalities):
-            - Warren Buffett: Patient, folksy but incisive, focused on business fundamentals
-            - Charlie Munger: Blunt, no-nonsense, critical of foolishness, mental models
-            - Ben Graham: Conservative, risk-averse, values margin of safety above all
-            - Cathie Wood: Bold, disruptive-tech enthusiast, future-focused, dismissive of old metrics
-            - Bill Ackman: Forceful, activist mindset, confident in strong opinions
-            - Nancy Pelosi: Political insider, pragmatic, focused on policy impacts
-            - Technical Analyst: Pattern-focused, dismissive of fundamentals when trends are clear
-            - Fundamental Analyst: By-the-numbers, methodical, skeptical of hype
-            - Sentiment Analyst: Attuned to market psychology and news flow
-            - Valuation Analyst: Focused on price vs. value, multiple-based comparisons
-            - WSB (WallStreetBets): Irreverent, momentum-driven, contrarian, slang-heavy
+        Analyst Personas (maintain authentic personalities):
+        - Warren Buffett: Patient, folksy but incisive, focused on business fundamentals
+        - Charlie Munger: Blunt, no-nonsense, critical of foolishness, mental models
+        - Ben Graham: Conservative, risk-averse, values margin of safety above all
+        - Cathie Wood: Bold, disruptive-tech enthusiast, future-focused, dismissive of old metrics
+        - Bill Ackman: Forceful, activist mindset, confident in strong opinions
+        - Nancy Pelosi: Political insider, pragmatic, focused on policy impacts
+        - Technical Analyst: Pattern-focused, dismissive of fundamentals when trends are clear
+        - Fundamental Analyst: By-the-numbers, methodical, skeptical of hype
+        - Sentiment Analyst: Attuned to market psychology and news flow
+        - Valuation Analyst: Focused on price vs. value, multiple-based comparisons
+        - WSB (WallStreetBets): Irreverent, momentum-driven, contrarian, slang-heavy
 
-            Format the conversation naturally:
-            - Each speaker clearly labeled (e.g., "Warren Buffett: I believe...")
-            - Direct statements, no meandering explanations
-            - Natural interruptions and crosstalk when appropriate
-            - Minimal moderator interventions - let the discussion flow
-            - Strong opinions clearly expressed
-            """
-        ),
-        (
-            "human",
-            """Facilitate a realistic Investment Round Table discussion about {ticker} with the following analyst signals:
+        Format the conversation naturally:
+        - Each speaker clearly labeled (e.g., "Warren Buffett: I believe...")
+        - Direct statements, no meandering explanations
+        - Natural interruptions and crosstalk when appropriate
+        - Minimal moderator interventions - let the discussion flow
+        - Strong opinions clearly expressed
+        """
+    ),
+    (
+        "human",
+        """Facilitate a realistic Investment Round Table discussion about {ticker} with the following analyst signals:
 
-            Analyst Signals and Reasoning:
-            {ticker_signals}
+        Analyst Signals and Reasoning:
+        {ticker_signals}
 
-            Create a logical discussion flow where each analyst speaks ONLY when they have something valuable 
-            to add. Allow the conversation to continue until all important aspects have been thoroughly 
-            explored and a well-reasoned decision is reached.
+        Create a logical discussion flow where each analyst speaks ONLY when they have something valuable 
+        to add. Allow the conversation to continue until all important aspects have been thoroughly 
+        explored and a well-reasoned decision is reached.
 
-            Guidelines:
-            - Let the conversation flow NATURALLY - analysts should respond to each other directly
-            - Keep each contribution CONCISE and TO THE POINT
-            - Allow DISAGREEMENT to play out fully with direct challenges
-            - Don't artificially include everyone - some may contribute more than others
-            - Let discussion continue until a TRUE CONSENSUS emerges (or clear disagreement is documented)
-            - Focus on getting to the RIGHT ANSWER, not a specific format or length
+        Guidelines:
+        - Let the conversation flow NATURALLY - analysts should respond to each other directly
+        - Keep each contribution CONCISE and TO THE POINT
+        - Allow DISAGREEMENT to play out fully with direct challenges
+        - Don't artificially include everyone - some may contribute more than others
+        - Let discussion continue until a TRUE CONSENSUS emerges (or clear disagreement is documented)
+        - Focus on getting to the RIGHT ANSWER, not a specific format or length
 
-            IMPORTANT FORMAT INSTRUCTIONS:
-            Your response must be a valid JSON object with these fields:
-            - signal: "bullish" or "bearish" or "neutral" string
-            - confidence: a number between 0-100
-            - reasoning: a string explaining the final decision
-            - discussion_summary: a string summarizing key points
-            - consensus_view: a string describing areas of agreement
-            - dissenting_opinions: a string summarizing contrarian views
-            - conversation_transcript: a STRING (not an array/list) containing the complete conversation
+        IMPORTANT FORMAT INSTRUCTIONS:
+        Your response must be a valid JSON object with these fields:
+        - signal: "bullish" or "bearish" or "neutral" string
+        - confidence: a number between 0-100
+        - reasoning: a string explaining the final decision
+        - discussion_summary: a string summarizing key points
+        - consensus_view: a string describing areas of agreement
+        - dissenting_opinions: a string summarizing contrarian views
+        - conversation_transcript: a STRING (not an array/list) containing the complete conversation
 
-            For the conversation_transcript, combine all dialogue into a SINGLE STRING with line breaks.
-            DO NOT format it as an array or list of messages.
+        For the conversation_transcript, combine all dialogue into a SINGLE STRING with line breaks.
+        DO NOT format it as an array or list of messages.
 
-            Example of proper JSON format:
-            {{
-              "signal": "bullish",
-              "confidence": 75,
-              "reasoning": "Based on strong growth and valuation...",
-              "discussion_summary": "The committee focused on...",
-              "consensus_view": "Most analysts agreed that...",
-              "dissenting_opinions": "Charlie Munger disagreed with...",
-              "conversation_transcript": "Moderator: Welcome everyone...\\nWarren Buffett: I've looked at...\\nCathie Wood: The innovation potential..."
-            }}
-            """
-        )
-    ])
+        Example of proper JSON format:
+        {{
+          "signal": "bullish",
+          "confidence": 75,
+          "reasoning": "Based on strong growth and valuation...",
+          "discussion_summary": "The committee focused on...",
+          "consensus_view": "Most analysts agreed that...",
+          "dissenting_opinions": "Charlie Munger disagreed with...",
+          "conversation_transcript": "Moderator: Welcome everyone...\\nWarren Buffett: I've looked at...\\nCathie Wood: The innovation potential..."
+        }}
+        """
+    )
+])
 
+
+def simulate_round_table(
+    ticker: str,
+    ticker_signals: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> RoundTableOutput:
+    """Simulate a round table discussion among analysts and reach a decision."""
     # Generate the prompt
-    prompt = template.invoke({
-        "ticker_signals": json.dumps(ticker_signals, indent=2),
+    prompt = ROUND_TABLE_TEMPLATE.invoke({
+        "ticker_signals": compact_json(ticker_signals),
         "ticker": ticker
     })
 
@@ -3,7 +3,7 @@ from graph.state import AgentState, show_agent_reasoning
 from utils.progress import progress
 import pandas as pd
 import numpy as np
-import json
+from utils.serialization import dumps
 
 from tools.api import get_insider_trades, get_company_news
 
@@ -83,7 +83,7 @@ def sentiment_agent(state: AgentState):
 
     # Create the sentiment message
     message = HumanMessage(
-        content=json.dumps(sentiment_analysis),
+        content=dumps(sentiment_analysis),
         name="sentiment_agent",
     )
 
@@ -4,11 +4,11 @@ from langchain_core.messages import HumanMessage
 
 from graph.state import AgentState, show_agent_reasoning
 
-import json
+from utils.serialization import dumps
 import pandas as pd
 import numpy as np
 
-from tools.api import get_prices, prices_to_df
+from tools.api import get_price_data
 from utils.progress import progress
 
 
@@ -33,20 +33,17 @@ def technical_analyst_agent(state: AgentState):
     for ticker in tickers:
         progress.update_status("technical_analyst_agent", ticker, "Analyzing price data")
 
-        # Get the historical price data
-        prices = get_prices(
+        # Get the historical price data (a zero-copy slice of the shared price panel when one is attached)
+        prices_df = get_price_data(
             ticker=ticker,
             start_date=start_date,
             end_date=end_date,
         )
 
-        if not prices:
+        if prices_df.empty:
             progress.update_status("technical_analyst_agent", ticker, "Failed: No price data found")
             continue
 
-        # Convert prices to a DataFrame
-        prices_df = prices_to_df(prices)
-
         progress.update_status("technical_analyst_agent", ticker, "Calculating trend signals")
         trend_signals = calculate_trend_signals(prices_df)
 
@@ -119,7 +116,7 @@ def technical_analyst_agent(state: AgentState):
 
     # Create the technical analyst message
     message = HumanMessage(
-        content=json.dumps(technical_analysis),
+        content=dumps(technical_analysis),
         name="technical_analyst_agent",
     )
 
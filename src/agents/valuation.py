@@ -1,7 +1,7 @@
 from langchain_core.messages import HumanMessage
 from graph.state import AgentState, show_agent_reasoning
 from utils.progress import progress
-import json
+from utils.serialization import dumps
 
 from tools.api import get_financial_metrics, get_market_cap, search_line_items
 
@@ -130,7 +130,7 @@ def valuation_agent(state: AgentState):
         progress.update_status("valuation_agent", ticker, "Done")
 
     message = HumanMessage(
-        content=json.dumps(valuation_analysis),
+        content=dumps(valuation_analysis),
         name="valuation_agent",
     )
 
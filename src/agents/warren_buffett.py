@@ -2,10 +2,10 @@ from graph.state import AgentState, show_agent_reasoning
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
-import json
+from utils.serialization import dumps
 from typing_extensions import Literal
 from tools.api import get_financial_metrics, get_market_cap, search_line_items
-from utils.llm import call_llm
+from utils.llm import call_llm_for_tickers
 from utils.progress import progress
 
 
@@ -96,13 +96,16 @@ def warren_buffett_agent(state: AgentState):
         }
 
         progress.update_status("warren_buffett_agent", ticker, "Generating Buffett analysis")
-        buffett_output = generate_buffett_output(
-            ticker=ticker,
-            analysis_data=analysis_data,
-            model_name=state["metadata"]["model_name"],
-            model_provider=state["metadata"]["model_provider"],
-        )
 
+    # Ask the LLM for every ticker at once instead of one after another
+    buffett_outputs = generate_buffett_outputs(
+        tickers=list(analysis_data.keys()),
+        analysis_data=analysis_data,
+        model_name=state["metadata"]["model_name"],
+        model_provider=state["metadata"]["model_provider"],
+    )
+
+    for ticker, buffett_output in buffett_outputs.items():
         # Store analysis in consistent format with other agents
         buffett_analysis[ticker] = {
             "signal": buffett_output.signal,
@@ -113,7 +116,7 @@ def warren_buffett_agent(state: AgentState):
         progress.update_status("warren_buffett_agent", ticker, "Done")
 
     # Create the message
-    message = HumanMessage(content=json.dumps(buffett_analysis), name="warren_buffett_agent")
+    message = HumanMessage(content=dumps(buffett_analysis), name="warren_buffett_agent")
 
     # Show reasoning if requested
     if state["metadata"]["show_reasoning"]:
@@ -291,61 +294,68 @@ def generate_buffett_output(
     model_provider: str,
 ) -> WarrenBuffettSignal:
     """Get investment decision from LLM with Buffett's principles"""
-    template = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """You are a Warren Buffett AI agent. Decide on investment signals based on Warren Buffett’s principles:
-
-                Circle of Competence: Only invest in businesses you understand
-                Margin of Safety: Buy well below intrinsic value
-                Economic Moat: Prefer companies with lasting advantages
-                Quality Management: Look for conservative, shareholder-oriented teams
-                Financial Strength: Low debt, strong returns on equity
-                Long-term Perspective: Invest in businesses, not just stocks
-
-                Rules:
-                - Buy only if margin of safety > 30%
-                - Focus on owner earnings and intrinsic value
-                - Prefer consistent earnings growth
-                - Avoid high debt or poor management
-                - Hold good businesses long term
-                - Sell when fundamentals deteriorate or the valuation is too high
-                """,
-            ),
-            (
-                "human",
-                """Based on the following data, create the investment signal as Warren Buffett would.
-
-                Analysis Data for {ticker}:
-                {analysis_data}
-
-                Return the trading signal in the following JSON format:
-                {{
-                  "signal": "bullish/bearish/neutral",
-                  "confidence": float (0-100),
-                  "reasoning": "string"
-                }}
+    return generate_buffett_outputs([ticker], analysis_data, model_name, model_provider)[ticker]
+
+
+WARREN_BUFFETT_TEMPLATE = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You are a Warren Buffett AI agent. Decide on investment signals based on Warren Buffett’s principles:
+
+            Circle of Competence: Only invest in businesses you understand
+            Margin of Safety: Buy well below intrinsic value
+            Economic Moat: Prefer companies with lasting advantages
+            Quality Management: Look for conservative, shareholder-oriented teams
+            Financial Strength: Low debt, strong returns on equity
+            Long-term Perspective: Invest in businesses, not just stocks
+
+            Rules:
+            - Buy only if margin of safety > 30%
+            - Focus on owner earnings and intrinsic value
+            - Prefer consistent earnings growth
+            - Avoid high debt or poor management
+            - Hold good businesses long term
+            - Sell when fundamentals deteriorate or the valuation is too high
+
+            Return the trading signal in the following JSON format:
+            {{
+              "signal": "bullish/bearish/neutral",
+              "confidence": float (0-100),
+              "reasoning": "string"
+            }}
             """,
-            ),
-        ]
-    )
+        ),
+        (
+            "human",
+            """Based on the following data, create the investment signal as Warren Buffett would.
+
+            Analysis Data for {ticker}:
+            {analysis_data}
+        """,
+        ),
+    ]
+)
 
-    # Generate the prompt
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2), 
-        "ticker": ticker
-      })
 
+def generate_buffett_outputs(
+    tickers: list[str],
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> dict[str, WarrenBuffettSignal]:
+    """Get investment decisions for several tickers, from concurrent or batched LLM calls"""
     # Create default factory for WarrenBuffettSignal
     def create_default_warren_buffett_signal():
         return WarrenBuffettSignal(signal="neutral", confidence=0.0, reasoning="Error in analysis, defaulting to neutral")
 
-    return call_llm(
-        prompt=prompt, 
-        model_name=model_name, 
-        model_provider=model_provider, 
-        pydantic_model=WarrenBuffettSignal, 
-        agent_name="warren_buffett_agent", 
+    return call_llm_for_tickers(
+        template=WARREN_BUFFETT_TEMPLATE,
+        tickers=tickers,
+        analysis_data=analysis_data,
+        model_name=model_name,
+        model_provider=model_provider,
+        pydantic_model=WarrenBuffettSignal,
+        agent_name="warren_buffett_agent",
         default_factory=create_default_warren_buffett_signal,
-        )
+    )
@@ -2,15 +2,16 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from graph.state import AgentState, show_agent_reasoning
 from pydantic import BaseModel, Field
-import json
+from utils.serialization import dumps
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from utils.llm import call_llm_for_tickers
 import praw
 from datetime import datetime, timedelta
 import os
 
 from tools.api import get_financial_metrics, get_market_cap, search_line_items, get_company_news
+from data.replay import recordable
 
 
 class WSBSignal(BaseModel):
@@ -121,21 +122,6 @@ def wsb_agent(state: AgentState):
         }
         
         progress.update_status("wsb_agent", ticker, "Generating WSB-style analysis")
-        wsb_output = generate_wsb_output(
-            ticker=ticker,
-            analysis_data=analysis_data,
-            model_name=state["metadata"]["model_name"],
-            model_provider=state["metadata"]["model_provider"],
-        )
-        
-        # Store analysis in consistent format with other agents
-        wsb_analysis[ticker] = {
-            "signal": wsb_output.signal,
-            "confidence": wsb_output.confidence,
-            "reasoning": wsb_output.reasoning,
-        }
-        
-        progress.update_status("wsb_agent", ticker, "Done")
         
         # Remove testimonial feature and simplified sentiment summary
         if reddit_posts:
@@ -146,10 +132,28 @@ def wsb_agent(state: AgentState):
             
             print(f"\nWSB Stats for {ticker}: {len(reddit_posts)} posts found.")
             print(f"Sentiment: {bullish_count} bullish, {bearish_count} bearish, {neutral_count} neutral\n")
-    
+
+    # Ask the LLM for every ticker at once instead of one after another
+    wsb_outputs = generate_wsb_outputs(
+        tickers=list(analysis_data.keys()),
+        analysis_data=analysis_data,
+        model_name=state["metadata"]["model_name"],
+        model_provider=state["metadata"]["model_provider"],
+    )
+
+    for ticker, wsb_output in wsb_outputs.items():
+        # Store analysis in consistent format with other agents
+        wsb_analysis[ticker] = {
+            "signal": wsb_output.signal,
+            "confidence": wsb_output.confidence,
+            "reasoning": wsb_output.reasoning,
+        }
+        
+        progress.update_status("wsb_agent", ticker, "Done")
+
     # Create the message
     message = HumanMessage(
-        content=json.dumps(wsb_analysis),
+        content=dumps(wsb_analysis),
         name="wsb_agent"
     )
     
@@ -166,6 +170,7 @@ def wsb_agent(state: AgentState):
     }
 
 
+@recordable(RedditPost, default=list)
 def get_reddit_posts(ticker: str, start_date: str = None, end_date: str = None, limit: int = 10) -> list[RedditPost]:
     """
     Fetch a small number of recent, high-quality Reddit posts from r/wallstreetbets about a specific ticker.
@@ -635,69 +640,76 @@ def generate_wsb_output(
     model_provider: str,
 ) -> WSBSignal:
     """Generate WallStreetBets style investment decision from LLM."""
-    template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            """You are a WallStreetBets trader analyzing stocks using the distinctive WSB approach and vocabulary:
+    return generate_wsb_outputs([ticker], analysis_data, model_name, model_provider)[ticker]
 
-            1. Look for moonshot opportunities with asymmetric risk/reward
-            2. Identify potential short squeeze candidates and meme stock momentum
-            3. Consider YOLO-worthy options plays (particularly weeklies with high leverage)
-            4. Value social sentiment and Reddit activity over traditional fundamentals
-            5. Use WSB terminology correctly in your analysis
 
-            Key WSB terminology to incorporate:
-            - "Tendies" (profits/money)
-            - "Diamond hands" (holding despite volatility)
-            - "Paper hands" (selling too early)
-            - "YOLO" (all-in bets)
-            - "FD" (risky weekly options)
-            - "Autist" (someone who does thorough analysis)
-            - "Smooth brain" (someone who makes poor decisions)
-            - "Apes" (WSB community members)
-            - "To the moon" (stock with huge upside potential)
-            - "Drilling" (stock rapidly declining)
-            
-            Your analysis style:
-            - Focus on potential asymmetric gains over conservative investments
-            - Consider both long plays and short squeeze opportunities
-            - Emphasize options strategies with high leverage potential
-            - Be contrarian when institutional investors are overly bearish
-            - Consider Reddit activity and sentiment as key indicators
-            - Maintain factual analysis while incorporating WSB culture
-            
-            Provide a signal (bullish/bearish/neutral) with confidence level and clear reasoning using appropriate WSB terminology.
-            """
-        ),
-        (
-            "human",
-            """Based on the following WSB-style analysis, create an investment signal:
+WSB_TEMPLATE = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """You are a WallStreetBets trader analyzing stocks using the distinctive WSB approach and vocabulary:
 
-            Analysis Data for {ticker}:
-            {analysis_data}
+        1. Look for moonshot opportunities with asymmetric risk/reward
+        2. Identify potential short squeeze candidates and meme stock momentum
+        3. Consider YOLO-worthy options plays (particularly weeklies with high leverage)
+        4. Value social sentiment and Reddit activity over traditional fundamentals
+        5. Use WSB terminology correctly in your analysis
 
-            Return the trading signal in the following JSON format:
-            {{
-              "signal": "bullish/bearish/neutral",
-              "confidence": float (0-100),
-              "reasoning": "string"
-            }}
-            """
-        )
-    ])
+        Key WSB terminology to incorporate:
+        - "Tendies" (profits/money)
+        - "Diamond hands" (holding despite volatility)
+        - "Paper hands" (selling too early)
+        - "YOLO" (all-in bets)
+        - "FD" (risky weekly options)
+        - "Autist" (someone who does thorough analysis)
+        - "Smooth brain" (someone who makes poor decisions)
+        - "Apes" (WSB community members)
+        - "To the moon" (stock with huge upside potential)
+        - "Drilling" (stock rapidly declining)
+        
+        Your analysis style:
+        - Focus on potential asymmetric gains over conservative investments
+        - Consider both long plays and short squeeze opportunities
+        - Emphasize options strategies with high leverage potential
+        - Be contrarian when institutional investors are overly bearish
+        - Consider Reddit activity and sentiment as key indicators
+        - Maintain factual analysis while incorporating WSB culture
+        
+        Provide a signal (bullish/bearish/neutral) with confidence level and clear reasoning using appropriate WSB terminology.
+
+        Return the trading signal in the following JSON format:
+        {{
+          "signal": "bullish/bearish/neutral",
+          "confidence": float (0-100),
+          "reasoning": "string"
+        }}
+        """
+    ),
+    (
+        "human",
+        """Based on the following WSB-style analysis, create an investment signal:
+
+        Analysis Data for {ticker}:
+        {analysis_data}
+        """
+    )
+])
 
-    # Generate the prompt
-    prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
-        "ticker": ticker
-    })
 
+def generate_wsb_outputs(
+    tickers: list[str],
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> dict[str, WSBSignal]:
+    """Generates WSB-style decisions for several tickers from concurrent or batched LLM calls."""
     # Create default factory for WSBSignal
     def create_default_signal():
         return WSBSignal(signal="neutral", confidence=0.0, reasoning="Error in analysis, defaulting to neutral")
 
-    return call_llm(
-        prompt=prompt,
+    return call_llm_for_tickers(
+        template=WSB_TEMPLATE,
+        tickers=tickers,
+        analysis_data=analysis_data,
         model_name=model_name,
         model_provider=model_provider,
         pydantic_model=WSBSignal,
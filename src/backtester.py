@@ -1,3 +1,5 @@
+import copy
+import os
 import sys
 
 from datetime import datetime, timedelta
@@ -21,6 +23,18 @@ from tools.api import (
     get_insider_trades,
 )
 from utils.display import print_backtest_results, format_backtest_row
+from data.price_panel import PricePanel, export_price_panel
+from data.metrics import get_data_metrics
+from utils.deadline import deadline_scope
+from utils.run_budget import RunBudget, budget_scope
+from utils.run_estimate import estimate_backtest, print_estimate
+from utils.serialization import loads
+from utils.fast_mode import FAST_MODE_CHOICES, FAST_MODE_ENV, backtest_context
+from utils.llm_batch import BatchCollector, collecting, run_batch
+from utils.llm_cache import LLM_CACHE_ENV
+from utils.llm_hedge import HEDGE_ENV
+from utils.llm import TICKER_BATCH_SIZE_ENV
+from utils.llm_usage import get_usage_tracker
 from typing_extensions import Callable
 
 init(autoreset=True)
@@ -39,6 +53,9 @@ class Backtester:
         selected_analysts: list[str] = [],
         initial_margin_requirement: float = 0.0,
         is_crypto: bool = False,
+        price_panel_path: str | None = None,
+        day_deadline: float | None = None,
+        batch_inference: bool = False,
     ):
         """
         :param agent: The trading agent (Callable).
@@ -51,6 +68,9 @@ class Backtester:
         :param selected_analysts: List of analyst names or IDs to incorporate.
         :param initial_margin_requirement: The margin ratio (e.g. 0.5 = 50%).
         :param is_crypto: Whether to analyze cryptocurrency instead of stocks.
+        :param price_panel_path: Directory to write a memory-mapped price panel to, shared with worker processes.
+        :param day_deadline: Seconds each trading day's agent run may take before pending calls fall back to defaults.
+        :param batch_inference: Answer the persona agents' prompts for the whole period in one provider batch before simulating.
         """
         self.agent = agent
         self.tickers = tickers
@@ -61,6 +81,9 @@ class Backtester:
         self.model_provider = model_provider
         self.selected_analysts = selected_analysts
         self.is_crypto = is_crypto
+        self.price_panel_path = price_panel_path
+        self.day_deadline = day_deadline
+        self.batch_inference = batch_inference
 
         # Store the margin ratio (e.g. 0.5 means 50% margin required).
         self.margin_ratio = initial_margin_requirement
@@ -296,24 +319,66 @@ class Backtester:
             # Fetch company news
             get_company_news(ticker, self.end_date, start_date=self.start_date, limit=1000, is_crypto=self.is_crypto)
 
+        # Publish the price history as a shared memory-mapped panel so that agents
+        # (and any worker processes) slice it instead of rebuilding DataFrames
+        if self.price_panel_path:
+            panel = PricePanel.build(self.tickers, start_date_str, self.end_date, is_crypto=self.is_crypto)
+            export_price_panel(panel, self.price_panel_path)
+            print(f"Price panel written to {self.price_panel_path}")
+
         print("Data pre-fetch complete.")
 
     def parse_agent_response(self, agent_output):
         """Parse JSON output from the agent (fallback to 'hold' if invalid)."""
-        import json
-
         try:
-            decision = json.loads(agent_output)
+            decision = loads(agent_output)
             return decision
         except Exception:
             print(f"Error parsing action: {agent_output}")
             return {"action": "hold", "quantity": 0}
 
+    def prefill_llm_batch(self, dates):
+        """
+        Run the agents over every date without calling the LLM, collecting the persona
+        agents' prompts (which do not depend on the portfolio), then answer them in one
+        provider batch and store the results in the response cache for the real run.
+        """
+        collector = BatchCollector()
+        portfolio = copy.deepcopy(self.portfolio)
+        print("\nCollecting LLM prompts for batch inference...")
+        with collecting(collector), backtest_context():
+            for current_date in dates:
+                lookback_start = (current_date - timedelta(days=30)).strftime("%Y-%m-%d")
+                current_date_str = current_date.strftime("%Y-%m-%d")
+                if lookback_start == current_date_str:
+                    continue
+                try:
+                    self.agent(
+                        tickers=self.tickers,
+                        start_date=lookback_start,
+                        end_date=current_date_str,
+                        portfolio=portfolio,
+                        model_name=self.model_name,
+                        model_provider=self.model_provider,
+                        selected_analysts=self.selected_analysts,
+                    )
+                except Exception as e:
+                    print(f"Error collecting prompts for {current_date_str}: {e}")
+
+        if not len(collector):
+            print("No uncached prompts to batch.")
+            return
+        print(f"Collected {len(collector)} prompts, waiting for the batch to finish...")
+        cached = run_batch(collector)
+        print(f"Batch inference complete: {cached} responses cached.")
+
     def run_backtest(self):
         # Pre-fetch all data at the start
         self.prefetch_data()
 
         dates = pd.date_range(self.start_date, self.end_date, freq="B")
+        if self.batch_inference:
+            self.prefill_llm_batch(dates)
         table_rows = []
         performance_metrics = {
             'sharpe_ratio': None,
@@ -355,15 +420,16 @@ class Backtester:
             # ---------------------------------------------------------------
             # 1) Execute the agent's trades
             # ---------------------------------------------------------------
-            output = self.agent(
-                tickers=self.tickers,
-                start_date=lookback_start,
-                end_date=current_date_str,
-                portfolio=self.portfolio,
-                model_name=self.model_name,
-                model_provider=self.model_provider,
-                selected_analysts=self.selected_analysts,
-            )
+            with backtest_context(), deadline_scope(self.day_deadline):
+                output = self.agent(
+                    tickers=self.tickers,
+                    start_date=lookback_start,
+                    end_date=current_date_str,
+                    portfolio=self.portfolio,
+                    model_name=self.model_name,
+                    model_provider=self.model_provider,
+                    selected_analysts=self.selected_analysts,
+                )
             decisions = output["decisions"]
             analyst_signals = output["analyst_signals"]
 
@@ -658,9 +724,70 @@ if __name__ == "__main__":
         action="store_true",
         help="Analyze cryptocurrency instead of stocks (append -USD to ticker symbols)"
     )
+    parser.add_argument(
+        "--price-panel",
+        type=str,
+        help="Directory for a memory-mapped price panel shared across processes (e.g. /dev/shm/ritadel_prices)",
+    )
+    parser.add_argument(
+        "--ticker-batch-size",
+        type=int,
+        help="Tickers per persona-agent LLM request (default 1, or LLM_TICKER_BATCH_SIZE)",
+    )
+    parser.add_argument(
+        "--fast-mode",
+        choices=FAST_MODE_CHOICES,
+        help="Skip persona-agent LLM calls when the rule-based score is decisive (default off, or LLM_FAST_MODE)",
+    )
+    parser.add_argument(
+        "--hedge",
+        nargs="?",
+        const="portfolio_management_agent",
+        help="Agents (comma-separated, or all) whose slow LLM calls get a duplicate request after their p90 latency (default: the portfolio manager, or LLM_HEDGE)",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Seconds each trading day's agent run may take; pending LLM and data calls then fall back to defaults",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Answer the persona agents' prompts for the whole period in one provider batch first (slower to start, cheaper; turns on the LLM response cache)",
+    )
+    parser.add_argument(
+        "--max-concurrent-llm",
+        type=int,
+        help="LLM calls the backtest may have in flight at once (default no limit, or LLM_RUN_MAX_CONCURRENT)",
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        help="Total LLM tokens the whole backtest may use; later calls fall back to rule-based or default outputs (or LLM_RUN_MAX_TOKENS)",
+    )
+    parser.add_argument(
+        "--max-cost",
+        type=float,
+        help="Estimated LLM spend in USD the whole backtest may use before falling back to rule-based or default outputs (or LLM_RUN_MAX_COST)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the expected LLM calls, tokens, cost and wall time from past usage instead of running",
+    )
 
     args = parser.parse_args()
 
+    if args.ticker_batch_size:
+        os.environ[TICKER_BATCH_SIZE_ENV] = str(args.ticker_batch_size)
+    if args.fast_mode:
+        os.environ[FAST_MODE_ENV] = args.fast_mode
+    if args.hedge:
+        os.environ[HEDGE_ENV] = args.hedge
+    if args.batch:
+        # Batch results are served through the response cache
+        os.environ.setdefault(LLM_CACHE_ENV, "1")
+
     # Parse tickers from comma-separated string
     tickers = [ticker.strip() for ticker in args.tickers.split(",")] if args.tickers else []
     
@@ -720,6 +847,12 @@ if __name__ == "__main__":
             model_provider = "Unknown"
             print(f"\nSelected model: {Fore.GREEN + Style.BRIGHT}{model_choice}{Style.RESET_ALL}\n")
 
+    # Expected LLM load of the whole backtest, from past usage
+    if args.dry_run:
+        estimate = estimate_backtest(tickers, selected_analysts, model_choice, model_provider, args.start_date, args.end_date, max_concurrent=args.max_concurrent_llm)
+        print_estimate(estimate, args.deadline)
+        sys.exit(0)
+
     # Create and run the backtester
     backtester = Backtester(
         agent=run_hedge_fund,
@@ -731,8 +864,19 @@ if __name__ == "__main__":
         model_provider=model_provider,
         selected_analysts=selected_analysts,
         initial_margin_requirement=args.margin_requirement,
-        is_crypto=args.crypto
+        is_crypto=args.crypto,
+        price_panel_path=args.price_panel,
+        day_deadline=args.deadline,
+        batch_inference=args.batch,
     )
 
-    performance_metrics = backtester.run_backtest()
+    # One budget covers every trading day of the backtest
+    with budget_scope(RunBudget.from_env(args.max_concurrent_llm, args.max_tokens, args.max_cost)):
+        performance_metrics = backtester.run_backtest()
     performance_df = backtester.analyze_performance()
+
+    # Show how much of the backtest was served from the data cache
+    get_data_metrics().print_summary()
+    get_usage_tracker().print_summary()
+    # Keep this backtest's calls for later estimates
+    get_usage_tracker().save_history()
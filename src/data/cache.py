@@ -1,5 +1,22 @@
+import json
+import os
+import threading
+
+# Environment variable pointing at the on-disk cache snapshot
+CACHE_PATH_ENV = "DATA_CACHE_PATH"
+
+
 class Cache:
-    """In-memory cache for API responses."""
+    """In-memory cache for API responses.
+
+    Reads are lock-free: every write builds a new list and swaps it in, so a reader
+    always sees either the old or the new list, never a half-merged one. Writes to
+    the same ticker are serialized by one of a fixed set of striped locks, so
+    concurrent agents fetching different tickers do not contend.
+    """
+
+    # Number of lock stripes shared by all the per-ticker stores
+    NUM_SHARDS = 32
 
     def __init__(self):
         self._prices_cache: dict[str, list[dict[str, any]]] = {}
@@ -7,11 +24,20 @@ class Cache:
         self._line_items_cache: dict[str, list[dict[str, any]]] = {}
         self._insider_trades_cache: dict[str, list[dict[str, any]]] = {}
         self._company_news_cache: dict[str, list[dict[str, any]]] = {}
+        self._locks = [threading.Lock() for _ in range(self.NUM_SHARDS)]
+
+    def _lock_for(self, ticker: str) -> threading.Lock:
+        return self._locks[hash(ticker) % self.NUM_SHARDS]
+
+    def _update(self, store: dict[str, list[dict]], ticker: str, merge):
+        """Replace `store[ticker]` with `merge(current)` while holding the ticker's lock."""
+        with self._lock_for(ticker):
+            store[ticker] = merge(store.get(ticker))
 
     def _merge_data(self, existing: list[dict] | None, new_data: list[dict], key_field: str) -> list[dict]:
         """Merge existing and new data, avoiding duplicates based on a key field."""
         if not existing:
-            return new_data
+            return list(new_data)
         
         # Create a set of existing keys for O(1) lookup
         existing_keys = {item[key_field] for item in existing}
@@ -21,17 +47,31 @@ class Cache:
         merged.extend([item for item in new_data if item[key_field] not in existing_keys])
         return merged
 
+    @staticmethod
+    def _line_item_key(item: dict) -> tuple[str, str | None]:
+        # ttm and annual rows can share a report date, so the period type is part of the key
+        return item["report_period"], item.get("period")
+
+    def _merge_line_items(self, existing: list[dict] | None, new_data: list[dict]) -> list[dict]:
+        """Merge line items by report period and period type, filling in fields missing from existing rows."""
+        if not existing:
+            return list(new_data)
+
+        # Different agents ask for different line items for the same period, so
+        # existing periods are widened with the new fields rather than skipped
+        new_by_period = {self._line_item_key(item): item for item in new_data}
+        merged = [{**new_by_period[self._line_item_key(item)], **item} if self._line_item_key(item) in new_by_period else item for item in existing]
+        existing_periods = {self._line_item_key(item) for item in existing}
+        merged.extend([item for item in new_data if self._line_item_key(item) not in existing_periods])
+        return merged
+
     def get_prices(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached price data if available."""
         return self._prices_cache.get(ticker)
 
     def set_prices(self, ticker: str, data: list[dict[str, any]]):
         """Append new price data to cache."""
-        self._prices_cache[ticker] = self._merge_data(
-            self._prices_cache.get(ticker),
-            data,
-            key_field="time"
-        )
+        self._update(self._prices_cache, ticker, lambda existing: self._merge_data(existing, data, key_field="time"))
 
     def get_financial_metrics(self, ticker: str) -> list[dict[str, any]]:
         """Get cached financial metrics if available."""
@@ -39,23 +79,15 @@ class Cache:
 
     def set_financial_metrics(self, ticker: str, data: list[dict[str, any]]):
         """Append new financial metrics to cache."""
-        self._financial_metrics_cache[ticker] = self._merge_data(
-            self._financial_metrics_cache.get(ticker),
-            data,
-            key_field="report_period"
-        )
+        self._update(self._financial_metrics_cache, ticker, lambda existing: self._merge_data(existing, data, key_field="report_period"))
 
     def get_line_items(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached line items if available."""
         return self._line_items_cache.get(ticker)
 
     def set_line_items(self, ticker: str, data: list[dict[str, any]]):
-        """Append new line items to cache."""
-        self._line_items_cache[ticker] = self._merge_data(
-            self._line_items_cache.get(ticker),
-            data,
-            key_field="report_period"
-        )
+        """Add new line items to cache, filling in fields missing from existing periods."""
+        self._update(self._line_items_cache, ticker, lambda existing: self._merge_line_items(existing, data))
 
     def get_insider_trades(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached insider trades if available."""
@@ -63,11 +95,8 @@ class Cache:
 
     def set_insider_trades(self, ticker: str, data: list[dict[str, any]]):
         """Append new insider trades to cache."""
-        self._insider_trades_cache[ticker] = self._merge_data(
-            self._insider_trades_cache.get(ticker),
-            data,
-            key_field="filing_date"  # Could also use transaction_date if preferred
-        )
+        # Could also key on transaction_date if preferred
+        self._update(self._insider_trades_cache, ticker, lambda existing: self._merge_data(existing, data, key_field="filing_date"))
 
     def get_company_news(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached company news if available."""
@@ -75,11 +104,43 @@ class Cache:
 
     def set_company_news(self, ticker: str, data: list[dict[str, any]]):
         """Append new company news to cache."""
-        self._company_news_cache[ticker] = self._merge_data(
-            self._company_news_cache.get(ticker),
-            data,
-            key_field="date"
-        )
+        self._update(self._company_news_cache, ticker, lambda existing: self._merge_data(existing, data, key_field="date"))
+
+    def save(self, path: str):
+        """Write a snapshot of the cache to a JSON file."""
+        # Shallow copies so writers adding new tickers cannot change the dicts mid-dump
+        snapshot = {
+            "prices": dict(self._prices_cache),
+            "financial_metrics": dict(self._financial_metrics_cache),
+            "line_items": dict(self._line_items_cache),
+            "insider_trades": dict(self._insider_trades_cache),
+            "company_news": dict(self._company_news_cache),
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial snapshot
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """Merge a snapshot written by `save` into the cache."""
+        with open(path) as f:
+            snapshot = json.load(f)
+
+        setters = {
+            "prices": self.set_prices,
+            "financial_metrics": self.set_financial_metrics,
+            "line_items": self.set_line_items,
+            "insider_trades": self.set_insider_trades,
+            "company_news": self.set_company_news,
+        }
+        for name, setter in setters.items():
+            for ticker, data in snapshot.get(name, {}).items():
+                setter(ticker, data)
 
 
 # Global cache instance
@@ -89,3 +150,25 @@ _cache = Cache()
 def get_cache() -> Cache:
     """Get the global cache instance."""
     return _cache
+
+
+def load_persistent_cache(path: str | None = None) -> bool:
+    """Warm the global cache from disk (defaults to DATA_CACHE_PATH). Returns True if loaded."""
+    path = path or os.environ.get(CACHE_PATH_ENV)
+    if not path or not os.path.exists(path):
+        return False
+    try:
+        _cache.load(path)
+        return True
+    except Exception as e:
+        print(f"Error loading data cache from {path}: {str(e)}")
+        return False
+
+
+def save_persistent_cache(path: str | None = None) -> bool:
+    """Write the global cache to disk (defaults to DATA_CACHE_PATH). Returns True if saved."""
+    path = path or os.environ.get(CACHE_PATH_ENV)
+    if not path:
+        return False
+    _cache.save(path)
+    return True
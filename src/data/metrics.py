@@ -0,0 +1,172 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from tabulate import tabulate
+
+# Upper bounds (seconds) of the provider latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Agent whose node is currently running, used to attribute data calls
+_current_agent: ContextVar[str | None] = ContextVar("data_metrics_agent", default=None)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float, ok: bool = True):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if not ok:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Approximate a quantile as the upper bound of the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(LATENCY_BUCKETS[i], self.max) if i < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": self.max,
+            "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["inf"], self.counts)),
+        }
+
+
+class DataMetrics:
+    """Thread-safe cache hit/miss counters and provider latency histograms for the data functions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._hits: dict[str, int] = {}
+            self._misses: dict[str, int] = {}
+            self._latency: dict[tuple[str, str], LatencyHistogram] = {}
+            self._agent_calls: dict[str, dict[str, int]] = {}
+
+    def record_hit(self, function: str):
+        """Count a call answered from the cache."""
+        with self._lock:
+            self._hits[function] = self._hits.get(function, 0) + 1
+
+    def record_miss(self, function: str):
+        """Count a call that had to go to a provider, and attribute it to the running agent."""
+        agent = _current_agent.get() or "other"
+        with self._lock:
+            self._misses[function] = self._misses.get(function, 0) + 1
+            agent_calls = self._agent_calls.setdefault(agent, {})
+            agent_calls[function] = agent_calls.get(function, 0) + 1
+
+    def record_latency(self, function: str, provider: str, seconds: float, ok: bool = True):
+        """Add one provider request to the latency histogram."""
+        with self._lock:
+            histogram = self._latency.get((function, provider))
+            if histogram is None:
+                histogram = self._latency[(function, provider)] = LatencyHistogram()
+            histogram.observe(seconds, ok)
+
+    @contextmanager
+    def timed(self, function: str, provider: str):
+        """Time a provider request; an exception counts as an error and is re-raised."""
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record_latency(function, provider, time.perf_counter() - start, ok)
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serializable copy of all counters."""
+        with self._lock:
+            functions = sorted(set(self._hits) | set(self._misses))
+            return {
+                "cache": {
+                    function: {
+                        "hits": self._hits.get(function, 0),
+                        "misses": self._misses.get(function, 0),
+                        "hit_rate": self._hits.get(function, 0) / (self._hits.get(function, 0) + self._misses.get(function, 0)),
+                    }
+                    for function in functions
+                },
+                "providers": {f"{function}:{provider}": histogram.to_dict() for (function, provider), histogram in sorted(self._latency.items())},
+                "agents": {agent: dict(calls) for agent, calls in self._agent_calls.items()},
+            }
+
+    def print_summary(self):
+        """Print cache and provider tables for the run so far."""
+        snapshot = self.snapshot()
+        if not snapshot["cache"] and not snapshot["providers"]:
+            return
+
+        print("\nData cache:")
+        print(tabulate(
+            [[function, s["hits"], s["misses"], f"{s['hit_rate']:.0%}"] for function, s in snapshot["cache"].items()],
+            headers=["Function", "Hits", "Misses", "Hit rate"],
+            tablefmt="grid",
+        ))
+
+        if snapshot["providers"]:
+            print("\nData providers:")
+            print(tabulate(
+                [[key, s["count"], s["errors"], f"{s['mean']:.2f}s", f"{s['p50']:.2f}s", f"{s['p95']:.2f}s", f"{s['max']:.2f}s"] for key, s in snapshot["providers"].items()],
+                headers=["Function:provider", "Requests", "Errors", "Mean", "p50", "p95", "Max"],
+                tablefmt="grid",
+            ))
+
+        if snapshot["agents"]:
+            print("\nCache misses by agent:")
+            print(tabulate(
+                sorted([[agent, sum(calls.values()), ", ".join(f"{f}={n}" for f, n in calls.items())] for agent, calls in snapshot["agents"].items()], key=lambda row: -row[1]),
+                headers=["Agent", "Misses", "By function"],
+                tablefmt="grid",
+            ))
+
+
+def track_agent(agent_name: str, func):
+    """Wrap an agent node so the data calls it makes are attributed to it."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_agent.set(agent_name)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_agent.reset(token)
+
+    return wrapper
+
+
+# Global metrics instance
+_metrics = DataMetrics()
+
+
+def get_data_metrics() -> DataMetrics:
+    """Get the global data metrics instance."""
+    return _metrics
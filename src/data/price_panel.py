@@ -0,0 +1,153 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data.models import Price
+
+# Environment variable that tells worker processes where to attach the panel
+PRICE_PANEL_ENV = "PRICE_PANEL_PATH"
+
+# Field order of the last axis of the panel
+PANEL_FIELDS = ("open", "close", "high", "low", "volume")
+
+_VALUES_FILE = "values.npy"
+_INDEX_FILE = "index.json"
+
+
+class PricePanel:
+    """Dense dates x tickers x OHLCV price array backed by a memory-mapped file.
+
+    The parent process builds the panel once and saves it to disk (use a path under
+    /dev/shm to keep it in shared memory). Workers attach read-only and every slice
+    they take is a view into the same pages, so price history is never duplicated
+    per process.
+    """
+
+    def __init__(self, dates: np.ndarray, tickers: list[str], values: np.ndarray, start_date: str | None = None, end_date: str | None = None, path: str | None = None):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.values = values
+        # Requested coverage; defaults to the first and last trading date held
+        self.start_date = start_date or (str(dates[0]) if len(dates) else None)
+        self.end_date = end_date or (str(dates[-1]) if len(dates) else None)
+        self.path = path
+        self._ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    @classmethod
+    def from_prices(cls, prices_by_ticker: dict[str, list[Price]], start_date: str | None = None, end_date: str | None = None) -> "PricePanel":
+        """Build an in-memory panel from price lists keyed by ticker."""
+        tickers = list(prices_by_ticker.keys())
+        all_dates = sorted({price.time for prices in prices_by_ticker.values() for price in prices})
+        dates = np.array(all_dates, dtype="datetime64[D]")
+        date_index = {date: i for i, date in enumerate(all_dates)}
+
+        values = np.full((len(dates), len(tickers), len(PANEL_FIELDS)), np.nan, dtype=np.float64)
+        for t, ticker in enumerate(tickers):
+            for price in prices_by_ticker[ticker]:
+                values[date_index[price.time], t] = [getattr(price, field) for field in PANEL_FIELDS]
+
+        return cls(dates, tickers, values, start_date=start_date, end_date=end_date)
+
+    @classmethod
+    def build(cls, tickers: list[str], start_date: str, end_date: str, is_crypto: bool = False) -> "PricePanel":
+        """Fetch prices for every ticker (cache first) and build a panel from them."""
+        from tools.api import get_prices
+
+        prices_by_ticker = {ticker: get_prices(ticker, start_date, end_date, is_crypto=is_crypto) for ticker in tickers}
+        return cls.from_prices(prices_by_ticker, start_date=start_date, end_date=end_date)
+
+    def save(self, path: str) -> "PricePanel":
+        """Write the panel to `path` and return a read-only panel attached to it."""
+        os.makedirs(path, exist_ok=True)
+        values = np.lib.format.open_memmap(os.path.join(path, _VALUES_FILE), mode="w+", dtype=np.float64, shape=self.values.shape)
+        values[:] = self.values
+        values.flush()
+        del values
+
+        with open(os.path.join(path, _INDEX_FILE), "w") as f:
+            json.dump(
+                {
+                    "tickers": self.tickers,
+                    "dates": [str(date) for date in self.dates],
+                    "fields": list(PANEL_FIELDS),
+                    "start_date": self.start_date,
+                    "end_date": self.end_date,
+                },
+                f,
+            )
+
+        return PricePanel.attach(path)
+
+    @classmethod
+    def attach(cls, path: str) -> "PricePanel":
+        """Attach read-only to a panel previously written with `save`."""
+        with open(os.path.join(path, _INDEX_FILE)) as f:
+            index = json.load(f)
+
+        values = np.load(os.path.join(path, _VALUES_FILE), mmap_mode="r")
+        dates = np.array(index["dates"], dtype="datetime64[D]")
+        return cls(dates, index["tickers"], values, start_date=index.get("start_date"), end_date=index.get("end_date"), path=path)
+
+    def has(self, ticker: str) -> bool:
+        """Check whether the panel holds data for a ticker."""
+        return ticker in self._ticker_index
+
+    def covers(self, ticker: str, start_date: str, end_date: str) -> bool:
+        """Check whether the panel holds the ticker over the whole date range."""
+        if not self.has(ticker) or not self.start_date:
+            return False
+        return self.start_date <= start_date and end_date <= self.end_date
+
+    def slice(self, ticker: str, start_date: str, end_date: str) -> tuple[np.ndarray, np.ndarray]:
+        """Return (dates, values) views for a ticker between two dates, inclusive."""
+        start = np.searchsorted(self.dates, np.datetime64(start_date, "D"), side="left")
+        end = np.searchsorted(self.dates, np.datetime64(end_date, "D"), side="right")
+        return self.dates[start:end], self.values[start:end, self._ticker_index[ticker], :]
+
+    def to_df(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """Return a DataFrame shaped like `prices_to_df` output for a ticker slice."""
+        dates, values = self.slice(ticker, start_date, end_date)
+
+        # Drop dates on which this ticker did not trade (e.g. stock holidays in a crypto panel)
+        traded = ~np.isnan(values[:, PANEL_FIELDS.index("close")])
+        if not traded.all():
+            dates, values = dates[traded], values[traded]
+
+        df = pd.DataFrame(values, columns=list(PANEL_FIELDS), index=pd.DatetimeIndex(dates, name="Date"), copy=False)
+        return df
+
+
+# Panel attached in this process, if any
+_panel: PricePanel | None = None
+_panel_checked = False
+
+
+def set_price_panel(panel: PricePanel | None):
+    """Use `panel` for price reads in this process."""
+    global _panel, _panel_checked
+    _panel = panel
+    _panel_checked = True
+
+
+def get_price_panel() -> PricePanel | None:
+    """Get the attached price panel, attaching from PRICE_PANEL_PATH on first use."""
+    global _panel, _panel_checked
+    if not _panel_checked:
+        _panel_checked = True
+        path = os.environ.get(PRICE_PANEL_ENV)
+        if path and os.path.exists(os.path.join(path, _INDEX_FILE)):
+            try:
+                _panel = PricePanel.attach(path)
+            except Exception as e:
+                print(f"Error attaching price panel at {path}: {str(e)}")
+    return _panel
+
+
+def export_price_panel(panel: PricePanel, path: str) -> PricePanel:
+    """Save a panel, attach this process to it, and point child processes at it."""
+    attached = panel.save(path)
+    os.environ[PRICE_PANEL_ENV] = path
+    set_price_panel(attached)
+    return attached
@@ -0,0 +1,114 @@
+import hashlib
+import inspect
+import json
+import os
+import threading
+from functools import wraps
+
+from pydantic import BaseModel
+
+# "record" writes every provider response to the fixture archive, "replay" serves them without network
+REPLAY_MODE_ENV = "DATA_REPLAY_MODE"
+REPLAY_DIR_ENV = "DATA_REPLAY_DIR"
+DEFAULT_REPLAY_DIR = ".replay"
+
+_lock = threading.Lock()
+# Fixtures already read in this process, keyed by file path
+_loaded: dict[str, dict] = {}
+
+
+def get_replay_mode() -> str | None:
+    """Return "record", "replay" or None from DATA_REPLAY_MODE."""
+    mode = os.environ.get(REPLAY_MODE_ENV, "").strip().lower()
+    return mode if mode in ("record", "replay") else None
+
+
+def get_replay_dir() -> str:
+    return os.environ.get(REPLAY_DIR_ENV) or DEFAULT_REPLAY_DIR
+
+
+def _fixture_path(name: str, arguments: dict) -> str:
+    """Fixture file for a call, keyed by a hash of its arguments."""
+    key = hashlib.sha256(json.dumps(arguments, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return os.path.join(get_replay_dir(), name, f"{key}.json")
+
+
+def _dump(result):
+    if isinstance(result, list):
+        return [item.model_dump(mode="json") if isinstance(item, BaseModel) else item for item in result]
+    if isinstance(result, BaseModel):
+        return result.model_dump(mode="json")
+    return result
+
+
+def _load(data, model: type[BaseModel] | None):
+    if model is None or data is None:
+        return data
+    if isinstance(data, list):
+        return [model.model_validate(item) for item in data]
+    return model.model_validate(data)
+
+
+def _read_fixture(path: str) -> dict | None:
+    with _lock:
+        if path in _loaded:
+            return _loaded[path]
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        fixture = json.load(f)
+    with _lock:
+        _loaded[path] = fixture
+    return fixture
+
+
+def _write_fixture(path: str, fixture: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(fixture, f)
+    os.replace(tmp_path, path)
+    with _lock:
+        _loaded[path] = fixture
+
+
+def recordable(model: type[BaseModel] | None = None, default=None):
+    """Make an external data call recordable and replayable.
+
+    `model` rebuilds replayed results (a single model or a list of them). In replay
+    mode a call without a fixture returns `default()` (or None) and never touches
+    the network.
+    """
+
+    def decorator(func):
+        name = func.__name__
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            mode = get_replay_mode()
+            if mode is None:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            path = _fixture_path(name, arguments)
+
+            if mode == "replay":
+                fixture = _read_fixture(path)
+                if fixture is None:
+                    print(f"No recorded response for {name}({arguments}), returning empty result")
+                    return default() if default else None
+                return _load(fixture["result"], model)
+
+            result = func(*args, **kwargs)
+            try:
+                _write_fixture(path, {"function": name, "arguments": arguments, "result": _dump(result)})
+            except Exception as e:
+                print(f"Error recording {name} response: {str(e)}")
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,167 @@
+"""Deterministic local stand-in for a chat model, for benchmarks and offline runs"""
+
+import asyncio
+import hashlib
+import os
+import re
+import time
+import typing
+from typing import Any, Literal, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, Field
+
+# Simulated seconds per request and output tokens per response
+MOCK_LATENCY_ENV = "MOCK_LLM_LATENCY"
+MOCK_OUTPUT_TOKENS_ENV = "MOCK_LLM_OUTPUT_TOKENS"
+
+# Ticker-like JSON keys in a prompt, e.g. "AAPL":{ or "BTC-USD":0.5
+_TICKER_KEY = re.compile(r'"([A-Z][A-Z0-9.\-]{0,9})":(?=[\[{"\d-])')
+
+
+def _seed(*parts: Any) -> int:
+    return int(hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()[:12], 16)
+
+
+# Hashes of the cache_control-marked prompt prefixes seen so far, like a provider's prefix cache
+_prefix_cache: set[str] = set()
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, list):
+        return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return str(content)
+
+
+def _prompt_text(messages: Any) -> str:
+    if hasattr(messages, "to_messages"):
+        messages = messages.to_messages()
+    if isinstance(messages, (list, tuple)):
+        return "\n".join(_content_text(getattr(message, "content", message)) for message in messages)
+    return _content_text(getattr(messages, "content", messages))
+
+
+def _prefix_cache_usage(messages: Any) -> tuple[int, int]:
+    """(cache_read, cache_creation) tokens for the prompt's marked prefix, simulating Anthropic's prompt caching."""
+    if hasattr(messages, "to_messages"):
+        messages = messages.to_messages()
+    if not isinstance(messages, (list, tuple)):
+        return 0, 0
+    prefix, marked = [], None
+    for message in messages:
+        content = getattr(message, "content", message)
+        prefix.append(_content_text(content))
+        if isinstance(content, list) and any(isinstance(block, dict) and block.get("cache_control") for block in content):
+            marked = "\n".join(prefix)
+    if marked is None:
+        return 0, 0
+    key = hashlib.sha256(marked.encode()).hexdigest()
+    tokens = len(marked) // 4
+    if key in _prefix_cache:
+        return tokens, 0
+    _prefix_cache.add(key)
+    return 0, tokens
+
+
+def prompt_tickers(text: str) -> list[str]:
+    """Tickers a prompt's JSON payload is keyed by, in order of appearance."""
+    return list(dict.fromkeys(_TICKER_KEY.findall(text)))
+
+
+def mock_value(annotation: Any, name: str, seed: int, tickers: list[str]) -> Any:
+    """Deterministic value of the given type; dicts keyed by string get one entry per ticker."""
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin is Literal:
+        return args[seed % len(args)]
+    if origin is typing.Union or type(annotation).__name__ == "UnionType":
+        return mock_value(next(arg for arg in args if arg is not type(None)), name, seed, tickers)
+    if origin in (list, tuple, set):
+        item_type = args[0] if args else str
+        return [mock_value(item_type, f"{name}[{i}]", _seed(seed, i), tickers) for i in range(2)]
+    if origin is dict:
+        value_type = args[1] if len(args) > 1 else str
+        return {ticker: mock_value(value_type, name, _seed(seed, ticker), tickers) for ticker in tickers}
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return mock_output(annotation, seed, tickers)
+    if annotation is bool:
+        return bool(seed % 2)
+    if annotation is int:
+        return seed % 100
+    if annotation is float:
+        # Confidence-style fields elsewhere in the repo are on a 0-100 scale
+        return round((seed % 10000) / 100, 2)
+    return f"Mock {name.replace('_', ' ')} #{seed % 1000}"
+
+
+def mock_output(pydantic_model: type[BaseModel], seed: int, tickers: Optional[list[str]] = None) -> BaseModel:
+    """Build a schema-valid instance of `pydantic_model` from a seed."""
+    values = {
+        name: mock_value(field.annotation, name, _seed(seed, name), tickers or [])
+        for name, field in pydantic_model.model_fields.items()
+    }
+    return pydantic_model.model_validate(values)
+
+
+class MockChatModel(BaseChatModel):
+    """Chat model that answers instantly (or after a simulated delay) with seeded, schema-valid output.
+
+    The same prompt always produces the same response, and token usage is reported
+    like a real provider so accounting and rate limiting behave as in production.
+    """
+
+    model_name: str = "mock"
+    latency: float = Field(default_factory=lambda: float(os.environ.get(MOCK_LATENCY_ENV, 0)))
+    output_tokens: int = Field(default_factory=lambda: int(os.environ.get(MOCK_OUTPUT_TOKENS_ENV, 200)))
+
+    @property
+    def _llm_type(self) -> str:
+        return "mock"
+
+    def respond(self, messages: Any, schema: Optional[type[BaseModel]] = None) -> AIMessage:
+        """The deterministic reply to `messages`, as JSON for `schema` or as plain text."""
+        text = _prompt_text(messages)
+        seed = _seed(self.model_name, text)
+        if schema is not None:
+            content = mock_output(schema, seed, prompt_tickers(text)).model_dump_json()
+        else:
+            content = f"Mock analysis #{seed % 1000}: the evidence is balanced, so the position stays unchanged."
+        input_tokens = len(text) // 4
+        usage = {"input_tokens": input_tokens, "output_tokens": self.output_tokens, "total_tokens": input_tokens + self.output_tokens}
+        cache_read, cache_creation = _prefix_cache_usage(messages)
+        if cache_read or cache_creation:
+            usage["input_token_details"] = {"cache_read": cache_read, "cache_creation": cache_creation}
+        return AIMessage(content=content, usage_metadata=usage)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self.respond(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self.respond(messages))])
+
+    def with_structured_output(self, schema, *, method: str = "json_mode", include_raw: bool = False, **kwargs):
+        """Runnable returning `schema` instances, shaped like the real providers' wrappers."""
+
+        def wrap(message: AIMessage):
+            parsed = schema.model_validate_json(message.content)
+            return {"raw": message, "parsed": parsed, "parsing_error": None} if include_raw else parsed
+
+        def invoke(prompt):
+            if self.latency:
+                time.sleep(self.latency)
+            return wrap(self.respond(prompt, schema))
+
+        async def ainvoke(prompt):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return wrap(self.respond(prompt, schema))
+
+        return RunnableLambda(invoke, afunc=ainvoke)
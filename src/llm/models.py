@@ -1,7 +1,9 @@
 import os
+import threading
 from langchain_anthropic import ChatAnthropic
 from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
+from llm.mock import MockChatModel
 from enum import Enum
 from pydantic import BaseModel
 from typing import Tuple
@@ -13,6 +15,7 @@ class ModelProvider(str, Enum):
     GROQ = "Groq"
     ANTHROPIC = "Anthropic"
     GEMINI = "Gemini"  # Add Gemini provider
+    MOCK = "Mock"  # Deterministic local stub, see llm/mock.py
 
 
 class LLMModel(BaseModel):
@@ -20,6 +23,9 @@ class LLMModel(BaseModel):
     display_name: str
     model_name: str
     provider: ModelProvider
+    # List prices in USD per million tokens, used for cost accounting
+    input_cost_per_mtok: float = 0.0
+    output_cost_per_mtok: float = 0.0
 
     def to_choice_tuple(self) -> Tuple[str, str, str]:
         """Convert to format needed for questionary choices"""
@@ -35,52 +41,77 @@ AVAILABLE_MODELS = [
     LLMModel(
         display_name="[anthropic] claude-3.5-haiku",
         model_name="claude-3-5-haiku-latest",
-        provider=ModelProvider.ANTHROPIC
+        provider=ModelProvider.ANTHROPIC,
+        input_cost_per_mtok=0.8,
+        output_cost_per_mtok=4.0,
     ),
     LLMModel(
         display_name="[anthropic] claude-3.5-sonnet",
         model_name="claude-3-5-sonnet-latest",
-        provider=ModelProvider.ANTHROPIC
+        provider=ModelProvider.ANTHROPIC,
+        input_cost_per_mtok=3.0,
+        output_cost_per_mtok=15.0,
     ),
     LLMModel(
         display_name="[anthropic] claude-3.7-sonnet",
         model_name="claude-3-7-sonnet-latest",
-        provider=ModelProvider.ANTHROPIC
+        provider=ModelProvider.ANTHROPIC,
+        input_cost_per_mtok=3.0,
+        output_cost_per_mtok=15.0,
     ),
     LLMModel(
         display_name="[groq] deepseek-r1 70b",
         model_name="deepseek-r1-distill-llama-70b",
-        provider=ModelProvider.GROQ
+        provider=ModelProvider.GROQ,
+        input_cost_per_mtok=0.75,
+        output_cost_per_mtok=0.99,
     ),
     LLMModel(
         display_name="[groq] llama-3.3 70b",
         model_name="llama-3.3-70b-versatile",
-        provider=ModelProvider.GROQ
+        provider=ModelProvider.GROQ,
+        input_cost_per_mtok=0.59,
+        output_cost_per_mtok=0.79,
     ),
     LLMModel(
         display_name="[openai] gpt-4o",
         model_name="gpt-4o",
-        provider=ModelProvider.OPENAI
+        provider=ModelProvider.OPENAI,
+        input_cost_per_mtok=2.5,
+        output_cost_per_mtok=10.0,
     ),
     LLMModel(
         display_name="[openai] gpt-4o-mini",
         model_name="gpt-4o-mini",
-        provider=ModelProvider.OPENAI
+        provider=ModelProvider.OPENAI,
+        input_cost_per_mtok=0.15,
+        output_cost_per_mtok=0.6,
     ),
     LLMModel(
         display_name="[openai] o1",
         model_name="o1",
-        provider=ModelProvider.OPENAI
+        provider=ModelProvider.OPENAI,
+        input_cost_per_mtok=15.0,
+        output_cost_per_mtok=60.0,
     ),
     LLMModel(
         display_name="[openai] o3-mini",
         model_name="o3-mini",
-        provider=ModelProvider.OPENAI
+        provider=ModelProvider.OPENAI,
+        input_cost_per_mtok=1.1,
+        output_cost_per_mtok=4.4,
     ),
     LLMModel(
         display_name="[gemini] gemini-2.0-flash",
         model_name="gemini-2.0-flash",
-        provider=ModelProvider.GEMINI
+        provider=ModelProvider.GEMINI,
+        input_cost_per_mtok=0.1,
+        output_cost_per_mtok=0.4,
+    ),
+    LLMModel(
+        display_name="[mock] deterministic stub (offline)",
+        model_name="mock",
+        provider=ModelProvider.MOCK,
     ),
 ]
 
@@ -91,7 +122,61 @@ def get_model_info(model_name: str) -> LLMModel | None:
     """Get model information by model_name"""
     return next((model for model in AVAILABLE_MODELS if model.model_name == model_name), None)
 
+# Provider clients keyed by (provider, model, api key), built once per process so that
+# every call reuses the same HTTP connection pool
+_client_pool: dict[tuple[str, str, str | None], ChatOpenAI | ChatGroq | ChatAnthropic] = {}
+# Structured-output wrappers keyed by client key, schema and method
+_structured_pool: dict[tuple, object] = {}
+_pool_lock = threading.Lock()
+
+_API_KEY_ENV = {
+    ModelProvider.OPENAI: "OPENAI_API_KEY",
+    ModelProvider.GROQ: "GROQ_API_KEY",
+    ModelProvider.ANTHROPIC: "ANTHROPIC_API_KEY",
+    ModelProvider.GEMINI: "GEMINI_API_KEY",
+}
+
+
+def _pool_key(model_name: str, model_provider: ModelProvider | str) -> tuple[str, str, str | None]:
+    provider = getattr(model_provider, "value", model_provider)
+    env_var = next((env for p, env in _API_KEY_ENV.items() if p.value == provider), None)
+    # Include the key so a rotated key gets a fresh client
+    return (provider, model_name, os.getenv(env_var) if env_var else None)
+
+
 def get_model(model_name: str, model_provider: ModelProvider) -> ChatOpenAI | ChatGroq | None:
+    """Get a pooled client for the model, creating it on first use."""
+    key = _pool_key(model_name, model_provider)
+    if (client := _client_pool.get(key)) is not None:
+        return client
+    with _pool_lock:
+        if (client := _client_pool.get(key)) is None:
+            client = _create_model(model_name, model_provider)
+            if client is not None:
+                _client_pool[key] = client
+    return client
+
+
+def get_structured_model(model_name: str, model_provider: ModelProvider, pydantic_model: type[BaseModel], method: str = "json_mode", include_raw: bool = False):
+    """Get a pooled client wrapped to return `pydantic_model` instances (with the raw message if `include_raw`)."""
+    key = (_pool_key(model_name, model_provider), pydantic_model, method, include_raw)
+    if (structured := _structured_pool.get(key)) is not None:
+        return structured
+    llm = get_model(model_name, model_provider)
+    with _pool_lock:
+        if (structured := _structured_pool.get(key)) is None:
+            structured = _structured_pool[key] = llm.with_structured_output(pydantic_model, method=method, include_raw=include_raw)
+    return structured
+
+
+def clear_model_pool():
+    """Drop all pooled clients, e.g. after changing API keys or base URLs."""
+    with _pool_lock:
+        _client_pool.clear()
+        _structured_pool.clear()
+
+
+def _create_model(model_name: str, model_provider: ModelProvider) -> ChatOpenAI | ChatGroq | None:
     if model_provider == ModelProvider.GROQ:
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
@@ -106,7 +191,8 @@ def get_model(model_name: str, model_provider: ModelProvider) -> ChatOpenAI | Ch
             # Print error to console
             print(f"API Key Error: Please make sure OPENAI_API_KEY is set in your .env file.")
             raise ValueError("OpenAI API key not found.  Please make sure OPENAI_API_KEY is set in your .env file.")
-        return ChatOpenAI(model=model_name, api_key=api_key)
+        # stream_usage reports token usage on streamed responses too
+        return ChatOpenAI(model=model_name, api_key=api_key, stream_usage=True)
     elif model_provider == ModelProvider.ANTHROPIC:
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
@@ -124,4 +210,6 @@ def get_model(model_name: str, model_provider: ModelProvider) -> ChatOpenAI | Ch
             api_key=api_key,
             base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
             model=model_name
-        )
\ No newline at end of file
+        )
+    elif model_provider == ModelProvider.MOCK:
+        return MockChatModel(model_name=model_name)
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""Per-agent model routing with latency- and error-based fallback"""
+
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from pydantic import BaseModel
+
+ROUTING_PATH_ENV = "LLM_ROUTING_PATH"
+DEFAULT_ROUTING_PATH = "model_routing.json"
+
+
+class RoutingPolicy(BaseModel):
+    """Model to use for one agent (or "agent:phase"); the provider is looked up if omitted."""
+    model: str
+    provider: Optional[str] = None
+
+
+class RoutingConfig(BaseModel):
+    """Contents of the routing file.
+
+    Example:
+        {
+          "agents": {
+            "wsb_agent": {"model": "gpt-4o-mini"},
+            "round_table:initial_positions": {"model": "gpt-4o-mini"}
+          },
+          "fallbacks": {"gpt-4o": "gpt-4o-mini", "claude-3-7-sonnet-latest": "claude-3-5-haiku-latest"},
+          "max_latency": 20,
+          "max_error_rate": 0.3
+        }
+    """
+    agents: dict[str, RoutingPolicy] = {}
+    # Faster model to switch to when a model is unhealthy
+    fallbacks: dict[str, str] = {}
+    # p90 latency (seconds) and error rate over the last `window` calls that make a model unhealthy
+    max_latency: Optional[float] = None
+    max_error_rate: Optional[float] = None
+    window: int = 20
+    min_samples: int = 5
+    # Calls older than this (seconds) are ignored, so a model is retried once it has cooled down
+    max_age: float = 300
+
+
+_config: Optional[RoutingConfig] = None
+_config_lock = threading.Lock()
+# Models whose fallback has been announced, so the switch is printed once
+_reported_fallbacks: set[str] = set()
+
+
+def load_routing_config(path: Optional[str] = None) -> RoutingConfig:
+    """Read the routing file; a missing or invalid file means no routing."""
+    path = path or os.environ.get(ROUTING_PATH_ENV) or DEFAULT_ROUTING_PATH
+    if not os.path.exists(path):
+        return RoutingConfig()
+    try:
+        with open(path) as f:
+            return RoutingConfig.model_validate(json.load(f))
+    except Exception as e:
+        print(f"Error loading model routing from {path}: {e}")
+        return RoutingConfig()
+
+
+def get_routing_config() -> RoutingConfig:
+    """Get the process-wide routing config, loading it on first use."""
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = load_routing_config()
+    return _config
+
+
+def set_routing_config(config: Optional[RoutingConfig]):
+    """Replace the routing config; None reloads it from the file on next use."""
+    global _config
+    with _config_lock:
+        _config = config
+
+
+def _provider_for(model_name: str, default: str) -> str:
+    from llm.models import get_model_info
+
+    model_info = get_model_info(model_name)
+    return model_info.provider.value if model_info else default
+
+
+def is_unhealthy(model_name: str, config: RoutingConfig) -> bool:
+    """Whether recent calls to the model were too slow or failed too often."""
+    from utils.llm_usage import get_usage_tracker
+
+    if config.max_latency is None and config.max_error_rate is None:
+        return False
+    p90_latency, error_rate, samples = get_usage_tracker().model_health(model_name, config.window, since=time.time() - config.max_age)
+    if samples < config.min_samples:
+        return False
+    return (config.max_latency is not None and p90_latency > config.max_latency) or (
+        config.max_error_rate is not None and error_rate > config.max_error_rate
+    )
+
+
+def route_model(agent_name: Optional[str], model_name: str, model_provider: str, phase: Optional[str] = None) -> tuple[str, str]:
+    """
+    Pick the (model_name, model_provider) for a call.
+
+    An "agent:phase" or "agent" policy overrides the run's model, and an unhealthy
+    model is swapped for its configured fallback.
+    """
+    config = get_routing_config()
+    provider = getattr(model_provider, "value", model_provider)
+
+    policy = None
+    if agent_name:
+        policy = config.agents.get(f"{agent_name}:{phase}") if phase else None
+        policy = policy or config.agents.get(agent_name)
+    if policy:
+        model_name = policy.model
+        provider = policy.provider or _provider_for(model_name, provider)
+
+    fallback = config.fallbacks.get(model_name)
+    if fallback and is_unhealthy(model_name, config):
+        if model_name not in _reported_fallbacks:
+            _reported_fallbacks.add(model_name)
+            print(f"Model {model_name} is slow or failing, routing calls to {fallback}")
+        model_name, provider = fallback, _provider_for(fallback, provider)
+
+    return model_name, provider
@@ -1,3 +1,4 @@
+import os
 import sys
 
 from dotenv import load_dotenv
@@ -20,25 +21,35 @@ from utils.analysts import ANALYST_ORDER, get_analyst_nodes
 from utils.progress import progress
 from llm.models import LLM_ORDER, get_model_info
 from agents.round_table import round_table
+from data.cache import load_persistent_cache
+from data.metrics import get_data_metrics, track_agent
+from utils.deadline import deadline_scope
+from utils.run_budget import RunBudget, budget_scope
+from utils.fast_mode import FAST_MODE_CHOICES, FAST_MODE_ENV
+from utils.llm_hedge import HEDGE_ENV
+from utils.llm import TICKER_BATCH_SIZE_ENV
+from utils.llm_usage import get_usage_tracker
+from utils.serialization import loads
+from utils.run_estimate import estimate_run, max_tickers_within, print_estimate
 
 import argparse
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from tabulate import tabulate
 from utils.visualize import save_graph_as_png
-import json
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Warm the data cache from the snapshot written by prefetch.py, if configured
+load_persistent_cache()
+
 init(autoreset=True)
 
 
 def parse_hedge_fund_response(response):
-    import json
-
     try:
-        return json.loads(response)
+        return loads(response)
     except:
         print(f"Error parsing response: {response}")
         return None
@@ -55,6 +66,7 @@ def run_hedge_fund(
     model_name: str = "gpt-4o",
     model_provider: str = "OpenAI",
     is_crypto: bool = False,
+    deadline: float | None = None,
 ):
     # Start progress tracking
     progress.start()
@@ -87,8 +99,9 @@ def run_hedge_fund(
             },
         }
 
-        # Run the workflow
-        result = app.invoke(initial_state)
+        # Run the workflow; calls still running when the deadline passes fall back to defaults
+        with deadline_scope(deadline):
+            result = app.invoke(initial_state)
         
         # Stop progress tracking
         progress.stop()
@@ -102,7 +115,7 @@ def run_hedge_fund(
             for message in reversed(result["messages"]):
                 if hasattr(message, "name") and message.name == "portfolio_management_agent":
                     try:
-                        portfolio_decision = json.loads(message.content)
+                        portfolio_decision = loads(message.content)
                         break
                     except:
                         pass
@@ -147,14 +160,14 @@ def create_workflow(selected_analysts=None):
     for analyst_key in selected_analysts:
         if analyst_key in analyst_nodes:
             node_name, node_func = analyst_nodes[analyst_key]
-            workflow.add_node(node_name, node_func)
+            workflow.add_node(node_name, track_agent(node_name, node_func))
             workflow.add_edge("start_node", node_name)
         else:
             print(f"{Fore.RED}Warning: Analyst {analyst_key} not found in configuration{Style.RESET_ALL}")
     
     # Always add risk and portfolio management
-    workflow.add_node("risk_management_agent", risk_management_agent)
-    workflow.add_node("portfolio_management_agent", portfolio_management_agent)
+    workflow.add_node("risk_management_agent", track_agent("risk_management_agent", risk_management_agent))
+    workflow.add_node("portfolio_management_agent", track_agent("portfolio_management_agent", portfolio_management_agent))
     
     # Connect all analysts to risk management
     for analyst_key in selected_analysts:
@@ -170,7 +183,7 @@ def create_workflow(selected_analysts=None):
     return workflow
 
 
-def run_all_analysts_with_round_table(tickers, start_date, end_date, portfolio, show_reasoning, model_name, model_provider, is_crypto=False):
+def run_all_analysts_with_round_table(tickers, start_date, end_date, portfolio, show_reasoning, model_name, model_provider, is_crypto=False, deadline=None):
     """
     Run all available analysts and then conduct a round table discussion without user selection.
     This is a simplified workflow for when the user specifies the --round-table flag.
@@ -184,30 +197,32 @@ def run_all_analysts_with_round_table(tickers, start_date, end_date, portfolio,
         print(f"  {analyst_nodes[analyst][0].replace('_agent', '').replace('_', ' ').title()}")
     print("")  # Empty line for spacing
     
-    # Run the regular hedge fund with all analysts
-    result = run_hedge_fund(
-        tickers=tickers,
-        start_date=start_date,
-        end_date=end_date,
-        portfolio=portfolio,
-        show_reasoning=show_reasoning,
-        selected_analysts=all_analysts,
-        model_name=model_name,
-        model_provider=model_provider,
-        is_crypto=is_crypto,
-    )
-    
-    # Run the round table discussion
-    from round_table import run_round_table
-    round_table_results = run_round_table(
-        data={
-            "tickers": tickers,
-            "analyst_signals": result["analyst_signals"]
-        },
-        model_name=model_name,
-        model_provider=model_provider,
-        show_reasoning=show_reasoning
-    )
+    # One deadline covers both the analysts and the round table
+    with deadline_scope(deadline):
+        # Run the regular hedge fund with all analysts
+        result = run_hedge_fund(
+            tickers=tickers,
+            start_date=start_date,
+            end_date=end_date,
+            portfolio=portfolio,
+            show_reasoning=show_reasoning,
+            selected_analysts=all_analysts,
+            model_name=model_name,
+            model_provider=model_provider,
+            is_crypto=is_crypto,
+        )
+        
+        # Run the round table discussion
+        from round_table import run_round_table
+        round_table_results = run_round_table(
+            data={
+                "tickers": tickers,
+                "analyst_signals": result["analyst_signals"]
+            },
+            model_name=model_name,
+            model_provider=model_provider,
+            show_reasoning=show_reasoning
+        )
     
     # Add the round table results to the analyst signals
     result["analyst_signals"]["round_table"] = round_table_results
@@ -215,6 +230,22 @@ def run_all_analysts_with_round_table(tickers, start_date, end_date, portfolio,
     return result
 
 
+def check_run_estimate(tickers, selected_analysts, model_name, model_provider, round_table=False, deadline=None, dry_run=False, max_concurrent=None):
+    """
+    Estimate the run from past LLM usage. In a dry run print the estimate and exit;
+    otherwise warn when the run is expected to overrun its deadline.
+    """
+    estimate = estimate_run(tickers, selected_analysts, model_name, model_provider, round_table=round_table, max_concurrent=max_concurrent)
+    if dry_run:
+        print_estimate(estimate, deadline)
+        if deadline is not None and not estimate.fits(deadline):
+            fitting = max_tickers_within(deadline, tickers, selected_analysts, model_name, model_provider, round_table=round_table, max_concurrent=max_concurrent)
+            print(f"About {fitting} of the {len(tickers)} tickers are expected to fit in the deadline")
+        sys.exit(0)
+    if deadline is not None and not estimate.fits(deadline):
+        print(f"{Fore.YELLOW}Warning: this run is expected to take about {estimate.wall_time:.0f}s, over the {deadline:.0f}s deadline; late calls will fall back to defaults (see --dry-run){Style.RESET_ALL}")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run the hedge fund trading system")
     parser.add_argument(
@@ -250,9 +281,57 @@ if __name__ == "__main__":
         action="store_true",
         help="Analyze cryptocurrency instead of stocks (append -USD to ticker symbols)"
     )
+    parser.add_argument(
+        "--ticker-batch-size",
+        type=int,
+        help="Tickers per persona-agent LLM request (default 1, or LLM_TICKER_BATCH_SIZE)",
+    )
+    parser.add_argument(
+        "--fast-mode",
+        choices=FAST_MODE_CHOICES,
+        help="Skip persona-agent LLM calls when the rule-based score is decisive (default off, or LLM_FAST_MODE)",
+    )
+    parser.add_argument(
+        "--hedge",
+        nargs="?",
+        const="portfolio_management_agent",
+        help="Agents (comma-separated, or all) whose slow LLM calls get a duplicate request after their p90 latency (default: the portfolio manager, or LLM_HEDGE)",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Seconds the whole run may take; LLM and data calls still pending then fall back to defaults",
+    )
+    parser.add_argument(
+        "--max-concurrent-llm",
+        type=int,
+        help="LLM calls the run may have in flight at once (default no limit, or LLM_RUN_MAX_CONCURRENT)",
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        help="Total LLM tokens the run may use; later calls fall back to rule-based or default outputs (or LLM_RUN_MAX_TOKENS)",
+    )
+    parser.add_argument(
+        "--max-cost",
+        type=float,
+        help="Estimated LLM spend in USD the run may use before falling back to rule-based or default outputs (or LLM_RUN_MAX_COST)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the expected LLM calls, tokens, cost and wall time from past usage instead of running",
+    )
 
     args = parser.parse_args()
 
+    if args.ticker_batch_size:
+        os.environ[TICKER_BATCH_SIZE_ENV] = str(args.ticker_batch_size)
+    if args.fast_mode:
+        os.environ[FAST_MODE_ENV] = args.fast_mode
+    if args.hedge:
+        os.environ[HEDGE_ENV] = args.hedge
+
     # Parse tickers from comma-separated string
     tickers = [ticker.strip() for ticker in args.tickers.split(",")]
     
@@ -327,19 +406,27 @@ if __name__ == "__main__":
         }
     }
 
+    # One budget covers every LLM call of the run
+    budget = RunBudget.from_env(args.max_concurrent_llm, args.max_tokens, args.max_cost)
+
     # Bypass analyst selection when round table is specified
     if args.round_table:
+        all_analysts = [key for key in get_analyst_nodes().keys() if key != "master"]
+        check_run_estimate(tickers, all_analysts, model_choice, model_provider, round_table=True, deadline=args.deadline, dry_run=args.dry_run, max_concurrent=args.max_concurrent_llm)
+
         # Run all analysts and round table without requiring user selection
-        result = run_all_analysts_with_round_table(
-            tickers=tickers,
-            start_date=start_date,
-            end_date=end_date,
-            portfolio=portfolio,
-            show_reasoning=args.show_reasoning,
-            model_name=model_choice,
-            model_provider=model_provider,
-            is_crypto=args.crypto
-        )
+        with budget_scope(budget):
+            result = run_all_analysts_with_round_table(
+                tickers=tickers,
+                start_date=start_date,
+                end_date=end_date,
+                portfolio=portfolio,
+                show_reasoning=args.show_reasoning,
+                model_name=model_choice,
+                model_provider=model_provider,
+                is_crypto=args.crypto,
+                deadline=args.deadline,
+            )
         print_trading_output(result)
     else:
         # Regular flow - prompt user to select analysts
@@ -377,16 +464,26 @@ if __name__ == "__main__":
             file_path += "graph.png"
             save_graph_as_png(app, file_path)
 
+        check_run_estimate(tickers, selected_analysts, model_choice, model_provider, deadline=args.deadline, dry_run=args.dry_run, max_concurrent=args.max_concurrent_llm)
+
         # Run the hedge fund with is_crypto flag
-        result = run_hedge_fund(
-            tickers=tickers,
-            start_date=start_date,
-            end_date=end_date,
-            portfolio=portfolio,
-            show_reasoning=args.show_reasoning,
-            selected_analysts=selected_analysts,
-            model_name=model_choice,
-            model_provider=model_provider,
-            is_crypto=args.crypto
-        )
+        with budget_scope(budget):
+            result = run_hedge_fund(
+                tickers=tickers,
+                start_date=start_date,
+                end_date=end_date,
+                portfolio=portfolio,
+                show_reasoning=args.show_reasoning,
+                selected_analysts=selected_analysts,
+                model_name=model_choice,
+                model_provider=model_provider,
+                is_crypto=args.crypto,
+                deadline=args.deadline,
+            )
         print_trading_output(result)
+
+    # Show how much of the run was served from the data cache
+    get_data_metrics().print_summary()
+    get_usage_tracker().print_summary()
+    # Keep this run's calls for later estimates
+    get_usage_tracker().save_history()
@@ -0,0 +1,239 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+from dotenv import load_dotenv
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+
+from data.cache import CACHE_PATH_ENV, load_persistent_cache, save_persistent_cache
+from data.metrics import get_data_metrics
+from tools.api import (
+    get_company_news,
+    get_financial_metrics,
+    get_insider_trades,
+    get_prices,
+    search_line_items,
+)
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Union of the line items requested by the analyst agents, so one fetch per period covers all of them
+LINE_ITEMS = [
+    "book_value_per_share",
+    "capital_expenditure",
+    "cash_and_equivalents",
+    "current_assets",
+    "current_liabilities",
+    "debt_to_equity",
+    "depreciation_and_amortization",
+    "dividends_and_other_cash_distributions",
+    "earnings_per_share",
+    "free_cash_flow",
+    "goodwill_and_intangible_assets",
+    "gross_margin",
+    "net_income",
+    "operating_expense",
+    "operating_income",
+    "operating_margin",
+    "outstanding_shares",
+    "research_and_development",
+    "return_on_invested_capital",
+    "revenue",
+    "shareholders_equity",
+    "total_assets",
+    "total_debt",
+    "total_liabilities",
+    "working_capital",
+]
+
+# Periods the agents ask line items for
+LINE_ITEM_PERIODS = ["ttm", "annual"]
+
+
+class RateLimiter:
+    """Token bucket shared by the fetch threads to cap outgoing requests per second."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def read_universe(path: str) -> list[str]:
+    """Read tickers from a file with one ticker per line; blank lines and # comments are ignored."""
+    tickers = []
+    with open(path) as f:
+        for line in f:
+            ticker = line.split("#", 1)[0].strip()
+            if ticker:
+                tickers.append(ticker.upper())
+    return tickers
+
+
+def build_jobs(tickers: list[str], start_date: str, end_date: str, is_crypto: bool = False) -> list[tuple[str, str, callable]]:
+    """List the (ticker, label, fetch) calls needed to warm the cache for a run over the date range."""
+    # Agents look back up to a year for prices, same as the backtester
+    price_start_date = (datetime.strptime(end_date, "%Y-%m-%d") - relativedelta(years=1)).strftime("%Y-%m-%d")
+    price_start_date = min(price_start_date, start_date)
+
+    jobs = []
+    for ticker in tickers:
+        jobs.append((ticker, "prices", lambda t=ticker: get_prices(t, price_start_date, end_date, is_crypto=is_crypto)))
+        jobs.append((ticker, "financial metrics", lambda t=ticker: get_financial_metrics(t, end_date, limit=10, is_crypto=is_crypto)))
+        for period in LINE_ITEM_PERIODS:
+            jobs.append((ticker, f"line items ({period})", lambda t=ticker, p=period: search_line_items(t, LINE_ITEMS, end_date, period=p, limit=10, is_crypto=is_crypto)))
+        if not is_crypto:
+            jobs.append((ticker, "insider trades", lambda t=ticker: get_insider_trades(t, end_date, start_date=start_date, limit=1000)))
+        jobs.append((ticker, "news", lambda t=ticker: get_company_news(t, end_date, start_date=start_date, limit=1000, is_crypto=is_crypto)))
+    return jobs
+
+
+def prefetch(
+    tickers: list[str],
+    start_date: str,
+    end_date: str,
+    is_crypto: bool = False,
+    max_workers: int = 4,
+    rate_limit: float = 2.0,
+) -> dict[str, list[str]]:
+    """Concurrently fill the data cache for every ticker. Returns the failed jobs keyed by ticker."""
+    limiter = RateLimiter(rate_limit)
+    jobs = build_jobs(tickers, start_date, end_date, is_crypto=is_crypto)
+    failures: dict[str, list[str]] = {}
+
+    def run(job):
+        ticker, label, fetch = job
+        limiter.acquire()
+        return fetch()
+
+    with Progress(
+        TextColumn("[bold blue]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+    ) as progress_bar:
+        task = progress_bar.add_task("Prefetching", total=len(jobs))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(run, job): job for job in jobs}
+            for future in as_completed(futures):
+                ticker, label, _ = futures[future]
+                try:
+                    if not future.result():
+                        failures.setdefault(ticker, []).append(f"{label}: no data")
+                except Exception as e:
+                    failures.setdefault(ticker, []).append(f"{label}: {str(e)}")
+                progress_bar.update(task, advance=1, description=f"Prefetching {ticker} {label}")
+
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Warm the data cache for a universe of tickers")
+    parser.add_argument(
+        "--universe",
+        type=str,
+        help="File with one ticker per line (# starts a comment)",
+    )
+    parser.add_argument(
+        "--tickers",
+        type=str,
+        help="Comma-separated list of ticker symbols, added to the universe file",
+    )
+    parser.add_argument(
+        "--end-date",
+        type=str,
+        default=datetime.now().strftime("%Y-%m-%d"),
+        help="End date in YYYY-MM-DD format",
+    )
+    parser.add_argument(
+        "--start-date",
+        type=str,
+        default=(datetime.now() - relativedelta(months=3)).strftime("%Y-%m-%d"),
+        help="Start date in YYYY-MM-DD format",
+    )
+    parser.add_argument(
+        "--crypto",
+        action="store_true",
+        help="Prefetch cryptocurrency data (appends -USD to ticker symbols)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of concurrent fetch threads (default: 4)",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=2.0,
+        help="Maximum requests per second across all threads, 0 to disable (default: 2)",
+    )
+    parser.add_argument(
+        "--cache-file",
+        type=str,
+        help=f"Cache snapshot to read and update (default: ${CACHE_PATH_ENV})",
+    )
+
+    args = parser.parse_args()
+
+    tickers = read_universe(args.universe) if args.universe else []
+    if args.tickers:
+        tickers.extend(ticker.strip().upper() for ticker in args.tickers.split(",") if ticker.strip())
+    # Keep the order but drop duplicates
+    tickers = list(dict.fromkeys(tickers))
+
+    if args.crypto:
+        tickers = [ticker if ("-USD" in ticker or "/USD" in ticker) else f"{ticker}-USD" for ticker in tickers]
+
+    if not tickers:
+        print("No tickers given. Use --universe and/or --tickers.")
+        sys.exit(1)
+
+    cache_file = args.cache_file or os.environ.get(CACHE_PATH_ENV)
+    if not cache_file:
+        print(f"Warning: no --cache-file given and {CACHE_PATH_ENV} is not set; results will not be saved.")
+    elif load_persistent_cache(cache_file):
+        print(f"Loaded existing cache from {cache_file}")
+
+    print(f"Prefetching {len(tickers)} tickers from {args.start_date} to {args.end_date}...")
+    failures = prefetch(
+        tickers,
+        args.start_date,
+        args.end_date,
+        is_crypto=args.crypto,
+        max_workers=args.workers,
+        rate_limit=args.rate_limit,
+    )
+
+    for ticker, errors in failures.items():
+        print(f"{ticker}: {', '.join(errors)}")
+
+    get_data_metrics().print_summary()
+
+    if cache_file:
+        save_persistent_cache(cache_file)
+        print(f"Cache saved to {cache_file}")
@@ -3,11 +3,16 @@ import json
 from typing_extensions import Literal, Dict, Any
 from utils.progress import progress
 from utils.llm import call_llm
+from utils.llm_batch import get_active_collector
 from colorama import Fore, Style
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.prompt_values import ChatPromptValue
 from langchain_core.prompts import ChatPromptTemplate
-import time
 import random
-import re
+
+def text_prompt(text: str) -> ChatPromptValue:
+    """Prompt of one human message whose text is already complete, without parsing it as a template."""
+    return ChatPromptValue(messages=[HumanMessage(content=text)])
 
 class RoundTableOutput(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -92,6 +97,14 @@ class SynthesisResponse(TextResponseBase):
 class ConclusionResponse(TextResponseBase):
     pass
 
+class FinalAnalysisResponse(BaseModel):
+    signal: Literal["bullish", "bearish", "neutral"]
+    confidence: float = Field(description="Confidence level between 0 and 100")
+    reasoning: str = Field(description="Reasoning behind the decision")
+    discussion_summary: str = Field(description="Summary of the key points from the discussion")
+    consensus_view: str = Field(description="The main consensus view that emerged")
+    dissenting_opinions: str = Field(description="Notable dissenting opinions")
+
 class TopicsResponse(BaseModel):
     topics: list[str]
     
@@ -146,8 +159,6 @@ def simulate_round_table(
                 )
                 analyst.initial_position = position
                 full_transcript += f"\n\n{analyst.name}: {position}"
-                # Add small delays between analysts to simulate real discussion timing
-                time.sleep(0.5)
             except Exception as e:
                 # Continue with other analysts if one fails
                 print(f"Error generating position for {analyst.name}: {e}")
@@ -344,44 +355,51 @@ def generate_moderator_intro(ticker):
     """Generate the moderator's introduction."""
     return f"Moderator: Welcome everyone to our investment round table discussion on {ticker}. Today we'll examine the bull and bear cases, analyze the company's fundamentals, technical indicators, and reach a consensus investment decision. Let's begin with each of you sharing your initial position."
 
+INITIAL_POSITION_TEMPLATE = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        """You are {analyst_name}, an investment analyst with the following style: {analyst_style}.
+        
+        You are participating in an investment round table discussion about {ticker}.
+        Based on your analysis, you have a {signal} outlook on the stock.
+        
+        Generate ONLY your opening statement at the investment round table. Keep it concise (3-5 sentences) 
+        but include:
+        1. Your overall position (bullish/bearish/neutral)
+        2. 1-2 key reasons for your position
+        3. A mention of what you're most concerned about or what could change your view
+        
+        DO NOT speak for others or refer to what others have said yet as this is your opening statement.
+        DO NOT prefix your response with your name - that will be added separately.
+        Write in first person and maintain your authentic voice and investment philosophy.
+        
+        IMPORTANT: Return only a plain text response with no JSON formatting.
+        """
+    ),
+    (
+        "human",
+        """As {analyst_name}, provide your opening statement about {ticker} at the investment round table.
+        
+        Your signal: {signal}
+        Your confidence: {confidence}
+        Your reasoning: {reasoning}
+        
+        Remember to maintain your authentic voice and speak only as yourself in the first person.
+        Do not include any JSON formatting, quotation marks, or your name in the response.
+        """
+    )
+])
+
 def generate_initial_position(analyst_name, ticker, ticker_signal, analyst_style, model_name, model_provider):
     """Generate initial position statement for an analyst (separate API call)."""
-    template = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            f"""You are {analyst_name}, an investment analyst with the following style: {analyst_style}.
-            
-            You are participating in an investment round table discussion about {ticker}.
-            Based on your analysis, you have a {ticker_signal.get('signal', 'neutral')} outlook on the stock.
-            
-            Generate ONLY your opening statement at the investment round table. Keep it concise (3-5 sentences) 
-            but include:
-            1. Your overall position (bullish/bearish/neutral)
-            2. 1-2 key reasons for your position
-            3. A mention of what you're most concerned about or what could change your view
-            
-            DO NOT speak for others or refer to what others have said yet as this is your opening statement.
-            DO NOT prefix your response with your name - that will be added separately.
-            Write in first person and maintain your authentic voice and investment philosophy.
-            
-            IMPORTANT: Return only a plain text response with no JSON formatting.
-            """
-        ),
-        (
-            "human",
-            f"""As {analyst_name}, provide your opening statement about {ticker} at the investment round table.
-            
-            Your signal: {ticker_signal.get('signal', 'neutral')}
-            Your confidence: {ticker_signal.get('confidence', 50)}
-            Your reasoning: {ticker_signal.get('reasoning', 'Based on my analysis')}
-            
-            Remember to maintain your authentic voice and speak only as yourself in the first person.
-            Do not include any JSON formatting, quotation marks, or your name in the response.
-            """
-        )
-    ])
-
-    prompt = template.invoke({})
+    prompt = INITIAL_POSITION_TEMPLATE.invoke({
+        "analyst_name": analyst_name,
+        "analyst_style": analyst_style,
+        "ticker": ticker,
+        "signal": ticker_signal.get('signal', 'neutral'),
+        "confidence": ticker_signal.get('confidence', 50),
+        "reasoning": ticker_signal.get('reasoning', 'Based on my analysis'),
+    })
     
     def create_default_position():
         return InitialPositionResponse(text=f"I'm {ticker_signal.get('signal', 'neutral')} on {ticker} based on my analysis.")
@@ -392,6 +410,8 @@ def generate_initial_position(analyst_name, ticker, ticker_signal, analyst_style
         model_provider=model_provider,
         pydantic_model=InitialPositionResponse,
         agent_name="round_table",
+        ticker=ticker,
+        phase="initial_positions",
         default_factory=create_default_position
     )
     
@@ -464,9 +484,7 @@ Format your response EXACTLY as:
 
 Do not include any JSON formatting or additional text."""
         
-        # Create a simple template with no variables that could cause conflicts
-        simple_prompt = ChatPromptTemplate.from_template(question_prompt)
-        final_prompt = simple_prompt.invoke({})
+        final_prompt = text_prompt(question_prompt)
         
         def create_default_question():
             return QuestionResponse(text=f"{questioner.name}: {responder.name}, could you elaborate on your thesis for {ticker}? I'm particularly interested in your assumptions about growth and valuation.")
@@ -478,6 +496,8 @@ Do not include any JSON formatting or additional text."""
                 model_provider=model_provider,
                 pydantic_model=QuestionResponse,
                 agent_name="round_table",
+                ticker=ticker,
+                phase=phase,
                 default_factory=create_default_question
             )
             
@@ -500,8 +520,7 @@ Format your response EXACTLY as:
 
 Do not include any JSON formatting or additional text."""
             
-            answer_template = ChatPromptTemplate.from_template(answer_prompt)
-            answer_final_prompt = answer_template.invoke({})
+            answer_final_prompt = text_prompt(answer_prompt)
             
             def create_default_answer():
                 return AnswerResponse(text=f"{responder.name}: Based on my analysis of {ticker}, I believe my position is justified by the fundamentals and market conditions.")
@@ -513,6 +532,8 @@ Do not include any JSON formatting or additional text."""
                     model_provider=model_provider,
                     pydantic_model=AnswerResponse,
                     agent_name="round_table",
+                    ticker=ticker,
+                    phase=phase,
                     default_factory=create_default_answer
                 )
                 
@@ -529,9 +550,6 @@ Do not include any JSON formatting or additional text."""
             default_q = create_default_question().text
             questions.append(default_q)
             questions.append(f"{responder.name}: My analysis of {ticker} is based on careful consideration of the fundamentals and market conditions.")
-            
-        # Add a small delay
-        time.sleep(0.5)
     
     return questions
 
@@ -549,8 +567,7 @@ These should be areas where analysts seem to disagree or have different perspect
 Return ONLY a simple list of 3 topics, with no additional text.
 Example: ["Valuation multiples", "AI market growth", "Competitive threats"]"""
     
-    simple_prompt = ChatPromptTemplate.from_template(topic_prompt)
-    final_prompt = simple_prompt.invoke({})
+    final_prompt = text_prompt(topic_prompt)
     
     try:
         # Modified approach: Use a string response and parse it separately
@@ -567,6 +584,8 @@ Example: ["Valuation multiples", "AI market growth", "Competitive threats"]"""
             model_provider=model_provider,
             pydantic_model=SimpleTextResponse,
             agent_name="round_table",
+            ticker=ticker,
+            phase="debate_topics",
             default_factory=create_default_topics_text
         )
         
@@ -653,9 +672,7 @@ Format your response EXACTLY as:
 
 Do not include any JSON formatting or additional text."""
         
-        # Create the prompt without variables
-        simple_prompt = ChatPromptTemplate.from_template(bullish_prompt)
-        final_prompt = simple_prompt.invoke({})
+        final_prompt = text_prompt(bullish_prompt)
         
         def create_default_argument():
             return DebateResponse(text=f"{debater1.name}: Regarding {topic}, I see strong potential for {ticker} based on the fundamentals and market trends.")
@@ -667,6 +684,8 @@ Do not include any JSON formatting or additional text."""
                 model_provider=model_provider,
                 pydantic_model=DebateResponse,
                 agent_name="round_table",
+                ticker=ticker,
+                phase="debate",
                 default_factory=create_default_argument
             )
             
@@ -692,9 +711,7 @@ Format your response EXACTLY as:
 
 Do not include any JSON formatting or additional text."""
         
-        # Create the prompt without variables
-        simple_prompt = ChatPromptTemplate.from_template(bearish_prompt)
-        final_prompt = simple_prompt.invoke({})
+        final_prompt = text_prompt(bearish_prompt)
         
         def create_default_counterargument():
             return DebateResponse(text=f"{debater2.name}: I disagree with the bullish view on {topic}. The evidence actually suggests caution for {ticker}.")
@@ -706,6 +723,8 @@ Do not include any JSON formatting or additional text."""
                 model_provider=model_provider,
                 pydantic_model=DebateResponse,
                 agent_name="round_table",
+                ticker=ticker,
+                phase="debate",
                 default_factory=create_default_counterargument
             )
             
@@ -742,9 +761,7 @@ Format your response EXACTLY as:
 
 Do not include any JSON formatting or additional text."""
         
-        # Create the prompt without variables
-        simple_prompt = ChatPromptTemplate.from_template(synthesis_prompt)
-        final_prompt = simple_prompt.invoke({})
+        final_prompt = text_prompt(synthesis_prompt)
         
         def create_default_synthesis():
             return SynthesisResponse(text=f"{analyst.name}: After considering all perspectives, I maintain my position on {ticker}.")
@@ -756,6 +773,8 @@ Do not include any JSON formatting or additional text."""
                 model_provider=model_provider,
                 pydantic_model=SynthesisResponse,
                 agent_name="round_table",
+                ticker=ticker,
+                phase="synthesis",
                 default_factory=create_default_synthesis
             )
             
@@ -764,9 +783,6 @@ Do not include any JSON formatting or additional text."""
             print(f"Error generating synthesis: {e}")
             default_synthesis = create_default_synthesis().text
             synthesis.append(default_synthesis)
-        
-        # Small delay between analysts
-        time.sleep(0.5)
     
     return synthesis
 
@@ -785,9 +801,7 @@ Format your response EXACTLY as:
 
 Do not include any JSON formatting or additional text."""
     
-    # Create the prompt without variables
-    simple_prompt = ChatPromptTemplate.from_template(conclusion_prompt)
-    final_prompt = simple_prompt.invoke({})
+    final_prompt = text_prompt(conclusion_prompt)
     
     def create_default_conclusion():
         return ConclusionResponse(text=f"Moderator: Thank you all for your thoughtful analysis of {ticker}. We've heard a range of perspectives today, from bullish to bearish, each supported by different analytical approaches.")
@@ -799,6 +813,8 @@ Do not include any JSON formatting or additional text."""
             model_provider=model_provider,
             pydantic_model=ConclusionResponse,
             agent_name="round_table",
+            ticker=ticker,
+            phase="conclusion",
             default_factory=create_default_conclusion
         )
         
@@ -808,8 +824,7 @@ Do not include any JSON formatting or additional text."""
         return create_default_conclusion().text
 
 def generate_final_analysis(ticker, transcript, ticker_signals, model_name, model_provider):
-    """Generate the final analysis and decision with retry logic for rate limits."""
-    # Create a prompt that clearly includes the transcript and requests raw JSON
+    """Generate the final analysis and decision from the discussion transcript."""
     analysis_prompt = "You are an objective investment analyst reviewing this round table discussion transcript:\n\n" + \
         "=== TRANSCRIPT START ===\n" + \
         transcript + "\n" + \
@@ -832,158 +847,35 @@ def generate_final_analysis(ticker, transcript, ticker_signals, model_name, mode
         '  "dissenting_opinions": "dissenting views here"\n' + \
         '}\n\n' + \
         "Use DOUBLE QUOTES for all keys and string values, not single quotes."
-    
-    # Define default analysis
-    default_analysis = {
-        "signal": "neutral",
-        "confidence": 50.0,
-        "reasoning": "Balanced mix of positive and negative factors with no clear consensus.",
-        "discussion_summary": "The discussion covered various aspects of the company without a clear resolution.",
-        "consensus_view": "No strong consensus emerged from the discussion.",
-        "dissenting_opinions": "Various perspectives were presented with different analytical frameworks."
-    }
-    
+
+    # Collecting prompts for a batch run: the discussion so far is made of defaults, don't call the model
+    if get_active_collector() is not None:
+        return generate_fallback_analysis(ticker_signals)
+
+    final_prompt = ChatPromptValue(messages=[
+        SystemMessage(content="You are an objective investment analyst. Respond with raw JSON."),
+        HumanMessage(content=analysis_prompt),
+    ])
+
+    def create_default_analysis():
+        return FinalAnalysisResponse(**generate_fallback_analysis(ticker_signals))
+
+    progress.update_status("round_table", ticker, "Generating final analysis")
     try:
-        # Skip the ChatPromptTemplate entirely and create a HumanMessage directly
-        from langchain_core.messages import HumanMessage, SystemMessage
-        import time
-        
-        # Create messages directly without template
-        system_message = SystemMessage(content="You are an objective investment analyst. Respond with raw JSON.")
-        human_message = HumanMessage(content=analysis_prompt)
-        
-        # Get the text response directly from the LLM
-        from langchain_core.language_models import BaseChatModel
-        from llm.models import get_model
-        from utils.progress import progress
-        
-        # Get the LLM model
-        try:
-            from llm.models import ModelProvider
-            model_provider_enum = ModelProvider(model_provider)
-            llm = get_model(model_name, model_provider_enum)
-            
-            # Add retry logic with exponential backoff
-            max_retries = 5
-            base_delay = 2  # Start with 2 seconds
-            
-            for retry_count in range(max_retries):
-                try:
-                    # Call the LLM directly with retry logic
-                    progress.update_status("round_table", ticker, f"Generating final analysis (attempt {retry_count+1}/{max_retries})")
-                    raw_response = llm.invoke([system_message, human_message])
-                    response_text = raw_response.content
-                    
-                    # If we got here, the API call was successful
-                    break
-                
-                except Exception as api_error:
-                    # Check if it's a rate limit error (429)
-                    if "429" in str(api_error) or "RESOURCE_EXHAUSTED" in str(api_error):
-                        if retry_count < max_retries - 1:
-                            # Calculate exponential backoff delay
-                            delay = base_delay * (2 ** retry_count)
-                            print(f"Rate limit exceeded. Retrying in {delay} seconds...")
-                            progress.update_status("round_table", ticker, f"Rate limited. Waiting {delay}s before retry {retry_count+2}/{max_retries}")
-                            time.sleep(delay)
-                            continue
-                    
-                    # If it's not a rate limit error or we've exhausted retries, re-raise
-                    print(f"Error calling LLM: {api_error}")
-                    # If all retries failed, use a simpler fallback approach
-                    print("Using fallback analysis based on signals")
-                    return generate_fallback_analysis(ticker_signals)
-            
-            # APPROACH 1: Try to extract JSON from markdown code blocks
-            import re
-            code_block_pattern = r'```(?:json)?\s*([\s\S]*?)\s*```'
-            code_block_matches = re.findall(code_block_pattern, response_text)
-            
-            if code_block_matches:
-                for match in code_block_matches:
-                    try:
-                        analysis_json = json.loads(match)
-                        # If we successfully parsed JSON, use it
-                        break
-                    except json.JSONDecodeError:
-                        continue
-            
-            # APPROACH 2: Try to extract anything that looks like JSON object
-            if 'analysis_json' not in locals():
-                # Find anything that looks like a JSON object (starts with { and ends with })
-                json_pattern = r'\{[\s\S]*?\}'
-                json_matches = re.findall(json_pattern, response_text)
-                
-                if json_matches:
-                    for match in json_matches:
-                        try:
-                            # Replace single quotes with double quotes
-                            fixed_match = match.replace("'", '"')
-                            analysis_json = json.loads(fixed_match)
-                            # If we successfully parsed JSON, use it
-                            break
-                        except json.JSONDecodeError:
-                            continue
-            
-            # APPROACH 3: Manual key-value extraction
-            if 'analysis_json' not in locals():
-                # Try to extract key-value pairs manually
-                keys = ["signal", "confidence", "reasoning", "discussion_summary", "consensus_view", "dissenting_opinions"]
-                extracted_values = {}
-                
-                for key in keys:
-                    # Look for patterns like "key": "value" or "key":value
-                    key_pattern = r'"' + key + r'"\s*:\s*("([^"]*)"|(\d+(?:\.\d+)?))'
-                    key_match = re.search(key_pattern, response_text)
-                    
-                    if key_match:
-                        if key_match.group(2):  # String value
-                            extracted_values[key] = key_match.group(2)
-                        elif key_match.group(3):  # Numeric value
-                            extracted_values[key] = float(key_match.group(3))
-                
-                if extracted_values:
-                    # Fill in missing values from default
-                    for key in keys:
-                        if key not in extracted_values:
-                            extracted_values[key] = default_analysis[key]
-                    
-                    analysis_json = extracted_values
-                else:
-                    analysis_json = default_analysis
-            
-            # APPROACH 4: Last resort - use default values
-            if 'analysis_json' not in locals():
-                analysis_json = default_analysis
-            
-            # Validate the result
-            required_keys = ["signal", "confidence", "reasoning", "discussion_summary", 
-                           "consensus_view", "dissenting_opinions"]
-            
-            # If any key is missing, use the default value for that key
-            for key in required_keys:
-                if key not in analysis_json:
-                    analysis_json[key] = default_analysis[key]
-                    
-            # Validate signal value
-            if analysis_json["signal"] not in ["bullish", "bearish", "neutral"]:
-                analysis_json["signal"] = default_analysis["signal"]
-                
-            # Ensure confidence is a number
-            try:
-                analysis_json["confidence"] = float(analysis_json["confidence"])
-            except:
-                analysis_json["confidence"] = default_analysis["confidence"]
-            
-            return analysis_json
-        
-        except Exception as e:
-            print(f"Error in generate_final_analysis: {e}")
-            return generate_fallback_analysis(ticker_signals)
-            
+        analysis = call_llm(
+            prompt=final_prompt,
+            model_name=model_name,
+            model_provider=model_provider,
+            pydantic_model=FinalAnalysisResponse,
+            agent_name="round_table",
+            ticker=ticker,
+            phase="final_analysis",
+            default_factory=create_default_analysis
+        )
+        return analysis.model_dump()
     except Exception as e:
-        print(f"Unexpected error: {e}")
-        return default_analysis
+        print(f"Error in generate_final_analysis: {e}")
+        return generate_fallback_analysis(ticker_signals)
 
 def generate_fallback_analysis(ticker_signals):
     """Generate an analysis based solely on the signals without using the LLM."""
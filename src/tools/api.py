@@ -6,9 +6,14 @@ import requests
 from datetime import datetime, timedelta
 import json
 from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
 from functools import lru_cache
 
 from data.cache import get_cache
+from data.metrics import get_data_metrics
+from data.price_panel import get_price_panel
+from data.replay import recordable
+from utils.deadline import DeadlineExceeded, call_with_deadline, check_deadline, request_timeout
 from data.models import (
     CompanyNews,
     CompanyNewsResponse,
@@ -22,8 +27,20 @@ from data.models import (
     InsiderTradeResponse,
 )
 
-# Global cache instance
+# Global cache and metrics instances
 _cache = get_cache()
+_metrics = get_data_metrics()
+
+# yfinance's own default request timeout, kept when the run has no deadline
+YFINANCE_TIMEOUT = 10
+
+
+@contextmanager
+def _provider_call(function: str, provider: str):
+    """Time a provider request, refusing to start one once the run's deadline has passed."""
+    check_deadline(f"{function} ({provider})")
+    with _metrics.timed(function, provider):
+        yield
 
 # Define API keys and fallback order
 def get_api_keys():
@@ -37,6 +54,7 @@ def get_api_keys():
         "cryptocompare": os.environ.get("CRYPTOCOMPARE_API_KEY"),
     }
 
+@recordable(Price, default=list)
 def get_prices(ticker: str, start_date: str, end_date: str, is_crypto: bool = False) -> list[Price]:
     """Fetch price data with multi-source fallback strategy."""
     # Check cache first
@@ -44,7 +62,9 @@ def get_prices(ticker: str, start_date: str, end_date: str, is_crypto: bool = Fa
     if cached_data := _cache.get_prices(cache_key):
         filtered_data = [Price(**price) for price in cached_data if start_date <= price["time"] <= end_date]
         if filtered_data:
+            _metrics.record_hit("get_prices")
             return filtered_data
+    _metrics.record_miss("get_prices")
 
     if is_crypto:
         return get_crypto_prices(ticker, start_date, end_date)
@@ -53,7 +73,8 @@ def get_prices(ticker: str, start_date: str, end_date: str, is_crypto: bool = Fa
     try:
         # Get the data from Yahoo Finance
         yf_ticker = yf.Ticker(ticker)
-        df = yf_ticker.history(start=start_date, end=end_date)
+        with _provider_call("get_prices", "yfinance"):
+            df = yf_ticker.history(start=start_date, end=end_date, timeout=request_timeout(YFINANCE_TIMEOUT))
         
         if not df.empty:
             prices = []
@@ -80,7 +101,8 @@ def get_prices(ticker: str, start_date: str, end_date: str, is_crypto: bool = Fa
         api_keys = get_api_keys()
         if api_key := api_keys.get("stockdata"):
             url = f"https://api.stockdata.org/v1/data/eod?symbols={ticker}&date_from={start_date}&date_to={end_date}&api_key={api_key}"
-            response = requests.get(url)
+            with _provider_call("get_prices", "stockdata"):
+                response = requests.get(url, timeout=request_timeout())
             
             if response.status_code == 200:
                 data = response.json()
@@ -108,7 +130,8 @@ def get_prices(ticker: str, start_date: str, end_date: str, is_crypto: bool = Fa
         api_keys = get_api_keys()
         if api_key := api_keys.get("alpha_vantage"):
             url = f"https://www.alphavantage.co/query?function=TIME_SERIES_DAILY_ADJUSTED&symbol={ticker}&outputsize=full&apikey={api_key}"
-            response = requests.get(url)
+            with _provider_call("get_prices", "alpha_vantage"):
+                response = requests.get(url, timeout=request_timeout())
             
             if response.status_code == 200:
                 data = response.json()
@@ -173,7 +196,8 @@ def get_crypto_prices(ticker: str, start_date: str, end_date: str) -> list[Price
             "end": end_timestamp * 1000,
         }
         
-        response = requests.get(url, params=params)
+        with _provider_call("get_crypto_prices", "coincap"):
+            response = requests.get(url, params=params, timeout=request_timeout())
         
         if response.status_code == 200:
             data = response.json()
@@ -205,7 +229,8 @@ def get_crypto_prices(ticker: str, start_date: str, end_date: str) -> list[Price
                 
                 # Get volume data from asset endpoint
                 volume_url = f"https://api.coincap.io/v2/assets/{coin_id}"
-                volume_response = requests.get(volume_url)
+                with _provider_call("get_crypto_prices", "coincap"):
+                    volume_response = requests.get(volume_url, timeout=request_timeout())
                 volume_data = {}
                 
                 if volume_response.status_code == 200:
@@ -240,6 +265,7 @@ def get_crypto_prices(ticker: str, start_date: str, end_date: str) -> list[Price
     # Fallback to other APIs as they were already implemented
     # ... existing code for CoinGecko, CryptoCompare, and Binance ...
 
+@recordable(FinancialMetrics, default=list)
 def get_financial_metrics(
     ticker: str,
     end_date: str,
@@ -258,22 +284,29 @@ def get_financial_metrics(
         filtered_data = [FinancialMetrics(**metric) for metric in cached_data if metric["report_period"] <= end_date]
         filtered_data.sort(key=lambda x: x.report_period, reverse=True)
         if filtered_data:
+            _metrics.record_hit("get_financial_metrics")
             return filtered_data[:limit]
+    _metrics.record_miss("get_financial_metrics")
 
     # If not in cache or insufficient data, fetch from Yahoo Finance
     try:
         yf_ticker = yf.Ticker(ticker)
         
-        # Get various metrics
-        info = yf_ticker.info
-        financial_data = yf_ticker.financials
-        balance_sheet = yf_ticker.balance_sheet
-        cash_flow = yf_ticker.cashflow
-        
-        # Get quarterly data too for more data points if needed
-        quarterly_financials = yf_ticker.quarterly_financials
-        quarterly_balance_sheet = yf_ticker.quarterly_balance_sheet
-        quarterly_cashflow = yf_ticker.quarterly_cashflow
+        with _provider_call("get_financial_metrics", "yfinance"):
+            # Get various metrics, plus quarterly data for more data points if needed
+            (info, financial_data, balance_sheet, cash_flow,
+             quarterly_financials, quarterly_balance_sheet, quarterly_cashflow) = call_with_deadline(
+                lambda: (
+                    yf_ticker.info,
+                    yf_ticker.financials,
+                    yf_ticker.balance_sheet,
+                    yf_ticker.cashflow,
+                    yf_ticker.quarterly_financials,
+                    yf_ticker.quarterly_balance_sheet,
+                    yf_ticker.quarterly_cashflow,
+                ),
+                "get_financial_metrics (yfinance)",
+            )
         
         # Combine data sources based on available dates
         all_dates = set()
@@ -438,7 +471,9 @@ def get_crypto_metrics(
         filtered_data = [FinancialMetrics(**metric) for metric in cached_data if metric["report_period"] <= end_date]
         filtered_data.sort(key=lambda x: x.report_period, reverse=True)
         if filtered_data:
+            _metrics.record_hit("get_crypto_metrics")
             return filtered_data[:limit]
+    _metrics.record_miss("get_crypto_metrics")
     
     # Normalize ticker symbol
     coin_id = ticker.lower().replace("-usd", "").replace("/usd", "")
@@ -459,7 +494,8 @@ def get_crypto_metrics(
         if api_key := api_keys.get("coingecko"):
             params["x_cg_pro_api_key"] = api_key
         
-        response = requests.get(url, params=params)
+        with _provider_call("get_crypto_metrics", "coingecko"):
+            response = requests.get(url, params=params, timeout=request_timeout())
         
         if response.status_code == 200:
             data = response.json()
@@ -535,6 +571,7 @@ def get_crypto_metrics(
     
     return [empty_metrics]
 
+@recordable(LineItem, default=list)
 def search_line_items(
     ticker: str,
     line_items: list[str],
@@ -548,21 +585,36 @@ def search_line_items(
     if is_crypto:
         return search_crypto_line_items(ticker, line_items, end_date, period, limit)
     
+    # Check cache first; a period only counts if it already holds every requested item
+    if cached_data := _cache.get_line_items(ticker):
+        filtered_data = [
+            LineItem(**item) for item in cached_data
+            if item["report_period"] <= end_date and item.get("period") == period and all(field in item for field in line_items)
+        ]
+        filtered_data.sort(key=lambda x: x.report_period, reverse=True)
+        if filtered_data:
+            _metrics.record_hit("search_line_items")
+            return filtered_data[:limit]
+    _metrics.record_miss("search_line_items")
+    
     try:
         yf_ticker = yf.Ticker(ticker)
         
-        # Get financial statements
-        income_stmt = yf_ticker.income_stmt
-        balance_sheet = yf_ticker.balance_sheet
-        cash_flow = yf_ticker.cashflow
-        
-        # Also get quarterly data
-        q_income_stmt = yf_ticker.quarterly_income_stmt
-        q_balance_sheet = yf_ticker.quarterly_balance_sheet
-        q_cash_flow = yf_ticker.quarterly_cashflow
-        
-        # Use info for some common items
-        info = yf_ticker.info
+        with _provider_call("search_line_items", "yfinance"):
+            # Get financial statements, their quarterly versions, and info for some common items
+            (income_stmt, balance_sheet, cash_flow,
+             q_income_stmt, q_balance_sheet, q_cash_flow, info) = call_with_deadline(
+                lambda: (
+                    yf_ticker.income_stmt,
+                    yf_ticker.balance_sheet,
+                    yf_ticker.cashflow,
+                    yf_ticker.quarterly_income_stmt,
+                    yf_ticker.quarterly_balance_sheet,
+                    yf_ticker.quarterly_cashflow,
+                    yf_ticker.info,
+                ),
+                "search_line_items (yfinance)",
+            )
         
         # Get all available dates from the statements
         all_dates = set()
@@ -673,9 +725,17 @@ def search_line_items(
                         if total_debt and total_equity and total_equity > 0:
                             line_item_data[item] = total_debt / total_equity
             
+            # Record items that could not be computed so cached periods can answer the same query
+            for item in line_items:
+                line_item_data.setdefault(item, None)
+            
             # Create the LineItem object
             result_items.append(LineItem(**line_item_data))
         
+        # Cache the results
+        if result_items:
+            _cache.set_line_items(ticker, [item.model_dump() for item in result_items])
+        
         return result_items
         
     except Exception as e:
@@ -690,6 +750,8 @@ def search_crypto_line_items(
     limit: int = 10
 ) -> list[LineItem]:
     """Create appropriate line items for cryptocurrencies."""
+    _metrics.record_miss("search_crypto_line_items")
+
     # Normalize ticker symbol
     coin_id = ticker.lower().replace("-usd", "").replace("/usd", "")
     
@@ -709,7 +771,8 @@ def search_crypto_line_items(
         if api_key := api_keys.get("coingecko"):
             params["x_cg_pro_api_key"] = api_key
         
-        response = requests.get(url, params=params)
+        with _provider_call("search_crypto_line_items", "coingecko"):
+            response = requests.get(url, params=params, timeout=request_timeout())
         
         if response.status_code == 200:
             data = response.json()
@@ -802,6 +865,7 @@ def search_crypto_line_items(
     
     return [result]
 
+@recordable(InsiderTrade, default=list)
 def get_insider_trades(
     ticker: str,
     end_date: str,
@@ -817,7 +881,9 @@ def get_insider_trades(
                         and (trade.get("transaction_date") or trade["filing_date"]) <= end_date]
         filtered_data.sort(key=lambda x: x.transaction_date or x.filing_date, reverse=True)
         if filtered_data:
+            _metrics.record_hit("get_insider_trades")
             return filtered_data
+    _metrics.record_miss("get_insider_trades")
 
     # If not in cache or insufficient data, fetch from a free API
     # Using Alpha Vantage (need to get a free API key)
@@ -829,7 +895,8 @@ def get_insider_trades(
             return []
         
         url = f"https://www.alphavantage.co/query?function=INSIDER_TRANSACTIONS&symbol={ticker}&apikey={alpha_vantage_key}"
-        response = requests.get(url)
+        with _provider_call("get_insider_trades", "alpha_vantage"):
+            response = requests.get(url, timeout=request_timeout())
         
         if response.status_code != 200:
             print(f"Error fetching insider data from Alpha Vantage: {response.status_code}")
@@ -903,6 +970,7 @@ def get_insider_trades(
         # Fallback to empty result
         return []
 
+@recordable(CompanyNews, default=list)
 def get_company_news(
     ticker: str,
     end_date: str,
@@ -922,7 +990,9 @@ def get_company_news(
                         and news["date"] <= end_date]
         filtered_data.sort(key=lambda x: x.date, reverse=True)
         if filtered_data:
+            _metrics.record_hit("get_company_news")
             return filtered_data
+    _metrics.record_miss("get_company_news")
 
     # If not in cache or insufficient data, fetch from Yahoo Finance
     try:
@@ -932,7 +1002,8 @@ def get_company_news(
         
         # Get news from Yahoo Finance
         yf_ticker = yf.Ticker(ticker)
-        news_data = yf_ticker.news
+        with _provider_call("get_company_news", "yfinance"):
+            news_data = call_with_deadline(lambda: yf_ticker.news, "get_company_news (yfinance)")
         
         # Process the news
         news_items = []
@@ -990,6 +1061,8 @@ def get_crypto_news(
     limit: int = 100
 ) -> list[CompanyNews]:
     """Fetch news articles for a cryptocurrency."""
+    _metrics.record_miss("get_crypto_news")
+
     # Normalize ticker symbol
     coin_id = ticker.lower().replace("-usd", "").replace("/usd", "")
     
@@ -1011,7 +1084,8 @@ def get_crypto_news(
         if api_key := api_keys.get("cryptocompare"):
             params["api_key"] = api_key
         
-        response = requests.get(url, params=params)
+        with _provider_call("get_crypto_news", "cryptocompare"):
+            response = requests.get(url, params=params, timeout=request_timeout())
         
         if response.status_code == 200:
             data = response.json()
@@ -1055,14 +1129,17 @@ def get_crypto_news(
     # Fallback to empty list if no news found
     return []
 
+@recordable()
 def get_market_cap(
     ticker: str,
     end_date: str,
 ) -> float | None:
     """Fetch market cap from Yahoo Finance."""
+    _metrics.record_miss("get_market_cap")
     try:
         yf_ticker = yf.Ticker(ticker)
-        info = yf_ticker.info
+        with _provider_call("get_market_cap", "yfinance"):
+            info = call_with_deadline(lambda: yf_ticker.info, "get_market_cap (yfinance)")
         
         # Get market cap directly
         market_cap = info.get('marketCap')
@@ -1079,6 +1156,10 @@ def get_market_cap(
             
         return None
         
+    except DeadlineExceeded as e:
+        # No time left for the financial-metrics fallback either
+        print(f"Error fetching market cap for {ticker}: {str(e)}")
+        return None
     except Exception as e:
         print(f"Error fetching market cap for {ticker}: {str(e)}")
         
@@ -1100,9 +1181,18 @@ def prices_to_df(prices: list[Price]) -> pd.DataFrame:
     df.sort_index(inplace=True)
     return df
 
-def get_price_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
-    """Get price data as a DataFrame."""
-    prices = get_prices(ticker, start_date, end_date)
+def get_price_data(ticker: str, start_date: str, end_date: str, is_crypto: bool = False) -> pd.DataFrame:
+    """Get price data as a DataFrame, reading from the shared price panel when attached."""
+    panel = get_price_panel()
+    if panel and panel.covers(ticker, start_date, end_date):
+        df = panel.to_df(ticker, start_date, end_date)
+        if not df.empty:
+            _metrics.record_hit("get_price_data")
+            return df
+
+    prices = get_prices(ticker, start_date, end_date, is_crypto=is_crypto)
+    if not prices:
+        return pd.DataFrame()
     return prices_to_df(prices)
 
 # Helper functions
@@ -0,0 +1,90 @@
+"""Request-scoped deadlines for LLM and data-provider calls"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Awaitable, Callable, Optional, TypeVar
+
+R = TypeVar('R')
+
+# time.monotonic() by which the current run has to finish, or None
+_deadline: ContextVar[Optional[float]] = ContextVar("run_deadline", default=None)
+
+# Runs blocking calls that need a timeout; a call that overruns keeps its worker
+# until the provider returns, so allow a few of them to pile up
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="deadline")
+
+
+class DeadlineExceeded(TimeoutError):
+    """The run's deadline passed before the call finished."""
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """Give everything called inside the block `seconds` to finish; None or 0 means no deadline.
+
+    A nested scope can only shorten the deadline, never extend it.
+    """
+    if not seconds:
+        yield
+        return
+    deadline = time.monotonic() + float(seconds)
+    current = _deadline.get()
+    token = _deadline.set(min(deadline, current) if current is not None else deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline (may be negative), or None without a deadline."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline(what: str = "call"):
+    """Raise DeadlineExceeded if the deadline has already passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+
+
+def request_timeout(default: Optional[float] = None) -> Optional[float]:
+    """Timeout for an HTTP request: the time left, capped by `default`."""
+    left = remaining()
+    if left is None:
+        return default
+    left = max(left, 0.001)
+    return min(left, default) if default else left
+
+
+def call_with_deadline(fn: Callable[[], R], what: str = "call") -> R:
+    """Run a blocking call, giving up with DeadlineExceeded when the deadline passes first."""
+    left = remaining()
+    if left is None:
+        return fn()
+    if left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+    # Run in a worker carrying our context, so nested calls see the same deadline
+    future = _executor.submit(copy_context().run, fn)
+    try:
+        return future.result(timeout=left)
+    except FutureTimeoutError:
+        future.cancel()
+        raise DeadlineExceeded(f"Deadline exceeded during {what}")
+
+
+async def acall_with_deadline(coroutine_fn: Callable[[], Awaitable[R]], what: str = "call") -> R:
+    """Async version of `call_with_deadline`; the awaited call is cancelled on timeout."""
+    left = remaining()
+    if left is None:
+        return await coroutine_fn()
+    if left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+    try:
+        return await asyncio.wait_for(coroutine_fn(), timeout=left)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Deadline exceeded during {what}")
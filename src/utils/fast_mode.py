@@ -0,0 +1,100 @@
+"""Rule-based persona signals that skip the LLM when the score already decides"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar('T', bound=BaseModel)
+
+# "off" always asks the LLM, "decisive" skips it for clear-cut scores,
+# "backtest" is "decisive" live and skips every call inside a backtest, "always" never asks
+FAST_MODE_ENV = "LLM_FAST_MODE"
+FAST_MODE_CHOICES = ("off", "decisive", "backtest", "always")
+
+# Score share (score / max_score) at or above which a bullish call, or at or below
+# one minus which a bearish call, counts as decisive
+FAST_MODE_THRESHOLD_ENV = "LLM_FAST_MODE_THRESHOLD"
+DEFAULT_THRESHOLD = 0.8
+
+# Set while the backtester runs the agents
+_in_backtest: ContextVar[bool] = ContextVar("fast_mode_in_backtest", default=False)
+
+
+def get_fast_mode() -> str:
+    mode = os.environ.get(FAST_MODE_ENV, "off").strip().lower()
+    return mode if mode in FAST_MODE_CHOICES else "off"
+
+
+@contextmanager
+def backtest_context():
+    """Mark the agent calls made inside the block as part of a backtest."""
+    token = _in_backtest.set(True)
+    try:
+        yield
+    finally:
+        _in_backtest.reset(token)
+
+
+def _score_share(analysis: dict) -> Optional[float]:
+    score, max_score = analysis.get("score"), analysis.get("max_score")
+    if not isinstance(score, (int, float)) or not max_score:
+        return None
+    return min(1.0, max(0.0, score / max_score))
+
+
+def _key_details(analysis: dict, limit: int = 2) -> list[str]:
+    """First `details` strings of the agent's sub-analyses."""
+    details = []
+    for value in analysis.values():
+        if isinstance(value, dict) and isinstance(value.get("details"), str) and value["details"]:
+            details.append(value["details"])
+    return details[:limit]
+
+
+def is_decisive(analysis: dict, threshold: Optional[float] = None) -> bool:
+    """Whether the rule-based signal is clear enough to stand without the LLM."""
+    share = _score_share(analysis)
+    if share is None:
+        return False
+    if threshold is None:
+        try:
+            threshold = float(os.environ.get(FAST_MODE_THRESHOLD_ENV, DEFAULT_THRESHOLD))
+        except ValueError:
+            threshold = DEFAULT_THRESHOLD
+    signal = analysis.get("signal")
+    return (signal == "bullish" and share >= threshold) or (signal == "bearish" and share <= 1 - threshold)
+
+
+def should_skip_llm(analysis: dict) -> bool:
+    """Apply the configured fast mode to one ticker's analysis."""
+    mode = get_fast_mode()
+    if mode == "off" or _score_share(analysis) is None or analysis.get("signal") not in ("bullish", "bearish", "neutral"):
+        return False
+    if mode == "always" or (mode == "backtest" and _in_backtest.get()):
+        return True
+    return is_decisive(analysis)
+
+
+def templated_signal(analysis: dict[str, Any], pydantic_model: Type[T]) -> Optional[T]:
+    """Build the agent's signal from its rule-based score, or None without a score or if the model has a different shape."""
+    share = _score_share(analysis)
+    signal = analysis.get("signal")
+    if share is None or signal not in ("bullish", "bearish", "neutral"):
+        return None
+    # Confidence follows how far the score is toward the signal's end of the scale
+    if signal == "neutral":
+        confidence = 50.0
+    else:
+        confidence = round(100 * (share if signal == "bullish" else 1 - share), 1)
+
+    reasoning = f"Rule-based {signal} signal: score {analysis['score']:g} of {analysis['max_score']:g} ({share:.0%})."
+    details = _key_details(analysis)
+    if details:
+        reasoning += " Key factors: " + "; ".join(details) + "."
+    try:
+        return pydantic_model(signal=signal, confidence=confidence, reasoning=reasoning)
+    except Exception:
+        return None
@@ -0,0 +1,121 @@
+"""Recovering structured output from almost-valid model responses"""
+
+import json
+import re
+from typing import Any, Optional, Type, TypeVar
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.utils.json import parse_partial_json
+from pydantic import BaseModel
+
+T = TypeVar('T', bound=BaseModel)
+
+REPAIR_SYSTEM_PROMPT = "You fix JSON so that it matches a JSON schema. Respond with the corrected JSON object only."
+
+REPAIR_PROMPT = """JSON schema:
+{schema}
+
+Invalid output:
+{output}
+
+Error:
+{error}
+
+Return the corrected JSON object."""
+
+_FENCE = re.compile(r"```(?:json)?\s*([\s\S]*?)(?:```|$)")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_PYTHON_LITERAL = re.compile(r"\b(True|False|None)\b")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+class MalformedOutputError(ValueError):
+    """A response that could not be turned into the expected model, with its text for a repair request."""
+
+    def __init__(self, text: str, error: Any, raw: Any = None):
+        super().__init__(f"Malformed model output: {error}")
+        self.text = text
+        self.error = error
+        self.raw = raw
+
+
+def extract_json_text(content: str) -> Optional[str]:
+    """Pull the JSON object out of a response: a ```json fence, any fence, or the outermost braces."""
+    if not content:
+        return None
+    if match := _FENCE.search(content):
+        content = match.group(1)
+    start = content.find("{")
+    if start == -1:
+        return None
+    end = content.rfind("}")
+    return content[start:end + 1] if end > start else content[start:]
+
+
+def _fix_syntax(segment: str) -> str:
+    segment = _TRAILING_COMMA.sub(r"\1", segment)
+    return _PYTHON_LITERAL.sub(lambda m: _PYTHON_LITERALS[m.group(1)], segment)
+
+
+def _fix_outside_strings(text: str) -> str:
+    """Drop trailing commas and convert Python literals, leaving the contents of string literals untouched."""
+    parts = []
+    start, in_string, escaped = 0, False, False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                parts.append(text[start:i + 1])
+                start = i + 1
+        elif char == '"':
+            parts.append(_fix_syntax(text[start:i]))
+            start, in_string = i, True
+    # A string cut off by truncation is left as it is
+    parts.append(text[start:] if in_string else _fix_syntax(text[start:]))
+    return "".join(parts)
+
+
+def repair_json(content: str) -> Optional[dict]:
+    """Parse near-valid JSON: fenced or surrounded by prose, trailing commas, Python literals, or cut off."""
+    text = extract_json_text(content)
+    if text is None:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    text = _fix_outside_strings(text)
+    try:
+        # Also closes strings, lists and objects of a truncated response
+        parsed = parse_partial_json(text)
+    except Exception:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def parse_output(content: str, pydantic_model: Type[T]) -> T:
+    """Validate a response's JSON against `pydantic_model`, repairing it locally if needed."""
+    data = repair_json(content)
+    if data is None:
+        raise MalformedOutputError(content, "no JSON object found")
+    try:
+        return pydantic_model.model_validate(data)
+    except Exception as e:
+        raise MalformedOutputError(content, e)
+
+
+def repair_prompt(error: MalformedOutputError, pydantic_model: Type[BaseModel]) -> list:
+    """Short follow-up that asks the model to fix its own output instead of re-sending the full prompt."""
+    return [
+        SystemMessage(content=REPAIR_SYSTEM_PROMPT),
+        HumanMessage(content=REPAIR_PROMPT.format(
+            schema=json.dumps(pydantic_model.model_json_schema(), separators=(",", ":")),
+            output=error.text,
+            error=str(error.error),
+        )),
+    ]
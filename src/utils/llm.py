@@ -1,12 +1,179 @@
 """Helper functions for LLM"""
 
-import json
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from typing import TypeVar, Type, Optional, Any
-from pydantic import BaseModel
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel, create_model
 from utils.progress import progress
+from llm.routing import route_model
+from utils.deadline import DeadlineExceeded, acall_with_deadline, call_with_deadline
+from utils.fast_mode import should_skip_llm, templated_signal
+from utils.json_repair import MalformedOutputError, parse_output, repair_json, repair_prompt
+from utils.llm_batch import batchable, get_active_collector, is_batchable
+from utils.llm_hedge import ahedged_call, get_hedge_plan, hedged_call
+from utils.llm_cache import get_llm_cache, make_cache_key
+from utils.llm_scheduler import backoff_seconds, estimate_tokens, get_llm_scheduler
+from utils.llm_stream import astream_invoke, llm_stream_enabled, stream_invoke
+from utils.llm_usage import get_usage_tokens, get_usage_tracker
+from utils.run_budget import BudgetExceeded, abudget_slot, budget_exhausted, budget_slot, charge_usage
+from utils.prompt_cache import get_cache_read_tokens, mark_static_prefix
+from utils.prompt_compaction import compact_ticker_data
 
 T = TypeVar('T', bound=BaseModel)
 
+# Default number of concurrent in-flight requests per provider for acall_llm/abatch;
+# override with LLM_MAX_CONCURRENCY_<PROVIDER>, e.g. LLM_MAX_CONCURRENCY_OPENAI=16
+DEFAULT_PROVIDER_CONCURRENCY = {
+    "OpenAI": 8,
+    "Anthropic": 4,
+    "Groq": 4,
+    "Gemini": 4,
+    "Mock": 64,
+}
+
+# Tickers per persona-agent request; 1 keeps one request per ticker
+TICKER_BATCH_SIZE_ENV = "LLM_TICKER_BATCH_SIZE"
+
+BATCH_INSTRUCTIONS = """This request covers several tickers: {tickers}.
+Return a single JSON object of the form {{"signals": {{"<ticker>": <signal>, ...}}}} where each <signal> uses the JSON format above, with one entry for every ticker."""
+
+# asyncio semaphores belong to one event loop, so keep a set per running loop
+_provider_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+# Event loop that runs every blocking batch. Pooled clients keep their async connection
+# pool on the loop that first used it, so batches must not each get a fresh loop
+_batch_loop: Optional[asyncio.AbstractEventLoop] = None
+_batch_loop_lock = threading.Lock()
+
+
+def get_provider_concurrency(model_provider: str) -> int:
+    """Maximum concurrent async requests allowed for a provider."""
+    provider = getattr(model_provider, "value", model_provider)
+    override = os.environ.get(f"LLM_MAX_CONCURRENCY_{str(provider).upper()}")
+    return int(override) if override else DEFAULT_PROVIDER_CONCURRENCY.get(provider, 4)
+
+
+def _provider_semaphore(model_provider: str) -> asyncio.Semaphore:
+    provider = getattr(model_provider, "value", model_provider)
+    semaphores = _provider_semaphores.setdefault(asyncio.get_running_loop(), {})
+    if provider not in semaphores:
+        semaphores[provider] = asyncio.Semaphore(get_provider_concurrency(provider))
+    return semaphores[provider]
+
+
+def _get_client(model_name: str, model_provider: str, pydantic_model: Type[T]):
+    """Pick the client for a model. Returns (llm, model_info)."""
+    from llm.models import get_model, get_model_info, get_structured_model
+    
+    model_info = get_model_info(model_name)
+    
+    # For non-Deepseek models, we can use structured output; both clients come from the shared pool
+    if model_info and model_info.is_deepseek():
+        return get_model(model_name, model_provider), model_info
+    # include_raw keeps the AIMessage so its usage metadata can be recorded
+    return get_structured_model(model_name, model_provider, pydantic_model, method="json_mode", include_raw=True), model_info
+
+
+def _prepare_llm(prompt: Any, model_name: str, model_provider: str, pydantic_model: Type[T], use_cache: bool):
+    """Look up the response cache and pick the client. Returns (cache, cache_key, cached, llm, model_info)."""
+    # Identical prompts are answered from the persistent cache without calling the model
+    cache = get_llm_cache() if use_cache else None
+    cache_key = make_cache_key(prompt, model_name, model_provider, pydantic_model) if cache else None
+    if cache and (cached := cache.get(cache_key, pydantic_model)) is not None:
+        return cache, cache_key, cached, None, None
+    
+    llm, model_info = _get_client(model_name, model_provider, pydantic_model)
+    return cache, cache_key, None, llm, model_info
+
+
+def _parse_response(result: Any, model_info, pydantic_model: Type[T]) -> tuple[T, Any]:
+    """Split a model response into (parsed pydantic model, raw message).
+
+    Output that fails to parse is repaired locally where possible; otherwise a
+    MalformedOutputError carries the text for a repair request.
+    """
+    # For Deepseek, we need to extract and parse the JSON manually
+    if model_info and model_info.is_deepseek():
+        try:
+            return parse_output(result.content, pydantic_model), result
+        except MalformedOutputError as e:
+            e.raw = result
+            raise
+    raw = result.get("raw")
+    if result.get("parsing_error") or result.get("parsed") is None:
+        content = getattr(raw, "content", None)
+        if not isinstance(content, str) or not content:
+            raise result.get("parsing_error") or ValueError("Empty model output")
+        try:
+            return parse_output(content, pydantic_model), raw
+        except MalformedOutputError as e:
+            e.raw = raw
+            raise
+    return result["parsed"], raw
+
+
+def _raw_message(response: Any) -> Any:
+    """The model's message in a response, whether a structured-output dict or the message itself."""
+    return response.get("raw") if isinstance(response, dict) else response
+
+
+def _record_usage(raw: Any, started: float, estimated_tokens: int, model_name: str, model_provider: str, agent_name: Optional[str], ticker: Optional[str], phase: Optional[str], ok: bool = True):
+    """Log a finished request and correct the scheduler's token estimate with the real usage."""
+    input_tokens, output_tokens = get_usage_tokens(raw) if raw is not None else (0, 0)
+    cache_read_tokens = get_cache_read_tokens(raw) if raw is not None else 0
+    if input_tokens or output_tokens:
+        get_llm_scheduler().record_tokens(model_provider, input_tokens + output_tokens, estimated_tokens)
+    record = get_usage_tracker().record(
+        agent_name, model_name, model_provider,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cache_read_tokens=cache_read_tokens,
+        latency=time.perf_counter() - started,
+        ticker=ticker,
+        phase=phase,
+        ok=ok,
+    )
+    charge_usage(input_tokens + output_tokens, record.cost)
+
+
+def _collect(collector, cache_key: Optional[str], prompt: Any, model_name: str, model_provider: str, pydantic_model: Type[T], agent_name: Optional[str], default_factory) -> T:
+    """Record a batchable call's prompt for the batch run and return the default response without calling the model."""
+    if cache_key and is_batchable():
+        collector.add(cache_key, prompt, model_name, model_provider, pydantic_model, agent_name)
+    return default_factory() if default_factory else create_default_response(pydantic_model)
+
+
+def _handle_failure(e: Exception, attempt: int, max_retries: int, agent_name: Optional[str], pydantic_model: Type[T], default_factory) -> Optional[T]:
+    """Report a failed attempt; on the last one, or when the deadline or run budget has run out, return the default response."""
+    if isinstance(e, BudgetExceeded):
+        if agent_name:
+            progress.update_status(agent_name, None, "Budget exhausted")
+        return default_factory() if default_factory else create_default_response(pydantic_model)
+    if isinstance(e, DeadlineExceeded):
+        print(f"{e} in {agent_name or 'LLM call'}, using default response")
+        if agent_name:
+            progress.update_status(agent_name, None, "Deadline exceeded")
+        return default_factory() if default_factory else create_default_response(pydantic_model)
+    
+    if agent_name:
+        progress.update_status(agent_name, None, f"Error - retry {attempt + 1}/{max_retries}")
+    
+    if attempt == max_retries - 1:
+        print(f"Error in LLM call after {max_retries} attempts: {e}")
+        # Use default_factory if provided, otherwise create a basic default
+        if default_factory:
+            return default_factory()
+        return create_default_response(pydantic_model)
+    return None
+
+
 def call_llm(
     prompt: Any,
     model_name: str,
@@ -14,7 +181,12 @@ def call_llm(
     pydantic_model: Type[T],
     agent_name: Optional[str] = None,
     max_retries: int = 3,
-    default_factory = None
+    default_factory = None,
+    use_cache: bool = True,
+    ticker: Optional[str] = None,
+    phase: Optional[str] = None,
+    stream: Optional[bool] = None,
+    hedge: Optional[bool] = None
 ) -> T:
     """
     Makes an LLM call with retry logic, handling both Deepseek and non-Deepseek models.
@@ -27,50 +199,356 @@ def call_llm(
         agent_name: Optional name of the agent for progress updates
         max_retries: Maximum number of retries (default: 3)
         default_factory: Optional factory function to create default response on failure
+        use_cache: Read and write the persistent response cache (default: True)
+        ticker: Optional ticker the call is about, for usage accounting
+        phase: Optional sub-step label (e.g. a round-table phase), for usage accounting
+        stream: Forward partial output to the progress handler while generating (default: LLM_STREAM)
+        hedge: Send a duplicate request when the call runs past the agent's p90 latency (default: LLM_HEDGE)
         
     Returns:
         An instance of the specified Pydantic model
     """
-    from llm.models import get_model, get_model_info
+    model_name, model_provider = route_model(agent_name, model_name, model_provider, phase)
+    cache, cache_key, cached, llm, model_info = _prepare_llm(prompt, model_name, model_provider, pydantic_model, use_cache)
+    if cached is not None:
+        get_usage_tracker().record(agent_name, model_name, model_provider, ticker=ticker, phase=phase, cached=True)
+        return cached
+    if (collector := get_active_collector()) is not None:
+        return _collect(collector, cache_key, prompt, model_name, model_provider, pydantic_model, agent_name, default_factory)
     
-    model_info = get_model_info(model_name)
-    llm = get_model(model_name, model_provider)
+    scheduler = get_llm_scheduler()
+    tokens = estimate_tokens(prompt)
+    stream = llm_stream_enabled() if stream is None else stream
     
-    # For non-Deepseek models, we can use structured output
-    if not (model_info and model_info.is_deepseek()):
-        llm = llm.with_structured_output(
-            pydantic_model,
-            method="json_mode",
-        )
+    def _request(llm, model_info, model_name, model_provider, stream):
+        """One request to one model, recording its usage; the scheduler paces requests and waits out rate limits."""
+        with budget_slot(tokens):
+            started = time.perf_counter()
+            # Static instructions come first in agent prompts; mark them for the provider's prefix cache
+            messages = mark_static_prefix(prompt, model_provider)
+            # Every request sent is recorded once: with its usage if it returned, without if it failed
+            response, estimated = None, tokens
+            try:
+                if stream:
+                    response = scheduler.call(model_provider, lambda: stream_invoke(llm, messages, agent_name, ticker), tokens)
+                else:
+                    response = scheduler.call(model_provider, lambda: llm.invoke(messages), tokens)
+                try:
+                    result, raw = _parse_response(response, model_info, pydantic_model)
+                except MalformedOutputError as malformed:
+                    # Ask the model to fix just its output rather than re-sending the whole prompt
+                    _record_usage(malformed.raw, started, estimated, model_name, model_provider, agent_name, ticker, phase, ok=False)
+                    repair = repair_prompt(malformed, pydantic_model)
+                    response, estimated, started = None, estimate_tokens(repair), time.perf_counter()
+                    response = scheduler.call(model_provider, lambda: llm.invoke(repair), estimated)
+                    result, raw = _parse_response(response, model_info, pydantic_model)
+            except Exception:
+                _record_usage(_raw_message(response), started, estimated, model_name, model_provider, agent_name, ticker, phase, ok=False)
+                raise
+            _record_usage(raw, started, estimated, model_name, model_provider, agent_name, ticker, phase)
+            return result
+    
+    send = lambda: _request(llm, model_info, model_name, model_provider, stream)
+    # A slow call gets a duplicate request (not streamed) and the first valid result wins
+    if (plan := get_hedge_plan(agent_name, model_name, model_provider, hedge)) is not None:
+        hedge_llm, hedge_info = (llm, model_info) if plan.model_name == model_name else _get_client(plan.model_name, plan.model_provider, pydantic_model)
+        primary = send
+        send = lambda: hedged_call(primary, lambda: _request(hedge_llm, hedge_info, plan.model_name, plan.model_provider, False), plan.delay, agent_name)
     
     # Call the LLM with retries
     for attempt in range(max_retries):
         try:
-            # Call the LLM
-            result = llm.invoke(prompt)
+            # Give up when the run's deadline passes, falling back to the default response
+            result = call_with_deadline(send, "LLM call")
             
-            # For Deepseek, we need to extract and parse the JSON manually
-            if model_info and model_info.is_deepseek():
-                parsed_result = extract_json_from_deepseek_response(result.content)
-                if parsed_result:
-                    return pydantic_model(**parsed_result)
-            else:
-                return result
+            # Only successful responses are cached, never defaults
+            if cache:
+                cache.set(cache_key, model_name, result)
+            return result
                 
         except Exception as e:
-            if agent_name:
-                progress.update_status(agent_name, None, f"Error - retry {attempt + 1}/{max_retries}")
-            
-            if attempt == max_retries - 1:
-                print(f"Error in LLM call after {max_retries} attempts: {e}")
-                # Use default_factory if provided, otherwise create a basic default
-                if default_factory:
-                    return default_factory()
-                return create_default_response(pydantic_model)
+            if (default := _handle_failure(e, attempt, max_retries, agent_name, pydantic_model, default_factory)) is not None:
+                return default
+            time.sleep(backoff_seconds(attempt))
 
     # This should never be reached due to the retry logic above
     return create_default_response(pydantic_model)
 
+
+async def acall_llm(
+    prompt: Any,
+    model_name: str,
+    model_provider: str,
+    pydantic_model: Type[T],
+    agent_name: Optional[str] = None,
+    max_retries: int = 3,
+    default_factory = None,
+    use_cache: bool = True,
+    ticker: Optional[str] = None,
+    phase: Optional[str] = None,
+    stream: Optional[bool] = None,
+    hedge: Optional[bool] = None
+) -> T:
+    """Async version of `call_llm`; requests share a per-provider concurrency limit."""
+    model_name, model_provider = route_model(agent_name, model_name, model_provider, phase)
+    cache, cache_key, cached, llm, model_info = _prepare_llm(prompt, model_name, model_provider, pydantic_model, use_cache)
+    if cached is not None:
+        get_usage_tracker().record(agent_name, model_name, model_provider, ticker=ticker, phase=phase, cached=True)
+        return cached
+    if (collector := get_active_collector()) is not None:
+        return _collect(collector, cache_key, prompt, model_name, model_provider, pydantic_model, agent_name, default_factory)
+    
+    scheduler = get_llm_scheduler()
+    tokens = estimate_tokens(prompt)
+    stream = llm_stream_enabled() if stream is None else stream
+    
+    async def _send(model_provider, request, request_tokens):
+        async with _provider_semaphore(model_provider):
+            return await scheduler.acall(model_provider, request, request_tokens)
+    
+    async def _request(llm, model_info, model_name, model_provider, stream):
+        async with abudget_slot(tokens):
+            started = time.perf_counter()
+            messages = mark_static_prefix(prompt, model_provider)
+            response, estimated = None, tokens
+            try:
+                if stream:
+                    response = await _send(model_provider, lambda: astream_invoke(llm, messages, agent_name, ticker), tokens)
+                else:
+                    response = await _send(model_provider, lambda: llm.ainvoke(messages), tokens)
+                try:
+                    result, raw = _parse_response(response, model_info, pydantic_model)
+                except MalformedOutputError as malformed:
+                    _record_usage(malformed.raw, started, estimated, model_name, model_provider, agent_name, ticker, phase, ok=False)
+                    repair = repair_prompt(malformed, pydantic_model)
+                    response, estimated, started = None, estimate_tokens(repair), time.perf_counter()
+                    response = await _send(model_provider, lambda: llm.ainvoke(repair), estimated)
+                    result, raw = _parse_response(response, model_info, pydantic_model)
+            except Exception:
+                _record_usage(_raw_message(response), started, estimated, model_name, model_provider, agent_name, ticker, phase, ok=False)
+                raise
+            _record_usage(raw, started, estimated, model_name, model_provider, agent_name, ticker, phase)
+            return result
+    
+    send = lambda: _request(llm, model_info, model_name, model_provider, stream)
+    if (plan := get_hedge_plan(agent_name, model_name, model_provider, hedge)) is not None:
+        hedge_llm, hedge_info = (llm, model_info) if plan.model_name == model_name else _get_client(plan.model_name, plan.model_provider, pydantic_model)
+        primary = send
+        send = lambda: ahedged_call(primary, lambda: _request(hedge_llm, hedge_info, plan.model_name, plan.model_provider, False), plan.delay, agent_name)
+    
+    for attempt in range(max_retries):
+        try:
+            result = await acall_with_deadline(send, "LLM call")
+            
+            if cache:
+                cache.set(cache_key, model_name, result)
+            return result
+        
+        except Exception as e:
+            if (default := _handle_failure(e, attempt, max_retries, agent_name, pydantic_model, default_factory)) is not None:
+                return default
+            await asyncio.sleep(backoff_seconds(attempt))
+
+    return create_default_response(pydantic_model)
+
+
+async def abatch(
+    prompts: list[Any],
+    model_name: str,
+    model_provider: str,
+    pydantic_model: Type[T],
+    agent_name: Optional[str] = None,
+    max_retries: int = 3,
+    default_factory = None,
+    use_cache: bool = True,
+    tickers: Optional[list[str]] = None,
+    phase: Optional[str] = None
+) -> list[T]:
+    """Run `acall_llm` for every prompt concurrently and return the results in order."""
+    tickers = tickers or [None] * len(prompts)
+    return await asyncio.gather(*[
+        acall_llm(
+            prompt=prompt,
+            model_name=model_name,
+            model_provider=model_provider,
+            pydantic_model=pydantic_model,
+            agent_name=agent_name,
+            max_retries=max_retries,
+            default_factory=default_factory,
+            use_cache=use_cache,
+            ticker=ticker,
+            phase=phase,
+        )
+        for prompt, ticker in zip(prompts, tickers)
+    ])
+
+
+def _get_batch_loop() -> asyncio.AbstractEventLoop:
+    """The long-lived batch event loop, started in a daemon thread on first use."""
+    global _batch_loop
+    with _batch_loop_lock:
+        if _batch_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-batch-loop", daemon=True).start()
+            _batch_loop = loop
+    return _batch_loop
+
+
+def _run_on_batch_loop(coroutine) -> Any:
+    """Run a coroutine on the batch loop and wait for it, carrying the caller's context (deadline, budget, agent attribution)."""
+    loop = _get_batch_loop()
+    future: Future = Future()
+
+    def settle(task: asyncio.Task):
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    def start():
+        # The task copies the current context, which is the caller's inside this callback
+        loop.create_task(coroutine).add_done_callback(settle)
+
+    loop.call_soon_threadsafe(start, context=contextvars.copy_context())
+    return future.result()
+
+
+def call_llm_batch(
+    prompts: list[Any],
+    model_name: str,
+    model_provider: str,
+    pydantic_model: Type[T],
+    agent_name: Optional[str] = None,
+    max_retries: int = 3,
+    default_factory = None,
+    use_cache: bool = True,
+    tickers: Optional[list[str]] = None,
+    phase: Optional[str] = None
+) -> list[T]:
+    """Blocking wrapper around `abatch` for synchronous agents."""
+    if len(prompts) == 1:
+        return [call_llm(prompts[0], model_name, model_provider, pydantic_model, agent_name, max_retries, default_factory, use_cache, ticker=tickers[0] if tickers else None, phase=phase)]
+    
+    coroutine = abatch(prompts, model_name, model_provider, pydantic_model, agent_name, max_retries, default_factory, use_cache, tickers=tickers, phase=phase)
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not _get_batch_loop():
+        return _run_on_batch_loop(coroutine)
+
+    # Called from code already running on the batch loop, which must not block on itself: run the
+    # batch on its own loop in a worker thread that carries our context
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(contextvars.copy_context().run, asyncio.run, coroutine).result()
+
+
+def get_ticker_batch_size() -> int:
+    """Number of tickers persona agents put in one request (LLM_TICKER_BATCH_SIZE, default 1)."""
+    try:
+        return max(1, int(os.environ.get(TICKER_BATCH_SIZE_ENV, 1)))
+    except ValueError:
+        return 1
+
+
+@lru_cache(maxsize=None)
+def _batch_model(pydantic_model: Type[T]) -> Type[BaseModel]:
+    """Response model mapping each ticker to one `pydantic_model` signal."""
+    return create_model(f"{pydantic_model.__name__}Batch", signals=(dict[str, pydantic_model], ...))
+
+
+def call_llm_for_tickers(
+    template: Any,
+    tickers: list[str],
+    analysis_data: dict[str, Any],
+    model_name: str,
+    model_provider: str,
+    pydantic_model: Type[T],
+    agent_name: Optional[str] = None,
+    default_factory = None,
+    batch_size: Optional[int] = None
+) -> dict[str, T]:
+    """
+    Get one signal per ticker from a persona prompt template.
+
+    The template takes `ticker` and `analysis_data`. With a batch size of 1 every ticker
+    gets its own request; larger batch sizes send that many tickers' data in one request
+    that returns a ticker -> signal map, so the system prompt is paid for once per chunk.
+    Tickers a batched response leaves out are retried on their own. Analysis data is
+    compacted to the per-ticker prompt token budget, and in fast mode tickers with a
+    decisive rule-based score skip the LLM entirely, as do all tickers once the run's
+    budget is exhausted.
+    """
+    batch_size = batch_size or get_ticker_batch_size()
+    results: dict[str, T] = {}
+
+    # In fast mode, clear-cut rule-based scores get a templated signal instead of an LLM call;
+    # once the run's budget is used up every ticker gets one
+    over_budget = budget_exhausted()
+    for ticker in tickers:
+        if (over_budget or should_skip_llm(analysis_data[ticker])) and (signal := templated_signal(analysis_data[ticker], pydantic_model)) is not None:
+            results[ticker] = signal
+            if agent_name:
+                progress.update_status(agent_name, ticker, "Done (budget exhausted)" if over_budget else "Done (fast mode)")
+    remaining = [ticker for ticker in tickers if ticker not in results]
+
+    if batch_size > 1 and len(remaining) > 1:
+        chunks = [remaining[i:i + batch_size] for i in range(0, len(remaining), batch_size)]
+        prompts = [
+            template.invoke({
+                "analysis_data": compact_ticker_data({ticker: analysis_data[ticker] for ticker in chunk}),
+                "ticker": ", ".join(chunk),
+            }).to_messages() + [HumanMessage(content=BATCH_INSTRUCTIONS.format(tickers=", ".join(chunk)))]
+            for chunk in chunks
+        ]
+        batch_model = _batch_model(pydantic_model)
+        # Persona prompts depend only on the ticker data, so a backtest can answer them ahead of time in one batch
+        with batchable():
+            outputs = call_llm_batch(
+                prompts=prompts,
+                model_name=model_name,
+                model_provider=model_provider,
+                pydantic_model=batch_model,
+                agent_name=agent_name,
+                default_factory=lambda: batch_model(signals={}),
+                tickers=[",".join(chunk) for chunk in chunks],
+            )
+        for chunk, output in zip(chunks, outputs):
+            for ticker in chunk:
+                if ticker in output.signals:
+                    results[ticker] = output.signals[ticker]
+        remaining = [ticker for ticker in remaining if ticker not in results]
+        # While collecting for a batch run the chunk prompts stand for their tickers; don't also collect per-ticker prompts
+        if get_active_collector() is not None:
+            results.update((ticker, default_factory() if default_factory else create_default_response(pydantic_model)) for ticker in remaining)
+            remaining = []
+
+    if remaining:
+        # Generate one prompt per ticker, each with only that ticker's data
+        prompts = [
+            template.invoke({
+                "analysis_data": compact_ticker_data({ticker: analysis_data[ticker]}),
+                "ticker": ticker
+            })
+            for ticker in remaining
+        ]
+        with batchable():
+            outputs = call_llm_batch(
+                prompts=prompts,
+                model_name=model_name,
+                model_provider=model_provider,
+                pydantic_model=pydantic_model,
+                agent_name=agent_name,
+                default_factory=default_factory,
+                tickers=remaining,
+            )
+        results.update(zip(remaining, outputs))
+
+    return {ticker: results[ticker] for ticker in tickers}
+
+
 def create_default_response(model_class: Type[T]) -> T:
     """Creates a safe default response based on the model's fields."""
     default_values = {}
@@ -94,14 +572,7 @@ def create_default_response(model_class: Type[T]) -> T:
 
 def extract_json_from_deepseek_response(content: str) -> Optional[dict]:
     """Extracts JSON from Deepseek's markdown-formatted response."""
-    try:
-        json_start = content.find("```json")
-        if json_start != -1:
-            json_text = content[json_start + 7:]  # Skip past ```json
-            json_end = json_text.find("```")
-            if json_end != -1:
-                json_text = json_text[:json_end].strip()
-                return json.loads(json_text)
-    except Exception as e:
-        print(f"Error extracting JSON from Deepseek response: {e}")
-    return None
+    parsed = repair_json(content)
+    if parsed is None:
+        print("Error extracting JSON from Deepseek response: no JSON object found")
+    return parsed
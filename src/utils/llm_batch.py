@@ -0,0 +1,339 @@
+"""Offline batch inference: collect a backtest's LLM prompts, run them as a provider batch and cache the results"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Type
+
+from langchain_core.messages import convert_to_messages
+from pydantic import BaseModel
+
+from utils.json_repair import MalformedOutputError, parse_output
+from utils.llm_cache import get_llm_cache, serialize_prompt
+
+# "auto" picks the provider's batch API (OpenAI, Anthropic) and the local stand-in otherwise;
+# "local" always runs the batch in-process through the normal client
+BATCH_BACKEND_ENV = "LLM_BATCH_BACKEND"
+BATCH_BACKEND_CHOICES = ("auto", "local", "openai", "anthropic")
+BATCH_DIR_ENV = "LLM_BATCH_DIR"
+DEFAULT_BATCH_DIR = os.path.join(".cache", "llm_batches")
+# Seconds between status checks while a batch is running
+BATCH_POLL_INTERVAL_ENV = "LLM_BATCH_POLL_INTERVAL"
+DEFAULT_POLL_INTERVAL = 30.0
+# Seconds to wait for all batch jobs before giving up on them; their prompts then go out as live calls
+BATCH_TIMEOUT_ENV = "LLM_BATCH_TIMEOUT"
+DEFAULT_BATCH_TIMEOUT = 4 * 3600.0
+# Consecutive failed status checks after which a job is abandoned
+MAX_POLL_ERRORS = 5
+
+# Output tokens per batched request for providers that require a limit
+BATCH_MAX_TOKENS = 4096
+
+_ROLES = {"human": "user", "ai": "assistant", "system": "system"}
+
+
+class BatchRequest(BaseModel):
+    """One prompt to run in a batch; its id is the response-cache key the result is stored under."""
+    custom_id: str
+    model_name: str
+    model_provider: str
+    agent: Optional[str] = None
+    messages: list[dict[str, Any]]
+
+
+class BatchCollector:
+    """Records the prompts of calls made while collecting, instead of sending them."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: dict[str, BatchRequest] = {}
+        self._models: dict[str, Type[BaseModel]] = {}
+
+    def add(self, cache_key: str, prompt: Any, model_name: str, model_provider: str, pydantic_model: Type[BaseModel], agent_name: Optional[str] = None):
+        serialized = serialize_prompt(prompt)
+        if isinstance(serialized, str):
+            serialized = [{"role": "human", "content": serialized}]
+        messages = [{"role": _ROLES.get(message["role"], message["role"]), "content": message["content"]} for message in serialized]
+        with self._lock:
+            self._requests[cache_key] = BatchRequest(
+                custom_id=cache_key,
+                model_name=model_name,
+                model_provider=getattr(model_provider, "value", model_provider),
+                agent=agent_name,
+                messages=messages,
+            )
+            self._models[cache_key] = pydantic_model
+
+    def requests(self) -> list[BatchRequest]:
+        with self._lock:
+            return list(self._requests.values())
+
+    def pydantic_model(self, custom_id: str) -> Optional[Type[BaseModel]]:
+        return self._models.get(custom_id)
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+
+_collector: ContextVar[Optional[BatchCollector]] = ContextVar("llm_batch_collector", default=None)
+# Set around calls whose prompts do not depend on simulation state and can be answered ahead of time
+_batchable: ContextVar[bool] = ContextVar("llm_batchable", default=False)
+
+
+@contextmanager
+def collecting(collector: BatchCollector):
+    """Collect prompts instead of calling the LLM; every call inside the block returns its default."""
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+
+@contextmanager
+def batchable():
+    """Mark the LLM calls inside the block as safe to answer from a batch run ahead of time."""
+    token = _batchable.set(True)
+    try:
+        yield
+    finally:
+        _batchable.reset(token)
+
+
+def get_active_collector() -> Optional[BatchCollector]:
+    return _collector.get()
+
+
+def is_batchable() -> bool:
+    return _batchable.get()
+
+
+class LocalBatchBackend:
+    """File-based stand-in for a provider batch API: writes the input file, then answers it in a background thread."""
+
+    def __init__(self, directory: str, collector: BatchCollector):
+        self.directory = directory
+        self.collector = collector
+
+    def submit(self, requests: list[BatchRequest]) -> str:
+        job_id = f"local-{uuid.uuid4().hex[:12]}"
+        job_dir = os.path.join(self.directory, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        with open(os.path.join(job_dir, "input.jsonl"), "w") as f:
+            for request in requests:
+                f.write(request.model_dump_json() + "\n")
+        threading.Thread(target=self._process, args=(job_dir, requests), daemon=True).start()
+        return job_id
+
+    def _process(self, job_dir: str, requests: list[BatchRequest]):
+        from llm.models import get_structured_model
+
+        results = {}
+        for request in requests:
+            try:
+                llm = get_structured_model(request.model_name, request.model_provider, self.collector.pydantic_model(request.custom_id), method="json_mode", include_raw=True)
+                results[request.custom_id] = llm.invoke(convert_to_messages(request.messages))["raw"].content
+            except Exception as e:
+                print(f"Error in local batch request {request.custom_id[:12]}: {e}")
+        # Written in one step so a poll never sees a partial file
+        path = os.path.join(job_dir, "output.jsonl")
+        with open(path + ".tmp", "w") as f:
+            for custom_id, content in results.items():
+                f.write(json.dumps({"custom_id": custom_id, "content": content}) + "\n")
+        os.replace(path + ".tmp", path)
+
+    def cancel(self, job_id: str):
+        # The worker thread cannot be interrupted; its output is simply never read
+        pass
+
+    def poll(self, job_id: str) -> Optional[dict[str, str]]:
+        path = os.path.join(self.directory, job_id, "output.jsonl")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return {(line := json.loads(row))["custom_id"]: line["content"] for row in f if row.strip()}
+
+
+class OpenAIBatchBackend:
+    """OpenAI Batch API over /v1/chat/completions (also half the price of live requests)."""
+
+    def __init__(self, directory: str):
+        from openai import OpenAI
+
+        self.directory = directory
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    def submit(self, requests: list[BatchRequest]) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"openai-{uuid.uuid4().hex[:12]}.jsonl")
+        with open(path, "w") as f:
+            for request in requests:
+                f.write(json.dumps({
+                    "custom_id": request.custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {"model": request.model_name, "messages": request.messages, "response_format": {"type": "json_object"}},
+                }) + "\n")
+        with open(path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        return self.client.batches.create(input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h").id
+
+    def cancel(self, job_id: str):
+        self.client.batches.cancel(job_id)
+
+    def poll(self, job_id: str) -> Optional[dict[str, str]]:
+        batch = self.client.batches.retrieve(job_id)
+        if batch.status in ("failed", "expired", "cancelled"):
+            print(f"OpenAI batch {job_id} {batch.status}")
+            return {}
+        if batch.status != "completed":
+            return None
+        results = {}
+        if batch.output_file_id:
+            for row in self.client.files.content(batch.output_file_id).text.splitlines():
+                line = json.loads(row)
+                body = (line.get("response") or {}).get("body") or {}
+                if body.get("choices"):
+                    results[line["custom_id"]] = body["choices"][0]["message"]["content"]
+        return results
+
+
+class AnthropicBatchBackend:
+    """Anthropic Message Batches API."""
+
+    def __init__(self):
+        from anthropic import Anthropic
+
+        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+    def submit(self, requests: list[BatchRequest]) -> str:
+        batch = self.client.messages.batches.create(requests=[
+            {
+                "custom_id": request.custom_id,
+                "params": {
+                    "model": request.model_name,
+                    "max_tokens": BATCH_MAX_TOKENS,
+                    "system": "\n\n".join(m["content"] for m in request.messages if m["role"] == "system"),
+                    "messages": [m for m in request.messages if m["role"] != "system"],
+                },
+            }
+            for request in requests
+        ])
+        return batch.id
+
+    def cancel(self, job_id: str):
+        self.client.messages.batches.cancel(job_id)
+
+    def poll(self, job_id: str) -> Optional[dict[str, str]]:
+        if self.client.messages.batches.retrieve(job_id).processing_status != "ended":
+            return None
+        results = {}
+        for entry in self.client.messages.batches.results(job_id):
+            if entry.result.type == "succeeded":
+                results[entry.custom_id] = "".join(block.text for block in entry.result.message.content if block.type == "text")
+        return results
+
+
+def get_batch_backend(model_provider: str, collector: BatchCollector):
+    """The batch backend for a provider under the LLM_BATCH_BACKEND setting."""
+    directory = os.environ.get(BATCH_DIR_ENV) or DEFAULT_BATCH_DIR
+    choice = os.environ.get(BATCH_BACKEND_ENV, "auto").strip().lower()
+    if choice == "auto":
+        choice = {"OpenAI": "openai", "Anthropic": "anthropic"}.get(model_provider, "local")
+    if choice == "openai":
+        return OpenAIBatchBackend(directory)
+    if choice == "anthropic":
+        return AnthropicBatchBackend()
+    return LocalBatchBackend(directory, collector)
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def run_batch(collector: BatchCollector, poll_interval: Optional[float] = None, timeout: Optional[float] = None) -> int:
+    """
+    Submit the collected prompts, one job per model, wait for the results and store
+    them in the response cache. Returns the number of responses cached.
+
+    Jobs still running after `timeout` seconds (LLM_BATCH_TIMEOUT), or whose status
+    could not be checked MAX_POLL_ERRORS times in a row, are cancelled and left out;
+    their prompts miss the cache and are sent as live calls during the backtest.
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        print("Batch inference needs the LLM response cache (LLM_CACHE), skipping the batch")
+        return 0
+    if poll_interval is None:
+        poll_interval = _float_env(BATCH_POLL_INTERVAL_ENV, DEFAULT_POLL_INTERVAL)
+    if timeout is None:
+        timeout = _float_env(BATCH_TIMEOUT_ENV, DEFAULT_BATCH_TIMEOUT)
+    deadline = time.monotonic() + timeout
+
+    jobs: dict[tuple[str, str], list[BatchRequest]] = {}
+    for request in collector.requests():
+        jobs.setdefault((request.model_name, request.model_provider), []).append(request)
+
+    submitted = []
+    for (model_name, model_provider), requests in jobs.items():
+        try:
+            backend = get_batch_backend(model_provider, collector)
+            job_id = backend.submit(requests)
+        except Exception as e:
+            print(f"Error submitting batch for {model_name}: {e}")
+            continue
+        print(f"Submitted batch {job_id}: {len(requests)} {model_name} requests")
+        submitted.append((backend, job_id, model_name, len(requests)))
+
+    cached = 0
+    poll_errors: dict[str, int] = {}
+    while submitted:
+        pending = []
+        for backend, job_id, model_name, count in submitted:
+            try:
+                results = backend.poll(job_id)
+                poll_errors[job_id] = 0
+            except Exception as e:
+                poll_errors[job_id] = poll_errors.get(job_id, 0) + 1
+                print(f"Error checking batch {job_id}: {e}")
+                if poll_errors[job_id] >= MAX_POLL_ERRORS:
+                    print(f"Giving up on batch {job_id} after {MAX_POLL_ERRORS} failed checks, its {count} prompts will run live")
+                    _cancel(backend, job_id)
+                    continue
+                results = None
+            if results is None:
+                pending.append((backend, job_id, model_name, count))
+                continue
+            stored = 0
+            for custom_id, content in results.items():
+                try:
+                    cache.set(custom_id, model_name, parse_output(content, collector.pydantic_model(custom_id)))
+                    stored += 1
+                except MalformedOutputError:
+                    pass
+            print(f"Batch {job_id} done: {stored}/{count} responses cached")
+            cached += stored
+        submitted = pending
+        if submitted and time.monotonic() >= deadline:
+            for backend, job_id, model_name, count in submitted:
+                print(f"Batch {job_id} still running after {timeout:.0f}s, its {count} prompts will run live")
+                _cancel(backend, job_id)
+            break
+        if submitted:
+            time.sleep(max(0.0, min(poll_interval, deadline - time.monotonic())))
+    return cached
+
+
+def _cancel(backend, job_id: str):
+    """Cancel an abandoned job so the provider stops working on it."""
+    try:
+        backend.cancel(job_id)
+    except Exception as e:
+        print(f"Error cancelling batch {job_id}: {e}")
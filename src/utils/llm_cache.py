@@ -0,0 +1,167 @@
+"""Disk-backed cache of structured LLM responses"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar('T', bound=BaseModel)
+
+# Off by default since it answers repeated prompts with the stored response; set LLM_CACHE=1 to enable
+LLM_CACHE_ENV = "LLM_CACHE"
+LLM_CACHE_PATH_ENV = "LLM_CACHE_PATH"
+LLM_CACHE_TTL_ENV = "LLM_CACHE_TTL"
+LLM_CACHE_MAX_ENTRIES_ENV = "LLM_CACHE_MAX_ENTRIES"
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite")
+DEFAULT_TTL = 7 * 24 * 3600  # one week
+DEFAULT_MAX_ENTRIES = 20000
+
+# Check the size limit once every this many writes
+_PRUNE_EVERY = 100
+
+
+def serialize_prompt(prompt: Any) -> Any:
+    """Turn a prompt (string, message list or prompt value) into plain JSON data."""
+    if hasattr(prompt, "to_messages"):
+        prompt = prompt.to_messages()
+    if isinstance(prompt, (list, tuple)):
+        return [serialize_prompt(message) for message in prompt]
+    if hasattr(prompt, "content") and hasattr(prompt, "type"):
+        return {"role": prompt.type, "content": prompt.content}
+    return prompt
+
+
+def make_cache_key(prompt: Any, model_name: str, model_provider: str, pydantic_model: Type[BaseModel]) -> str:
+    """Content hash of everything that determines the response."""
+    payload = {
+        "model": model_name,
+        "provider": getattr(model_provider, "value", model_provider),
+        "prompt": serialize_prompt(prompt),
+        "schema": pydantic_model.model_json_schema(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite store of responses keyed by content hash, with a TTL and an entry limit."""
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, response TEXT, created REAL, accessed REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, pydantic_model: Type[T]) -> Optional[T]:
+        """Return the cached response, or None if missing, expired or unreadable."""
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if self.ttl and now - row[1] > self.ttl:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                    return None
+                self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                # A locked or read-only database only costs the cache hit
+                print(f"Error reading LLM response cache: {e}")
+                self._rollback()
+                return None
+        try:
+            return pydantic_model.model_validate_json(row[0])
+        except Exception:
+            # The schema changed shape without changing its hash input; treat as a miss
+            return None
+
+    def set(self, key: str, model_name: str, response: BaseModel):
+        """Store a response, evicting the least recently used entries past the limit; a failed write is skipped."""
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, model_name, response.model_dump_json(), now, now),
+                )
+                self._writes += 1
+                if self._writes % _PRUNE_EVERY == 0:
+                    self._prune(now)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing LLM response cache: {e}")
+                self._rollback()
+
+    def _rollback(self):
+        try:
+            self._conn.rollback()
+        except sqlite3.Error:
+            pass
+
+    def _prune(self, now: float):
+        if self.ttl:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error clearing LLM response cache: {e}")
+                self._rollback()
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def llm_cache_enabled() -> bool:
+    return os.environ.get(LLM_CACHE_ENV, "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Get the process-wide response cache, or None when disabled or unavailable."""
+    global _cache, _cache_failed
+    if _cache_failed or not llm_cache_enabled():
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = LLMResponseCache(
+                        os.environ.get(LLM_CACHE_PATH_ENV) or DEFAULT_CACHE_PATH,
+                        ttl=float(os.environ.get(LLM_CACHE_TTL_ENV, DEFAULT_TTL)),
+                        max_entries=int(os.environ.get(LLM_CACHE_MAX_ENTRIES_ENV, DEFAULT_MAX_ENTRIES)),
+                    )
+                except Exception as e:
+                    print(f"Error opening LLM response cache: {e}")
+                    _cache_failed = True
+                    return None
+    return _cache
@@ -0,0 +1,114 @@
+"""Hedged LLM requests: send a duplicate when a call runs past its usual latency"""
+
+import asyncio
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from contextvars import copy_context
+from typing import Awaitable, Callable, NamedTuple, Optional, TypeVar
+
+from utils.progress import progress
+
+R = TypeVar('R')
+
+# Comma-separated agents whose calls are hedged, or "all"; unset means no hedging,
+# e.g. LLM_HEDGE=portfolio_management_agent
+HEDGE_ENV = "LLM_HEDGE"
+# Model for the duplicate request; defaults to the same model
+HEDGE_MODEL_ENV = "LLM_HEDGE_MODEL"
+# Latency percentile of the agent's recent calls after which the duplicate is sent
+HEDGE_PERCENTILE_ENV = "LLM_HEDGE_PERCENTILE"
+DEFAULT_PERCENTILE = 0.9
+# Seconds to wait before hedging until the agent has HEDGE_MIN_SAMPLES calls on record
+HEDGE_DELAY_ENV = "LLM_HEDGE_DELAY"
+DEFAULT_DELAY = 20.0
+HEDGE_MIN_SAMPLES = 5
+
+# Runs both requests of a hedged call; a losing synchronous request cannot be
+# interrupted, it finishes in the background and only its usage is recorded
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+
+class HedgePlan(NamedTuple):
+    """When to send the duplicate and which model it goes to."""
+    delay: float
+    model_name: str
+    model_provider: str
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def is_hedged(agent_name: Optional[str]) -> bool:
+    agents = {agent.strip() for agent in os.environ.get(HEDGE_ENV, "").split(",") if agent.strip()}
+    return "all" in agents or (agent_name is not None and agent_name in agents)
+
+
+def get_hedge_plan(agent_name: Optional[str], model_name: str, model_provider: str, hedge: Optional[bool] = None) -> Optional[HedgePlan]:
+    """The hedging policy for a call, or None if it should not be hedged (`hedge` overrides LLM_HEDGE)."""
+    from llm.models import get_model_info
+    from utils.llm_usage import get_usage_tracker
+
+    if not (is_hedged(agent_name) if hedge is None else hedge):
+        return None
+
+    latency, samples = get_usage_tracker().latency_percentile(model_name, agent_name, _float_env(HEDGE_PERCENTILE_ENV, DEFAULT_PERCENTILE))
+    delay = latency if samples >= HEDGE_MIN_SAMPLES else _float_env(HEDGE_DELAY_ENV, DEFAULT_DELAY)
+
+    hedge_model = os.environ.get(HEDGE_MODEL_ENV) or model_name
+    provider = getattr(model_provider, "value", model_provider)
+    hedge_info = get_model_info(hedge_model) if hedge_model != model_name else None
+    hedge_provider = hedge_info.provider.value if hedge_info else provider
+    return HedgePlan(delay, hedge_model, hedge_provider)
+
+
+def _announce(agent_name: Optional[str], delay: float):
+    if agent_name:
+        progress.update_status(agent_name, None, f"No response after {delay:.1f}s, sending hedged request")
+
+
+def hedged_call(primary: Callable[[], R], duplicate: Callable[[], R], delay: float, agent_name: Optional[str] = None) -> R:
+    """Run `primary`; if it takes longer than `delay`, also run `duplicate` and return whichever succeeds first."""
+    first = _executor.submit(copy_context().run, primary)
+    try:
+        return first.result(timeout=delay)
+    except FutureTimeoutError:
+        pass
+
+    _announce(agent_name, delay)
+    pending = {first, _executor.submit(copy_context().run, duplicate)}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+async def ahedged_call(primary: Callable[[], Awaitable[R]], duplicate: Callable[[], Awaitable[R]], delay: float, agent_name: Optional[str] = None) -> R:
+    """Async version of `hedged_call`; the losing request is cancelled."""
+    tasks = {asyncio.ensure_future(primary())}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            _announce(agent_name, delay)
+            tasks.add(asyncio.ensure_future(duplicate()))
+
+        error: Optional[BaseException] = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,200 @@
+"""Process-wide pacing of LLM requests against provider rate limits"""
+
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+R = TypeVar('R')
+
+# Published default quotas (requests per minute, tokens per minute) for the lowest paid
+# tier of each provider; override with LLM_RPM_<PROVIDER> and LLM_TPM_<PROVIDER>
+DEFAULT_LIMITS = {
+    "OpenAI": (500, 200_000),
+    "Anthropic": (50, 40_000),
+    "Groq": (30, 6_000),
+    "Gemini": (15, 1_000_000),
+    # The local stub has no quota; pace it like an unlimited provider
+    "Mock": (1_000_000, 1_000_000_000),
+}
+
+# Fraction of the quota to use, so that pacing errors do not tip us over it
+HEADROOM = 0.9
+
+# Rate-limit responses tolerated per call on top of the caller's own retries
+MAX_RATE_LIMIT_RETRIES = 6
+
+# Tokens a structured response usually adds on top of the prompt
+EXPECTED_OUTPUT_TOKENS = 400
+
+
+def estimate_tokens(prompt: Any) -> int:
+    """Rough token count of a prompt plus its response (about four characters per token)."""
+    if hasattr(prompt, "to_messages"):
+        prompt = prompt.to_messages()
+    if isinstance(prompt, (list, tuple)):
+        text = "".join(str(getattr(message, "content", message)) for message in prompt)
+    else:
+        text = str(getattr(prompt, "content", prompt))
+    return len(text) // 4 + EXPECTED_OUTPUT_TOKENS
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an exception from a provider SDK is a 429 / quota error."""
+    if getattr(error, "status_code", None) == 429 or getattr(getattr(error, "response", None), "status_code", None) == 429:
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message or "rate limit" in message.lower()
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the wait the provider asked for from Retry-After headers or the error message."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if value := headers.get("retry-after-ms"):
+            return float(value) / 1000
+        if value := headers.get("retry-after"):
+            return float(value)
+    except (TypeError, ValueError):
+        pass
+
+    # e.g. OpenAI "Please try again in 1.5s", Groq "try again in 2m3.5s", Gemini "retryDelay": "12s"
+    message = str(error)
+    if match := re.search(r"try again in (?:(\d+)m)?(\d+(?:\.\d+)?)(ms|s)", message):
+        minutes, amount, unit = match.groups()
+        seconds = float(amount) / 1000 if unit == "ms" else float(amount)
+        return seconds + 60 * int(minutes or 0)
+    if match := re.search(r"retry(?:Delay| in)\"?:?\s*\"?(\d+(?:\.\d+)?)s", message):
+        return float(match.group(1))
+    return None
+
+
+def backoff_seconds(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class _ProviderState:
+    """Continuously refilling request and token buckets for one provider."""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.rpm = rpm * HEADROOM
+        self.tpm = tpm * HEADROOM
+        self.requests = self.rpm
+        self.tokens = self.tpm
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def refill(self, now: float):
+        elapsed = now - self.updated
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+        self.updated = now
+
+    def reserve(self, tokens: int, now: float) -> float:
+        """Take capacity for one request if available; otherwise return how long to wait."""
+        self.refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        # A single request larger than the whole bucket is let through once the bucket is full
+        tokens = min(tokens, self.tpm)
+        if self.requests >= 1 and self.tokens >= tokens:
+            self.requests -= 1
+            self.tokens -= tokens
+            return 0.0
+        wait_requests = (1 - self.requests) * 60 / self.rpm if self.requests < 1 else 0.0
+        wait_tokens = (tokens - self.tokens) * 60 / self.tpm if self.tokens < tokens else 0.0
+        return max(wait_requests, wait_tokens)
+
+
+class LLMScheduler:
+    """Paces LLM requests so that all agents together stay just under each provider's quota.
+
+    Every request reserves one request and its estimated tokens from the provider's
+    per-minute buckets before it is sent. A 429 blocks the provider for everyone
+    until the Retry-After time, and actual usage reported afterwards corrects the
+    token estimate.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._providers: dict[str, _ProviderState] = {}
+
+    def _state(self, provider: str) -> _ProviderState:
+        provider = getattr(provider, "value", provider)
+        if provider not in self._providers:
+            default_rpm, default_tpm = DEFAULT_LIMITS.get(provider, (60, 100_000))
+            name = str(provider).upper()
+            self._providers[provider] = _ProviderState(
+                float(os.environ.get(f"LLM_RPM_{name}", default_rpm)),
+                float(os.environ.get(f"LLM_TPM_{name}", default_tpm)),
+            )
+        return self._providers[provider]
+
+    def _reserve(self, provider: str, tokens: int) -> float:
+        with self._lock:
+            return self._state(provider).reserve(tokens, time.monotonic())
+
+    def acquire(self, provider: str, tokens: int):
+        """Block until a request with `tokens` estimated tokens may be sent."""
+        while (wait := self._reserve(provider, tokens)) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, provider: str, tokens: int):
+        """Async version of `acquire`."""
+        while (wait := self._reserve(provider, tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def record_tokens(self, provider: str, actual: int, estimated: int):
+        """Correct the token bucket once the real usage of a request is known."""
+        with self._lock:
+            state = self._state(provider)
+            state.tokens = min(state.tpm, state.tokens - (actual - estimated))
+
+    def on_rate_limit(self, provider: str, error: Exception, attempt: int) -> float:
+        """Pause the provider for every caller after a 429. Returns the pause in seconds."""
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = backoff_seconds(attempt, base=2.0)
+        with self._lock:
+            state = self._state(provider)
+            state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+            # Whatever we thought was left clearly is not
+            state.requests = min(state.requests, 0.0)
+        return delay
+
+    def call(self, provider: str, fn: Callable[[], R], tokens: int) -> R:
+        """Run `fn` once capacity is available, waiting out and retrying rate-limit errors."""
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            self.acquire(provider, tokens)
+            try:
+                return fn()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                delay = self.on_rate_limit(provider, e, attempt)
+                print(f"Rate limited by {getattr(provider, 'value', provider)}, pausing {delay:.1f}s")
+
+    async def acall(self, provider: str, fn: Callable[[], Awaitable[R]], tokens: int) -> R:
+        """Async version of `call`."""
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            await self.aacquire(provider, tokens)
+            try:
+                return await fn()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                delay = self.on_rate_limit(provider, e, attempt)
+                print(f"Rate limited by {getattr(provider, 'value', provider)}, pausing {delay:.1f}s")
+
+
+# Global scheduler instance
+_scheduler = LLMScheduler()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Get the global LLM scheduler."""
+    return _scheduler
@@ -0,0 +1,93 @@
+"""Streaming LLM responses to the progress handler while they are generated"""
+
+import os
+import time
+from typing import Any, Optional
+
+from langchain_core.utils.json import parse_partial_json
+
+from utils.progress import progress
+
+# Set LLM_STREAM=1 (or start the web UI with --stream) to stream every call_llm response
+LLM_STREAM_ENV = "LLM_STREAM"
+
+# Minimum seconds between progress updates for one response
+STREAM_INTERVAL = 0.25
+
+
+def llm_stream_enabled() -> bool:
+    return os.environ.get(LLM_STREAM_ENV, "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    # Anthropic streams lists of content blocks
+    if isinstance(content, list):
+        return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return ""
+
+
+class StreamAccumulator:
+    """Reassembles streamed chunks into the response `invoke` would have returned.
+
+    Structured-output wrappers created with include_raw stream dicts whose "raw" message
+    chunks arrive first and whose "parsed" value arrives at the end; plain chat models
+    stream message chunks.
+    """
+
+    def __init__(self, agent_name: Optional[str], ticker: Optional[str]):
+        self.agent_name = agent_name
+        self.ticker = ticker
+        self.result: Any = None
+        self.text = ""
+        self._last_sent = 0.0
+        self._sent_length = 0
+
+    def add(self, chunk: Any):
+        if isinstance(chunk, dict):
+            if self.result is None:
+                self.result = {}
+            for key, value in chunk.items():
+                if key == "raw" and self.result.get("raw") is not None:
+                    self.result["raw"] = self.result["raw"] + value
+                else:
+                    self.result[key] = value
+            message = chunk.get("raw")
+        else:
+            self.result = chunk if self.result is None else self.result + chunk
+            message = chunk
+
+        if message is not None and (delta := _text(getattr(message, "content", ""))):
+            self.text += delta
+            if time.monotonic() - self._last_sent >= STREAM_INTERVAL:
+                self.flush()
+
+    def flush(self):
+        """Send the text so far, and the fields that can already be parsed, to the progress handler."""
+        if not self.agent_name or len(self.text) == self._sent_length:
+            return
+        fields = parse_partial_json(self.text) if self.text.lstrip().startswith("{") else None
+        progress.stream(self.agent_name, self.ticker, self.text, fields if isinstance(fields, dict) else None, self.text[self._sent_length:])
+        self._last_sent = time.monotonic()
+        self._sent_length = len(self.text)
+
+    def finish(self) -> Any:
+        self.flush()
+        return self.result
+
+
+def stream_invoke(llm: Any, prompt: Any, agent_name: Optional[str] = None, ticker: Optional[str] = None) -> Any:
+    """`llm.invoke(prompt)`, but streamed so partial output reaches the progress handler."""
+    accumulator = StreamAccumulator(agent_name, ticker)
+    for chunk in llm.stream(prompt):
+        accumulator.add(chunk)
+    return accumulator.finish()
+
+
+async def astream_invoke(llm: Any, prompt: Any, agent_name: Optional[str] = None, ticker: Optional[str] = None) -> Any:
+    """Async version of `stream_invoke`."""
+    accumulator = StreamAccumulator(agent_name, ticker)
+    async for chunk in llm.astream(prompt):
+        accumulator.add(chunk)
+    return accumulator.finish()
@@ -0,0 +1,257 @@
+"""Per-call token, latency and cost accounting for LLM requests"""
+
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from pydantic import BaseModel
+from tabulate import tabulate
+
+from utils.prompt_cache import CACHE_READ_PRICE
+
+# Finished runs append their calls here so later runs can be estimated from them; set LLM_USAGE_HISTORY=0 to disable
+USAGE_HISTORY_ENV = "LLM_USAGE_HISTORY"
+DEFAULT_HISTORY_PATH = os.path.join(".cache", "llm_usage_history.jsonl")
+# Most recent past calls read back from the history
+HISTORY_WINDOW = 5000
+
+# Job the calls made in the current context belong to, in a process that serves several (the web UI)
+_run_id: ContextVar[Optional[str]] = ContextVar("llm_usage_run_id", default=None)
+
+
+class LLMCallRecord(BaseModel):
+    """One LLM request (or cache hit) and what it cost."""
+    agent: str
+    ticker: Optional[str] = None
+    phase: Optional[str] = None
+    model: str
+    provider: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # Input tokens served from the provider's prompt-prefix cache (included in input_tokens)
+    cache_read_tokens: int = 0
+    latency: float = 0.0
+    cost: float = 0.0
+    cached: bool = False
+    ok: bool = True
+    timestamp: float
+    run_id: Optional[str] = None
+
+
+def get_usage_tokens(message: Any) -> tuple[int, int]:
+    """Read (input, output) token counts from an AIMessage, if the provider reported them."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage:
+        return int(usage.get("input_tokens", 0)), int(usage.get("output_tokens", 0))
+    # Older integrations only fill response_metadata
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    return int(token_usage.get("prompt_tokens", 0)), int(token_usage.get("completion_tokens", 0))
+
+
+def estimate_cost(model_name: str, input_tokens: int, output_tokens: int, cache_read_tokens: int = 0) -> float:
+    """Dollar cost of a call from the model's list prices, with cached prompt tokens at the provider's discount; 0 for unknown models."""
+    from llm.models import get_model_info
+
+    model_info = get_model_info(model_name)
+    if not model_info:
+        return 0.0
+    cache_read_price = CACHE_READ_PRICE.get(model_info.provider.value, 1.0)
+    billed_input = input_tokens - cache_read_tokens + cache_read_tokens * cache_read_price
+    return (billed_input * model_info.input_cost_per_mtok + output_tokens * model_info.output_cost_per_mtok) / 1_000_000
+
+
+def get_history_path() -> Optional[str]:
+    """Path of the usage history file, or None if LLM_USAGE_HISTORY disables it."""
+    value = os.environ.get(USAGE_HISTORY_ENV, "").strip()
+    if value.lower() in ("0", "false", "no", "off"):
+        return None
+    return value or DEFAULT_HISTORY_PATH
+
+
+class LLMUsageTracker:
+    """Thread-safe log of LLM calls for the current run, with aggregate reports."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: list[LLMCallRecord] = []
+        # Records before this index are already in the history file
+        self._saved = 0
+
+    def reset(self):
+        with self._lock:
+            self._records = []
+            self._saved = 0
+
+    def record(
+        self,
+        agent: Optional[str],
+        model_name: str,
+        model_provider: str,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        latency: float = 0.0,
+        cache_read_tokens: int = 0,
+        ticker: Optional[str] = None,
+        phase: Optional[str] = None,
+        cached: bool = False,
+        ok: bool = True,
+    ) -> LLMCallRecord:
+        record = LLMCallRecord(
+            agent=agent or "unknown",
+            ticker=ticker,
+            phase=phase,
+            model=model_name,
+            provider=str(getattr(model_provider, "value", model_provider)),
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cache_read_tokens=cache_read_tokens,
+            latency=latency,
+            cost=0.0 if cached else estimate_cost(model_name, input_tokens, output_tokens, cache_read_tokens),
+            cached=cached,
+            ok=ok,
+            timestamp=time.time(),
+            run_id=_run_id.get(),
+        )
+        with self._lock:
+            self._records.append(record)
+        return record
+
+    def records(self, run_id: Optional[str] = None) -> list[LLMCallRecord]:
+        """Calls so far, or only those of one `run_scope` job."""
+        with self._lock:
+            return [record for record in self._records if run_id is None or record.run_id == run_id]
+
+    def save_history(self, path: Optional[str] = None):
+        """Append the calls not saved yet to the usage history file."""
+        path = path or get_history_path()
+        if not path:
+            return
+        with self._lock:
+            pending = self._records[self._saved:]
+            self._saved = len(self._records)
+        if not pending:
+            return
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "a") as f:
+                for record in pending:
+                    f.write(record.model_dump_json() + "\n")
+        except OSError as e:
+            print(f"Error saving LLM usage history: {e}")
+
+    def history(self, path: Optional[str] = None, window: int = HISTORY_WINDOW) -> list[LLMCallRecord]:
+        """The last `window` calls of past runs plus this process's unsaved calls, oldest first."""
+        path = path or get_history_path()
+        records = []
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    lines = f.readlines()[-window:]
+                for line in lines:
+                    try:
+                        records.append(LLMCallRecord.model_validate_json(line))
+                    except ValueError:
+                        continue
+            except OSError as e:
+                print(f"Error reading LLM usage history: {e}")
+        with self._lock:
+            records.extend(self._records[self._saved:])
+        return records[-window:]
+
+    def model_health(self, model_name: str, window: int = 20, since: float = 0.0) -> tuple[float, float, int]:
+        """p90 latency, error rate and sample count over the model's last `window` uncached calls after `since`."""
+        recent = []
+        with self._lock:
+            for record in reversed(self._records):
+                if record.timestamp < since:
+                    break
+                if record.model == model_name and not record.cached:
+                    recent.append(record)
+                    if len(recent) == window:
+                        break
+        if not recent:
+            return 0.0, 0.0, 0
+        latencies = sorted(record.latency for record in recent)
+        p90_latency = latencies[min(len(latencies) - 1, int(0.9 * len(latencies)))]
+        error_rate = sum(not record.ok for record in recent) / len(recent)
+        return p90_latency, error_rate, len(recent)
+
+    def latency_percentile(self, model_name: str, agent: Optional[str] = None, percentile: float = 0.9, window: int = 50) -> tuple[float, int]:
+        """Latency percentile and sample count over the last `window` successful uncached calls to a model (by one agent)."""
+        latencies = []
+        with self._lock:
+            for record in reversed(self._records):
+                if record.model == model_name and record.ok and not record.cached and (agent is None or record.agent == agent):
+                    latencies.append(record.latency)
+                    if len(latencies) == window:
+                        break
+        if not latencies:
+            return 0.0, 0
+        latencies.sort()
+        return latencies[min(len(latencies) - 1, int(percentile * len(latencies)))], len(latencies)
+
+    def _aggregate(self, key, run_id: Optional[str] = None) -> dict[str, dict]:
+        totals: dict[str, dict] = {}
+        for record in self.records(run_id):
+            entry = totals.setdefault(key(record), {"calls": 0, "cached": 0, "errors": 0, "input_tokens": 0, "output_tokens": 0, "cache_read_tokens": 0, "latency": 0.0, "cost": 0.0})
+            entry["calls"] += 1
+            entry["cached"] += int(record.cached)
+            entry["errors"] += int(not record.ok)
+            entry["input_tokens"] += record.input_tokens
+            entry["output_tokens"] += record.output_tokens
+            entry["cache_read_tokens"] += record.cache_read_tokens
+            entry["latency"] += record.latency
+            entry["cost"] += record.cost
+        return totals
+
+    def summary(self, run_id: Optional[str] = None) -> dict:
+        """Totals for the run (or one `run_scope` job), broken down by agent, model and round-table phase."""
+        by_agent = self._aggregate(lambda r: r.agent, run_id)
+        return {
+            "total": self._aggregate(lambda r: "total", run_id).get("total", {}),
+            "by_agent": by_agent,
+            "by_model": self._aggregate(lambda r: r.model, run_id),
+            "by_phase": {phase: totals for phase, totals in self._aggregate(lambda r: r.phase or "", run_id).items() if phase},
+        }
+
+    def print_summary(self):
+        """Print per-agent token, latency and cost table for the run so far."""
+        summary = self.summary()
+        if not summary["by_agent"]:
+            return
+
+        rows = [
+            [agent, s["calls"], s["cached"], s["input_tokens"], s["cache_read_tokens"], s["output_tokens"], f"{s['latency']:.1f}s", f"${s['cost']:.4f}"]
+            for agent, s in sorted(summary["by_agent"].items(), key=lambda item: -item[1]["cost"])
+        ]
+        total = summary["total"]
+        rows.append(["TOTAL", total["calls"], total["cached"], total["input_tokens"], total["cache_read_tokens"], total["output_tokens"], f"{total['latency']:.1f}s", f"${total['cost']:.4f}"])
+
+        print("\nLLM usage:")
+        print(tabulate(rows, headers=["Agent", "Calls", "Cached", "Input tokens", "Prefix-cached", "Output tokens", "Latency", "Cost"], tablefmt="grid"))
+
+
+# Global usage tracker
+_tracker = LLMUsageTracker()
+
+
+def get_usage_tracker() -> LLMUsageTracker:
+    """Get the global LLM usage tracker."""
+    return _tracker
+
+
+@contextmanager
+def run_scope(run_id: Optional[str] = None):
+    """Tag the calls made inside the block with a job id (a new one if not given), yielded for reporting."""
+    run_id = run_id or uuid.uuid4().hex[:12]
+    token = _run_id.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _run_id.reset(token)
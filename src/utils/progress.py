@@ -17,6 +17,8 @@ class AgentProgress:
         self.table = Table(show_header=False, box=None, padding=(0, 1))
         self.live = Live(self.table, console=console, refresh_per_second=4)
         self.started = False
+        # Optional extra receiver of updates (e.g. the web UI), with update_status and optionally stream methods
+        self.handler = None
 
     def start(self):
         """Start the progress display."""
@@ -40,6 +42,19 @@ class AgentProgress:
         if status:
             self.agent_status[agent_name]["status"] = status
 
+        if self.handler:
+            self.handler.update_status(agent_name, ticker, status)
+        self._refresh_display()
+
+    def stream(self, agent_name: str, ticker: Optional[str], text: str, fields: Optional[dict] = None, delta: Optional[str] = None):
+        """Report the partial output of a streaming LLM call, the text added since its last report, and any fields already parsed from it."""
+        if self.handler and hasattr(self.handler, "stream"):
+            self.handler.stream(agent_name, ticker, text, fields, delta)
+        if agent_name not in self.agent_status:
+            self.agent_status[agent_name] = {"status": "", "ticker": None}
+        if ticker:
+            self.agent_status[agent_name]["ticker"] = ticker
+        self.agent_status[agent_name]["status"] = f"Generating ({len(text)} chars)"
         self._refresh_display()
 
     def _refresh_display(self):
@@ -0,0 +1,61 @@
+"""Marking static prompt prefixes for provider-side prompt caching"""
+
+import os
+from typing import Any
+
+from langchain_core.messages import SystemMessage
+
+# Set LLM_PROMPT_CACHE=0 to stop marking prompt prefixes
+PROMPT_CACHE_ENV = "LLM_PROMPT_CACHE"
+
+# Providers that only cache a prefix marked with cache_control. OpenAI caches long
+# prefixes automatically, so it only needs the static-first prompt layout; the mock
+# provider simulates Anthropic's behaviour
+MARKED_PROVIDERS = {"Anthropic", "Mock"}
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Share of the normal input price charged for prompt tokens read from the provider's cache
+CACHE_READ_PRICE = {
+    "Anthropic": 0.1,
+    "OpenAI": 0.5,
+    "Gemini": 0.25,
+    "Mock": 0.1,
+}
+
+
+def prompt_cache_enabled() -> bool:
+    return os.environ.get(PROMPT_CACHE_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def mark_static_prefix(prompt: Any, model_provider: str) -> Any:
+    """
+    Mark a prompt's leading system messages as a cacheable prefix.
+
+    Agent prompts put their static instructions in the system messages and the
+    per-call data after them, so the prefix is identical across calls. Prompts for
+    other providers, or without a leading system message, are returned unchanged.
+    """
+    provider = getattr(model_provider, "value", model_provider)
+    if provider not in MARKED_PROVIDERS or not prompt_cache_enabled():
+        return prompt
+
+    messages = prompt.to_messages() if hasattr(prompt, "to_messages") else prompt
+    if not isinstance(messages, list):
+        return prompt
+    prefix = 0
+    while prefix < len(messages) and isinstance(messages[prefix], SystemMessage):
+        prefix += 1
+    if prefix == 0 or not isinstance(messages[prefix - 1].content, str):
+        return prompt
+
+    # The breakpoint goes on the last static block; everything before it is cached with it
+    marked = SystemMessage(content=[{"type": "text", "text": messages[prefix - 1].content, "cache_control": CACHE_CONTROL}])
+    return messages[:prefix - 1] + [marked] + messages[prefix:]
+
+
+def get_cache_read_tokens(message: Any) -> int:
+    """Prompt tokens the provider served from its prefix cache, if it reported them."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    return int(details.get("cache_read", 0) or 0)
@@ -0,0 +1,88 @@
+"""Shrinking analysis payloads to fit a prompt token budget"""
+
+import json
+import math
+import os
+from typing import Any, Optional
+
+# Tokens of analysis data allowed per ticker in a prompt; 0 disables the budget
+PROMPT_TOKEN_BUDGET_ENV = "LLM_PROMPT_TOKEN_BUDGET"
+DEFAULT_PROMPT_TOKEN_BUDGET = 1500
+
+# Fields that cost tokens without helping the model decide
+LOW_VALUE_FIELDS = {"url", "permalink", "created_utc", "thumbnail", "image", "id"}
+
+# (items kept per list, characters kept per string) for each tightening step
+COMPACTION_LEVELS = [(None, None), (5, 400), (3, 200), (1, 100)]
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4
+
+
+def get_prompt_token_budget() -> int:
+    """Per-ticker prompt budget from LLM_PROMPT_TOKEN_BUDGET."""
+    try:
+        return max(0, int(os.environ.get(PROMPT_TOKEN_BUDGET_ENV, DEFAULT_PROMPT_TOKEN_BUDGET)))
+    except ValueError:
+        return DEFAULT_PROMPT_TOKEN_BUDGET
+
+
+def round_number(value: float) -> Any:
+    """Round a float to the precision a model can use: whole numbers when large, 4 significant digits when small."""
+    if not math.isfinite(value):
+        return None
+    if abs(value) >= 10_000:
+        return int(round(value))
+    if abs(value) >= 1:
+        return round(value, 2)
+    return float(f"{value:.4g}")
+
+
+def _summarize_numbers(values: list) -> dict:
+    return {"count": len(values), "min": round_number(min(values)), "max": round_number(max(values)), "mean": round_number(sum(values) / len(values))}
+
+
+def _compact(data: Any, max_items: Optional[int], max_chars: Optional[int]) -> Any:
+    if isinstance(data, dict):
+        return {
+            key: _compact(value, max_items, max_chars)
+            for key, value in data.items()
+            if value is not None and key not in LOW_VALUE_FIELDS
+        }
+    if isinstance(data, (list, tuple)):
+        if max_items is not None and len(data) > max_items:
+            # Long numeric series become their statistics, other lists keep their first items
+            if all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in data):
+                return _summarize_numbers(data)
+            kept = [_compact(item, max_items, max_chars) for item in data[:max_items]]
+            return kept + [f"... {len(data) - max_items} more"]
+        return [_compact(item, max_items, max_chars) for item in data]
+    if isinstance(data, float):
+        return round_number(data)
+    if isinstance(data, str) and max_chars is not None and len(data) > max_chars:
+        return data[:max_chars] + "..."
+    return data
+
+
+def compact_json(data: Any, budget: Optional[int] = None) -> str:
+    """
+    Serialize prompt data as compact JSON, tightening it until it fits `budget` tokens.
+
+    Floats are always rounded and empty or low-value fields dropped; past the budget,
+    lists are cut down (numeric series to their statistics) and long strings truncated
+    step by step. The most compact form is returned if even that does not fit.
+    """
+    text = ""
+    for max_items, max_chars in COMPACTION_LEVELS:
+        text = json.dumps(_compact(data, max_items, max_chars), separators=(",", ":"), default=str)
+        if not budget or count_tokens(text) <= budget:
+            break
+    return text
+
+
+def compact_ticker_data(data: dict[str, Any], budget: Optional[int] = None) -> str:
+    """Compact a ticker -> analysis map with the per-ticker budget scaled to the number of tickers."""
+    budget = get_prompt_token_budget() if budget is None else budget
+    return compact_json(data, budget * max(1, len(data)))
@@ -0,0 +1,174 @@
+"""Run-level caps on concurrent LLM calls, total tokens and spend"""
+
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Defaults for the CLI flags and the web UI; unset means no limit
+MAX_CONCURRENT_ENV = "LLM_RUN_MAX_CONCURRENT"
+MAX_TOKENS_ENV = "LLM_RUN_MAX_TOKENS"
+MAX_COST_ENV = "LLM_RUN_MAX_COST"
+
+# Waits for a concurrency slot held by synchronous callers without blocking the event loop
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="budget")
+
+
+class BudgetExceeded(RuntimeError):
+    """The run has used up its token or spend budget."""
+
+
+class RunBudget:
+    """Limits shared by every LLM call of one run; calls past the budget fall back to rule-based or default output."""
+
+    def __init__(self, max_concurrent: Optional[int] = None, max_tokens: Optional[int] = None, max_cost: Optional[float] = None):
+        self.max_concurrent = max_concurrent
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.tokens = 0
+        self.cost = 0.0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        # asyncio semaphores belong to one event loop, so async callers queue on one per running loop
+        self._loop_slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._reported = False
+
+    @classmethod
+    def from_env(cls, max_concurrent: Optional[int] = None, max_tokens: Optional[int] = None, max_cost: Optional[float] = None) -> Optional["RunBudget"]:
+        """Budget from the given limits, falling back to the environment; None if nothing is limited."""
+        max_concurrent = max_concurrent or int(os.environ.get(MAX_CONCURRENT_ENV) or 0) or None
+        max_tokens = max_tokens or int(os.environ.get(MAX_TOKENS_ENV) or 0) or None
+        max_cost = max_cost or float(os.environ.get(MAX_COST_ENV) or 0) or None
+        if not (max_concurrent or max_tokens or max_cost):
+            return None
+        return cls(max_concurrent, max_tokens, max_cost)
+
+    def exhausted(self, estimated_tokens: int = 0) -> bool:
+        with self._lock:
+            return (self.max_tokens is not None and self.tokens + estimated_tokens > self.max_tokens) or (
+                self.max_cost is not None and self.cost >= self.max_cost
+            )
+
+    def check(self, estimated_tokens: int = 0):
+        """Raise BudgetExceeded if a call of about `estimated_tokens` would go over the budget."""
+        if self.exhausted(estimated_tokens):
+            with self._lock:
+                report, self._reported = not self._reported, True
+            if report:
+                print(f"LLM budget exhausted ({self.describe()}), remaining agents use rule-based or default outputs")
+            raise BudgetExceeded(f"LLM budget exhausted ({self.describe()})")
+
+    def charge(self, tokens: int, cost: float):
+        with self._lock:
+            self.tokens += tokens
+            self.cost += cost
+
+    def describe(self) -> str:
+        parts = []
+        if self.max_tokens is not None:
+            parts.append(f"{self.tokens}/{self.max_tokens} tokens")
+        if self.max_cost is not None:
+            parts.append(f"${self.cost:.4f}/${self.max_cost:.2f}")
+        return ", ".join(parts) or "no token or spend limit"
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the run's concurrent-call slots."""
+        if self._slots is None:
+            yield
+            return
+        self._slots.acquire()
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def _loop_slot(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self._loop_slots:
+            self._loop_slots[loop] = asyncio.Semaphore(self.max_concurrent)
+        return self._loop_slots[loop]
+
+    async def _acquire(self):
+        """Take a slot from the shared semaphore, waiting in a worker thread while synchronous callers hold them all."""
+        if self._slots.acquire(blocking=False):
+            return
+        future = _executor.submit(self._slots.acquire)
+        try:
+            await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # The worker may still get the slot after we stop waiting; hand it straight back
+            future.add_done_callback(lambda f: f.cancelled() or self._slots.release())
+            raise
+
+    @asynccontextmanager
+    async def aslot(self):
+        """Async version of `slot`; waits without blocking the event loop."""
+        if self._slots is None:
+            yield
+            return
+        async with self._loop_slot():
+            await self._acquire()
+            try:
+                yield
+            finally:
+                self._slots.release()
+
+
+_budget: ContextVar[Optional[RunBudget]] = ContextVar("run_budget", default=None)
+
+
+@contextmanager
+def budget_scope(budget: Optional[RunBudget]):
+    """Apply `budget` to every LLM call inside the block; None means no budget."""
+    if budget is None:
+        yield
+        return
+    token = _budget.set(budget)
+    try:
+        yield
+    finally:
+        _budget.reset(token)
+
+
+def get_run_budget() -> Optional[RunBudget]:
+    return _budget.get()
+
+
+def budget_exhausted() -> bool:
+    budget = _budget.get()
+    return budget is not None and budget.exhausted()
+
+
+@contextmanager
+def budget_slot(estimated_tokens: int = 0):
+    """Check the run's budget and hold a concurrency slot for one call."""
+    budget = _budget.get()
+    if budget is None:
+        yield
+        return
+    budget.check(estimated_tokens)
+    with budget.slot():
+        yield
+
+
+@asynccontextmanager
+async def abudget_slot(estimated_tokens: int = 0):
+    """Async version of `budget_slot`."""
+    budget = _budget.get()
+    if budget is None:
+        yield
+        return
+    budget.check(estimated_tokens)
+    async with budget.aslot():
+        yield
+
+
+def charge_usage(tokens: int, cost: float):
+    """Count a finished call against the run's budget."""
+    if (budget := _budget.get()) is not None:
+        budget.charge(tokens, cost)
@@ -0,0 +1,249 @@
+"""Dry-run estimates of a run's LLM calls, tokens, cost and wall time from past usage"""
+
+import math
+from typing import Optional
+
+import pandas as pd
+from pydantic import BaseModel
+from tabulate import tabulate
+
+from llm.routing import route_model
+from utils.llm import get_provider_concurrency, get_ticker_batch_size
+from utils.llm_scheduler import EXPECTED_OUTPUT_TOKENS
+from utils.llm_usage import LLMCallRecord, estimate_cost, get_usage_tracker
+
+# Analysts whose agent makes an LLM call per ticker; the others are rule-based
+LLM_ANALYSTS = ("ben_graham", "bill_ackman", "cathie_wood", "charlie_munger", "nancy_pelosi", "warren_buffett", "wsb")
+
+# Per-call figures used until the usage history has calls for an agent or model
+DEFAULT_INPUT_TOKENS = 1500
+DEFAULT_LATENCY = 8.0
+
+# Attempts call_llm makes before falling back to the default response
+MAX_ATTEMPTS = 3
+
+
+class CallStats(BaseModel):
+    """Average size and latency of one past call, per ticker it covered."""
+    input_tokens: float = DEFAULT_INPUT_TOKENS
+    output_tokens: float = EXPECTED_OUTPUT_TOKENS
+    latency: float = DEFAULT_LATENCY
+    error_rate: float = 0.0
+    samples: int = 0
+
+
+class AgentEstimate(BaseModel):
+    """Expected LLM work of one agent (or round-table phase) over the whole run."""
+    model: str
+    provider: str = ""
+    llm_calls: int = 0
+    http_requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+    # Seconds this agent adds to one trading day
+    day_wall_time: float = 0.0
+    # Seconds of requests it sends in one trading day, added up over concurrent requests
+    day_busy_time: float = 0.0
+    # Past calls the per-call figures come from; 0 means the defaults were used
+    samples: int = 0
+
+
+class RunEstimate(BaseModel):
+    """Expected LLM calls, tokens, cost and wall time of a run or backtest."""
+    tickers: list[str]
+    trading_days: int = 1
+    llm_calls: int = 0
+    http_requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+    day_wall_time: float = 0.0
+    wall_time: float = 0.0
+    by_agent: dict[str, AgentEstimate] = {}
+
+    def fits(self, day_deadline: Optional[float]) -> bool:
+        """Whether each trading day is expected to finish within `day_deadline` seconds."""
+        return day_deadline is None or self.day_wall_time <= day_deadline
+
+
+def _ticker_count(record: LLMCallRecord) -> int:
+    return len(record.ticker.split(",")) if record.ticker else 1
+
+
+def call_stats(history: list[LLMCallRecord], model_name: str, agent: str, phase: Optional[str] = None) -> CallStats:
+    """
+    Per-ticker call figures for an agent (and round-table phase) on a model, from the
+    closest match in the history: the phase, then the agent, then any call to the model.
+    """
+    matchers = [
+        lambda r: r.agent == agent and r.phase == phase,
+        lambda r: r.agent == agent,
+        lambda r: True,
+    ]
+    for matches in matchers[0 if phase else 1:]:
+        records = [r for r in history if r.model == model_name and not r.cached and matches(r)]
+        successful = [r for r in records if r.ok]
+        if not successful:
+            continue
+        tickers = sum(_ticker_count(r) for r in successful)
+        return CallStats(
+            input_tokens=sum(r.input_tokens for r in successful) / tickers,
+            output_tokens=sum(r.output_tokens for r in successful) / tickers,
+            latency=sum(r.latency for r in successful) / len(successful),
+            error_rate=(len(records) - len(successful)) / len(records),
+            samples=len(successful),
+        )
+    return CallStats()
+
+
+def _estimate_agent(history, agent, phase, model_name, model_provider, calls_per_day, tickers_per_call, trading_days, parallel, max_concurrent) -> AgentEstimate:
+    """Expected work of `calls_per_day` daily calls covering `tickers_per_call` tickers each, sent concurrently if `parallel`."""
+    model_name, model_provider = route_model(agent, model_name, model_provider, phase)
+    stats = call_stats(history, model_name, agent, phase)
+    # Failed attempts are retried, up to MAX_ATTEMPTS per call
+    attempts = min(MAX_ATTEMPTS, 1 / max(1 - stats.error_rate, 1 / MAX_ATTEMPTS))
+    calls = calls_per_day * trading_days
+    input_tokens = int(calls * tickers_per_call * stats.input_tokens)
+    output_tokens = int(calls * tickers_per_call * stats.output_tokens)
+    if parallel:
+        concurrency = min(get_provider_concurrency(model_provider), max_concurrent or calls_per_day or 1)
+        rounds = math.ceil(calls_per_day / max(concurrency, 1))
+    else:
+        rounds = calls_per_day
+    return AgentEstimate(
+        model=model_name,
+        provider=model_provider,
+        llm_calls=calls,
+        http_requests=math.ceil(calls * attempts),
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cost=estimate_cost(model_name, input_tokens, output_tokens),
+        day_wall_time=rounds * stats.latency * attempts,
+        day_busy_time=calls_per_day * stats.latency * attempts,
+        samples=stats.samples,
+    )
+
+
+def _shared_wall_time(estimates: list[AgentEstimate], max_concurrent: Optional[int]) -> float:
+    """
+    Wall time of agents running side by side. Their requests to one provider share its
+    concurrency limit (and all of them the run's), so the agents take at least as long
+    as the slowest of them alone and as their combined requests through the shared slots.
+    """
+    busy_by_provider: dict[str, float] = {}
+    for estimate in estimates:
+        busy_by_provider[estimate.provider] = busy_by_provider.get(estimate.provider, 0.0) + estimate.day_busy_time
+    shared = [busy / min(get_provider_concurrency(provider), max_concurrent or math.inf) for provider, busy in busy_by_provider.items()]
+    if max_concurrent:
+        shared.append(sum(busy_by_provider.values()) / max_concurrent)
+    return max([estimate.day_wall_time for estimate in estimates] + shared, default=0.0)
+
+
+def estimate_run(
+    tickers: list[str],
+    selected_analysts: list[str],
+    model_name: str,
+    model_provider: str,
+    round_table: bool = False,
+    trading_days: int = 1,
+    max_concurrent: Optional[int] = None,
+) -> RunEstimate:
+    """
+    Estimate a hedge-fund run (with the round table when `round_table` is set) repeated
+    over `trading_days` days. Per-call tokens and latency come from the usage history.
+    The figures are an upper bound: response-cache hits and fast-mode skips are not
+    counted, and data fetching time is not included.
+    """
+    history = get_usage_tracker().history()
+    batch_size = get_ticker_batch_size()
+    by_agent: dict[str, AgentEstimate] = {}
+
+    # Persona agents run side by side, each sending its ticker chunks concurrently through the provider's shared slots
+    for analyst in selected_analysts:
+        if analyst in LLM_ANALYSTS:
+            chunks = math.ceil(len(tickers) / batch_size) if batch_size > 1 and len(tickers) > 1 else len(tickers)
+            by_agent[f"{analyst}_agent"] = _estimate_agent(
+                history, f"{analyst}_agent", None, model_name, model_provider,
+                chunks, len(tickers) / max(chunks, 1), trading_days, parallel=True, max_concurrent=max_concurrent,
+            )
+    persona_agents = set(by_agent)
+    analysts_time = _shared_wall_time(list(by_agent.values()), max_concurrent)
+
+    # The portfolio manager decides for all tickers in one call (its history has no per-ticker split)
+    by_agent["portfolio_management_agent"] = _estimate_agent(
+        history, "portfolio_management_agent", None, model_name, model_provider,
+        1, 1, trading_days, parallel=False, max_concurrent=max_concurrent,
+    )
+
+    # The round table discusses one ticker at a time, one call after another
+    if round_table:
+        speakers = len(selected_analysts)
+        phases = {
+            "initial_positions": speakers,
+            "questioning": 2 * min(3, speakers),
+            "debate_topics": 1,
+            "debate": 4 if speakers > 1 else 0,
+            "synthesis": min(3, speakers),
+            "conclusion": 1,
+            "final_analysis": 1,
+        }
+        for phase, calls in phases.items():
+            if calls:
+                by_agent[f"round_table:{phase}"] = _estimate_agent(
+                    history, "round_table", phase, model_name, model_provider,
+                    calls * len(tickers), 1, trading_days, parallel=False, max_concurrent=max_concurrent,
+                )
+
+    day_wall_time = analysts_time + sum(estimate.day_wall_time for agent, estimate in by_agent.items() if agent not in persona_agents)
+    return RunEstimate(
+        tickers=tickers,
+        trading_days=trading_days,
+        llm_calls=sum(estimate.llm_calls for estimate in by_agent.values()),
+        http_requests=sum(estimate.http_requests for estimate in by_agent.values()),
+        input_tokens=sum(estimate.input_tokens for estimate in by_agent.values()),
+        output_tokens=sum(estimate.output_tokens for estimate in by_agent.values()),
+        cost=sum(estimate.cost for estimate in by_agent.values()),
+        day_wall_time=day_wall_time,
+        wall_time=day_wall_time * trading_days,
+        by_agent=by_agent,
+    )
+
+
+def estimate_backtest(
+    tickers: list[str],
+    selected_analysts: list[str],
+    model_name: str,
+    model_provider: str,
+    start_date: str,
+    end_date: str,
+    max_concurrent: Optional[int] = None,
+) -> RunEstimate:
+    """Estimate a backtest: one run per business day between the dates."""
+    trading_days = len(pd.date_range(start_date, end_date, freq="B"))
+    return estimate_run(tickers, selected_analysts, model_name, model_provider, trading_days=trading_days, max_concurrent=max_concurrent)
+
+
+def max_tickers_within(day_deadline: float, tickers: list[str], selected_analysts: list[str], model_name: str, model_provider: str, **kwargs) -> int:
+    """The most of `tickers` (taken in order) whose trading day is expected to fit in `day_deadline` seconds."""
+    for count in range(len(tickers), 0, -1):
+        if estimate_run(tickers[:count], selected_analysts, model_name, model_provider, **kwargs).fits(day_deadline):
+            return count
+    return 0
+
+
+def print_estimate(estimate: RunEstimate, day_deadline: Optional[float] = None):
+    """Print the per-agent estimate table and the totals."""
+    rows = [
+        [agent, e.model, e.llm_calls, e.http_requests, e.input_tokens, e.output_tokens, f"{e.day_wall_time:.1f}s", f"${e.cost:.4f}", e.samples or "default"]
+        for agent, e in estimate.by_agent.items()
+    ]
+    rows.append(["TOTAL", "", estimate.llm_calls, estimate.http_requests, estimate.input_tokens, estimate.output_tokens, f"{estimate.day_wall_time:.1f}s", f"${estimate.cost:.4f}", ""])
+
+    days = f" over {estimate.trading_days} trading days" if estimate.trading_days > 1 else ""
+    print(f"\nEstimated LLM usage for {', '.join(estimate.tickers)}{days}:")
+    print(tabulate(rows, headers=["Agent", "Model", "Calls", "Requests", "Input tokens", "Output tokens", "Time per day", "Cost", "Based on"], tablefmt="grid"))
+    print(f"Expected wall time: {estimate.wall_time:.0f}s (LLM calls only; cache hits and fast-mode skips not counted)")
+    if day_deadline is not None and not estimate.fits(day_deadline):
+        subject = "Each trading day" if estimate.trading_days > 1 else "The run"
+        print(f"{subject} is expected to take {estimate.day_wall_time:.0f}s, over the {day_deadline:.0f}s deadline")
@@ -0,0 +1,44 @@
+"""Fast JSON encoding for agent messages, reasoning output and web UI traffic"""
+
+import json
+from typing import Any
+
+# orjson is several times faster and encodes numpy arrays natively; the stdlib encoder is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def to_serializable(obj: Any) -> Any:
+    """JSON-ready form of values the encoder has no native support for (pydantic, pandas, numpy, plain objects)."""
+    if hasattr(obj, "model_dump"):  # Pydantic models
+        return obj.model_dump()
+    if hasattr(obj, "to_dict"):  # Pandas Series/DataFrame
+        return obj.to_dict()
+    if hasattr(obj, "tolist"):  # Numpy arrays and scalars
+        return obj.tolist()
+    if hasattr(obj, "isoformat"):  # Dates and timestamps
+        return obj.isoformat()
+    if hasattr(obj, "__dict__"):  # Custom objects
+        return obj.__dict__
+    return str(obj)
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Serialize to a JSON string, pretty-printed with two-space indents if `indent`."""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(obj, default=to_serializable, option=option).decode()
+        except TypeError:
+            # e.g. integers beyond 64 bits, which the stdlib encoder handles
+            pass
+    return json.dumps(obj, default=to_serializable, indent=2 if indent else None)
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse a JSON string; raises json.JSONDecodeError on invalid input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
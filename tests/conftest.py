@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# The application imports its modules relative to src/, as main.py and webui.py do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_run(tmp_path, monkeypatch):
+    """Run each test from a scratch directory with the persistent LLM cache and usage history off."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LLM_CACHE", "0")
+    monkeypatch.setenv("LLM_USAGE_HISTORY", "0")
+    monkeypatch.delenv("MOCK_LLM_LATENCY", raising=False)
+    from utils.llm_usage import get_usage_tracker
+
+    get_usage_tracker().reset()
+    yield
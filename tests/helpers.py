@@ -0,0 +1,12 @@
+"""Shared test models"""
+
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class Signal(BaseModel):
+    """The signal/confidence/reasoning shape the persona agents return."""
+    signal: Literal["bullish", "bearish", "neutral"]
+    confidence: float
+    reasoning: str
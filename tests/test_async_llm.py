@@ -0,0 +1,50 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import llm.models as models
+from utils.llm import abatch, acall_llm, call_llm, get_provider_concurrency
+
+from helpers import Signal
+
+
+def test_acall_llm_matches_call_llm_for_the_mock_provider():
+    prompt = "Analyze NVDA and give a signal"
+
+    assert asyncio.run(acall_llm(prompt, "mock", "Mock", Signal)) == call_llm(prompt, "mock", "Mock", Signal)
+
+
+def test_abatch_keeps_prompt_order():
+    prompts = [f"Analyze {ticker} and give a signal" for ticker in ("AAPL", "MSFT", "NVDA")]
+
+    results = asyncio.run(abatch(prompts, "mock", "Mock", Signal))
+
+    assert results == [call_llm(prompt, "mock", "Mock", Signal) for prompt in prompts]
+
+
+def test_provider_concurrency_can_be_overridden(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY_MOCK", "3")
+
+    assert get_provider_concurrency("Mock") == 3
+
+
+def test_abatch_never_exceeds_the_provider_limit(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY_MOCK", "2")
+    in_flight, peak = 0, 0
+
+    async def ainvoke(prompt):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        parsed = Signal(signal="neutral", confidence=50, reasoning="ok")
+        return {"raw": AIMessage(content=parsed.model_dump_json()), "parsed": parsed, "parsing_error": None}
+
+    monkeypatch.setattr(models, "get_structured_model", lambda *args, **kwargs: RunnableLambda(lambda prompt: None, afunc=ainvoke))
+
+    results = asyncio.run(abatch([f"prompt {i}" for i in range(8)], "mock", "Mock", Signal))
+
+    assert len(results) == 8
+    assert peak == 2
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from data.cache import Cache
+
+
+def test_concurrent_writers_to_one_ticker_lose_no_rows():
+    cache = Cache()
+
+    def write(day):
+        cache.set_prices("ACME", [{"time": f"2024-01-{day:02d}", "close": float(day)}])
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(write, range(1, 29)))
+
+    assert sorted(row["time"] for row in cache.get_prices("ACME")) == [f"2024-01-{day:02d}" for day in range(1, 29)]
+
+
+def test_concurrent_writers_to_many_tickers():
+    cache = Cache()
+    tickers = [f"T{i}" for i in range(64)]
+
+    def write(ticker):
+        for day in range(1, 6):
+            cache.set_company_news(ticker, [{"date": f"2024-01-{day:02d}", "title": ticker}])
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(write, tickers))
+
+    assert all(len(cache.get_company_news(ticker)) == 5 for ticker in tickers)
+
+
+def test_readers_keep_the_list_they_were_given():
+    cache = Cache()
+    cache.set_prices("ACME", [{"time": "2024-01-02", "close": 1.0}])
+    before = cache.get_prices("ACME")
+
+    cache.set_prices("ACME", [{"time": "2024-01-03", "close": 2.0}])
+
+    assert len(before) == 1
+    assert len(cache.get_prices("ACME")) == 2
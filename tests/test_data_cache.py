@@ -0,0 +1,70 @@
+import pytest
+
+import tools.api as api
+from data.cache import Cache, get_cache
+from prefetch import LINE_ITEM_PERIODS, build_jobs
+
+
+def _row(period, **fields):
+    return {"ticker": "ACME", "report_period": "2024-03-31", "period": period, "currency": "USD", **fields}
+
+
+def test_ttm_and_annual_rows_for_the_same_date_are_both_kept():
+    cache = Cache()
+    cache.set_line_items("ACME", [_row("ttm", revenue=1.0)])
+    cache.set_line_items("ACME", [_row("annual", revenue=4.0)])
+
+    rows = {row["period"]: row for row in cache.get_line_items("ACME")}
+
+    assert rows["ttm"]["revenue"] == 1.0
+    assert rows["annual"]["revenue"] == 4.0
+
+
+def test_line_items_for_a_cached_period_are_widened_with_new_fields():
+    cache = Cache()
+    cache.set_line_items("ACME", [_row("ttm", revenue=1.0)])
+    cache.set_line_items("ACME", [_row("ttm", revenue=2.0, net_income=0.5)])
+
+    (row,) = cache.get_line_items("ACME")
+
+    assert row["revenue"] == 1.0
+    assert row["net_income"] == 0.5
+
+
+def test_search_line_items_reads_both_periods_from_the_cache(monkeypatch):
+    ticker = "CACHEDPERIODS"
+    get_cache().set_line_items(ticker, [{**_row("ttm", revenue=1.0), "ticker": ticker}])
+    get_cache().set_line_items(ticker, [{**_row("annual", revenue=4.0), "ticker": ticker}])
+
+    def no_provider(*args, **kwargs):
+        raise AssertionError("cached line items should not be fetched again")
+
+    monkeypatch.setattr(api.yf, "Ticker", no_provider)
+
+    ttm = api.search_line_items(ticker, ["revenue"], "2024-12-31", period="ttm")
+    annual = api.search_line_items(ticker, ["revenue"], "2024-12-31", period="annual")
+
+    assert [item.revenue for item in ttm] == [1.0]
+    assert [item.revenue for item in annual] == [4.0]
+
+
+def test_snapshot_round_trip(tmp_path):
+    cache = Cache()
+    cache.set_prices("ACME", [{"time": "2024-01-02", "close": 1.0}])
+    cache.set_line_items("ACME", [_row("ttm", revenue=1.0), _row("annual", revenue=4.0)])
+    path = str(tmp_path / "snapshot" / "cache.json")
+
+    cache.save(path)
+    restored = Cache()
+    restored.load(path)
+
+    assert restored.get_prices("ACME") == [{"time": "2024-01-02", "close": 1.0}]
+    assert len(restored.get_line_items("ACME")) == 2
+
+
+@pytest.mark.parametrize("is_crypto", [False, True])
+def test_build_jobs_fetches_every_line_item_period(is_crypto):
+    labels = [label for _, label, _ in build_jobs(["ACME"], "2024-01-01", "2024-03-31", is_crypto=is_crypto)]
+
+    assert [f"line items ({period})" for period in LINE_ITEM_PERIODS] == [label for label in labels if label.startswith("line items")]
+    assert ("insider trades" in labels) is not is_crypto
@@ -0,0 +1,47 @@
+import pytest
+
+from data.metrics import DataMetrics, LatencyHistogram, track_agent
+
+
+def test_snapshot_counts_hits_misses_and_hit_rate():
+    metrics = DataMetrics()
+    metrics.record_hit("get_prices")
+    metrics.record_hit("get_prices")
+    metrics.record_miss("get_prices")
+
+    cache = metrics.snapshot()["cache"]["get_prices"]
+
+    assert (cache["hits"], cache["misses"]) == (2, 1)
+    assert cache["hit_rate"] == pytest.approx(2 / 3)
+
+
+def test_misses_are_attributed_to_the_running_agent():
+    metrics = DataMetrics()
+    track_agent("ben_graham_agent", lambda: metrics.record_miss("search_line_items"))()
+    metrics.record_miss("get_prices")
+
+    agents = metrics.snapshot()["agents"]
+
+    assert agents == {"ben_graham_agent": {"search_line_items": 1}, "other": {"get_prices": 1}}
+
+
+def test_timed_counts_exceptions_as_errors():
+    metrics = DataMetrics()
+    with metrics.timed("get_prices", "yfinance"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.timed("get_prices", "yfinance"):
+            raise ValueError("provider down")
+
+    provider = metrics.snapshot()["providers"]["get_prices:yfinance"]
+
+    assert (provider["count"], provider["errors"]) == (2, 1)
+
+
+def test_histogram_quantile_is_the_upper_bound_of_its_bucket():
+    histogram = LatencyHistogram()
+    for seconds in (0.01, 0.02, 0.2, 3.0):
+        histogram.observe(seconds)
+
+    assert histogram.quantile(0.5) == 0.05
+    assert histogram.quantile(1.0) == 3.0
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+
+import tools.api as api
+from utils.deadline import DeadlineExceeded, acall_with_deadline, call_with_deadline, check_deadline, deadline_scope, remaining, request_timeout
+from utils.llm import call_llm
+from utils.llm_usage import get_usage_tracker
+
+from helpers import Signal
+
+
+def test_no_deadline_by_default():
+    assert remaining() is None
+    assert request_timeout(30) == 30
+    assert call_with_deadline(lambda: 42) == 42
+
+
+def test_nested_scopes_only_shorten_the_deadline():
+    with deadline_scope(10):
+        with deadline_scope(100):
+            assert remaining() <= 10
+        with deadline_scope(1):
+            assert remaining() <= 1
+            assert request_timeout(30) <= 1
+    assert remaining() is None
+
+
+def test_slow_call_is_abandoned():
+    with deadline_scope(0.1):
+        with pytest.raises(DeadlineExceeded):
+            call_with_deadline(lambda: time.sleep(1))
+
+
+def test_worker_sees_the_callers_deadline():
+    with deadline_scope(5):
+        assert 0 < call_with_deadline(remaining) <= 5
+
+
+def test_slow_coroutine_is_cancelled():
+    async def run():
+        with deadline_scope(0.1):
+            return await acall_with_deadline(lambda: asyncio.sleep(1))
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+
+
+def test_expired_deadline_gives_the_default_without_calling_the_model():
+    with deadline_scope(0.01):
+        time.sleep(0.02)
+        with pytest.raises(DeadlineExceeded):
+            check_deadline()
+        result = call_llm("Analyze AAPL", "mock", "Mock", Signal, default_factory=lambda: Signal(signal="neutral", confidence=0, reasoning="timed out"))
+
+    assert result.reasoning == "timed out"
+    assert all(record.input_tokens == 0 for record in get_usage_tracker().records())
+
+
+class _SlowTicker:
+    """A yfinance Ticker whose every attribute takes a second to load."""
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def __getattr__(self, name):
+        time.sleep(1)
+        return {}
+
+
+@pytest.mark.parametrize("fetch, default", [
+    (lambda: api.get_financial_metrics("SLOWMETRICS", "2024-12-31"), []),
+    (lambda: api.search_line_items("SLOWITEMS", ["revenue"], "2024-12-31"), []),
+    (lambda: api.get_company_news("SLOWNEWS", "2024-12-31"), []),
+    (lambda: api.get_market_cap("SLOWCAP", "2024-12-31"), None),
+])
+def test_slow_yfinance_fetch_gives_the_empty_default(monkeypatch, fetch, default):
+    monkeypatch.setattr(api.yf, "Ticker", _SlowTicker)
+
+    started = time.monotonic()
+    with deadline_scope(0.1):
+        result = fetch()
+
+    assert result == default
+    assert time.monotonic() - started < 0.9
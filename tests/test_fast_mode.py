@@ -0,0 +1,75 @@
+from pydantic import BaseModel
+
+from utils.fast_mode import backtest_context, is_decisive, should_skip_llm, templated_signal
+
+from helpers import Signal
+
+
+class Decision(BaseModel):
+    action: str
+
+
+STRONG_BUY = {"signal": "bullish", "score": 9, "max_score": 10, "valuation": {"details": "P/E below 10"}}
+WEAK_BUY = {"signal": "bullish", "score": 6, "max_score": 10}
+STRONG_SELL = {"signal": "bearish", "score": 1, "max_score": 10}
+NO_SCORE = {"signal": "bullish"}
+
+
+def test_off_by_default():
+    assert not should_skip_llm(STRONG_BUY)
+
+
+def test_decisive_mode_skips_only_clear_scores(monkeypatch):
+    monkeypatch.setenv("LLM_FAST_MODE", "decisive")
+
+    assert should_skip_llm(STRONG_BUY)
+    assert should_skip_llm(STRONG_SELL)
+    assert not should_skip_llm(WEAK_BUY)
+    assert not should_skip_llm(NO_SCORE)
+
+
+def test_threshold_is_configurable(monkeypatch):
+    monkeypatch.setenv("LLM_FAST_MODE_THRESHOLD", "0.6")
+
+    assert is_decisive(WEAK_BUY)
+    assert not is_decisive(WEAK_BUY, threshold=0.7)
+
+
+def test_backtest_mode_skips_everything_inside_a_backtest(monkeypatch):
+    monkeypatch.setenv("LLM_FAST_MODE", "backtest")
+
+    assert not should_skip_llm(WEAK_BUY)
+    with backtest_context():
+        assert should_skip_llm(WEAK_BUY)
+        assert not should_skip_llm(NO_SCORE)
+
+
+def test_templated_signal_follows_the_score():
+    signal = templated_signal(STRONG_BUY, Signal)
+
+    assert signal.signal == "bullish"
+    assert signal.confidence == 90.0
+    assert "score 9 of 10" in signal.reasoning
+    assert "P/E below 10" in signal.reasoning
+    assert templated_signal(STRONG_SELL, Signal).confidence == 90.0
+    assert templated_signal({"signal": "neutral", "score": 5, "max_score": 10}, Signal).confidence == 50.0
+
+
+def test_no_templated_signal_without_a_score_or_for_other_models():
+    assert templated_signal(NO_SCORE, Signal) is None
+    assert templated_signal(STRONG_BUY, Decision) is None
+
+
+def test_decisive_tickers_skip_the_llm_call(monkeypatch):
+    from langchain_core.prompts import ChatPromptTemplate
+
+    from utils.llm import call_llm_for_tickers
+    from utils.llm_usage import get_usage_tracker
+
+    monkeypatch.setenv("LLM_FAST_MODE", "decisive")
+    template = ChatPromptTemplate.from_messages([("human", "Analyze {ticker}: {analysis_data}")])
+
+    signals = call_llm_for_tickers(template, ["AAPL", "MSFT"], {"AAPL": STRONG_BUY, "MSFT": WEAK_BUY}, "mock", "Mock", Signal)
+
+    assert signals["AAPL"] == templated_signal(STRONG_BUY, Signal)
+    assert [r.ticker for r in get_usage_tracker().records()] == ["MSFT"]
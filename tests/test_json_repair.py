@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import llm.models as models
+from utils.json_repair import MalformedOutputError, extract_json_text, parse_output, repair_json, repair_prompt
+
+from utils.llm import acall_llm, call_llm
+from utils.llm_usage import get_usage_tracker
+from utils.run_budget import RunBudget, budget_scope
+
+from helpers import Signal
+
+USAGE = {"input_tokens": 100, "output_tokens": 50, "total_tokens": 150}
+GOOD = Signal(signal="bullish", confidence=70, reasoning="repaired").model_dump_json()
+
+
+def test_valid_json_is_returned_as_is():
+    assert repair_json('{"a": [1, 2], "b": "x"}') == {"a": [1, 2], "b": "x"}
+
+
+def test_fenced_json_surrounded_by_prose():
+    content = 'Here is my answer:\n```json\n{"signal": "bullish"}\n```\nHope this helps.'
+
+    assert extract_json_text(content) == '{"signal": "bullish"}'
+    assert repair_json(content) == {"signal": "bullish"}
+
+
+def test_trailing_commas_and_python_literals():
+    assert repair_json('{"a": [1, 2,], "b": True, "c": None, "d": False,}') == {"a": [1, 2], "b": True, "c": None, "d": False}
+
+
+def test_string_contents_are_left_untouched():
+    content = '{"reasoning": "Margins [up, down,] None of the peers, True growth, {x,}", "ok": True,}'
+
+    assert repair_json(content) == {"reasoning": "Margins [up, down,] None of the peers, True growth, {x,}", "ok": True}
+
+
+def test_escaped_quotes_do_not_end_a_string():
+    content = r'{"reasoning": "He said \"None, True,]\" twice", "flag": False,}'
+
+    assert repair_json(content) == {"reasoning": 'He said "None, True,]" twice', "flag": False}
+
+
+def test_truncated_response_is_closed():
+    assert repair_json('{"signal": "bullish", "reasoning": "Strong moat, None') == {"signal": "bullish", "reasoning": "Strong moat, None"}
+
+
+def test_no_json_object():
+    assert repair_json("I cannot answer that.") is None
+
+
+def test_parse_output_validates_against_the_model():
+    assert parse_output('{"signal": "bearish", "confidence": 40, "reasoning": "Weak, falling,",}', Signal) == Signal(signal="bearish", confidence=40, reasoning="Weak, falling,")
+
+    with pytest.raises(MalformedOutputError) as error:
+        parse_output('{"signal": "sideways"}', Signal)
+    messages = repair_prompt(error.value, Signal)
+    assert '"signal": "sideways"' in messages[1].content
+
+
+def _client(monkeypatch, *contents):
+    """Structured-output stand-in answering each request with the next content; an exception is raised instead."""
+    replies = list(contents)
+
+    def invoke(prompt):
+        content = replies.pop(0)
+        if isinstance(content, Exception):
+            raise content
+        return {"raw": AIMessage(content=content, usage_metadata=USAGE), "parsed": None, "parsing_error": None}
+
+    async def ainvoke(prompt):
+        return invoke(prompt)
+
+    monkeypatch.setattr(models, "get_structured_model", lambda *args, **kwargs: RunnableLambda(invoke, afunc=ainvoke))
+
+
+def _default():
+    return Signal(signal="neutral", confidence=0, reasoning="default")
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_failed_repair_is_recorded_and_charged(monkeypatch, asynchronous):
+    _client(monkeypatch, "not json", "still not json")
+    budget = RunBudget(max_tokens=10_000)
+
+    with budget_scope(budget):
+        if asynchronous:
+            result = asyncio.run(acall_llm("Analyze AAPL", "mock", "Mock", Signal, max_retries=1, default_factory=_default))
+        else:
+            result = call_llm("Analyze AAPL", "mock", "Mock", Signal, max_retries=1, default_factory=_default)
+
+    assert result == _default()
+    assert [(r.ok, r.input_tokens + r.output_tokens) for r in get_usage_tracker().records()] == [(False, 150), (False, 150)]
+    assert budget.tokens == 300
+
+
+def test_successful_repair_is_recorded_once(monkeypatch):
+    _client(monkeypatch, "not json", GOOD)
+
+    result = call_llm("Analyze AAPL", "mock", "Mock", Signal, max_retries=1, default_factory=_default)
+
+    assert result.reasoning == "repaired"
+    assert [(r.ok, r.input_tokens + r.output_tokens) for r in get_usage_tracker().records()] == [(False, 150), (True, 150)]
+
+
+def test_repair_request_that_fails_is_recorded_without_usage(monkeypatch):
+    _client(monkeypatch, "not json", ConnectionError("provider down"))
+
+    call_llm("Analyze AAPL", "mock", "Mock", Signal, max_retries=1, default_factory=_default)
+
+    assert [(r.ok, r.input_tokens + r.output_tokens) for r in get_usage_tracker().records()] == [(False, 150), (False, 0)]
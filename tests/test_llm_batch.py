@@ -0,0 +1,100 @@
+import pytest
+
+import utils.llm_batch as llm_batch
+import utils.llm_cache as llm_cache
+from utils.llm import call_llm
+from utils.llm_batch import MAX_POLL_ERRORS, BatchCollector, batchable, collecting, run_batch
+from utils.llm_cache import LLMResponseCache
+from utils.llm_usage import get_usage_tracker
+
+from helpers import Signal
+
+PROMPTS = ["Analyze AAPL and give a signal", "Analyze MSFT and give a signal"]
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setenv("LLM_CACHE", "1")
+    monkeypatch.setenv("LLM_BATCH_BACKEND", "local")
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def collector():
+    collector = BatchCollector()
+    with collecting(collector), batchable():
+        for prompt in PROMPTS:
+            call_llm(prompt, "mock", "Mock", Signal, agent_name="test_agent")
+    return collector
+
+
+class StuckBackend:
+    """Batch backend whose jobs never finish, or whose status checks always fail."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.polls = 0
+        self.cancelled = []
+
+    def submit(self, requests):
+        return "stuck-job"
+
+    def poll(self, job_id):
+        self.polls += 1
+        if self.error:
+            raise self.error
+        return None
+
+    def cancel(self, job_id):
+        self.cancelled.append(job_id)
+
+
+def test_collecting_records_prompts_without_calling_the_model(collector):
+    assert len(collector) == 2
+    assert get_usage_tracker().records() == []
+
+
+def test_local_batch_answers_land_in_the_cache(collector):
+    assert run_batch(collector, poll_interval=0.01) == 2
+
+    results = [call_llm(prompt, "mock", "Mock", Signal, agent_name="test_agent") for prompt in PROMPTS]
+
+    assert all(isinstance(result, Signal) for result in results)
+    assert all(record.cached for record in get_usage_tracker().records())
+
+
+def test_jobs_past_the_timeout_are_cancelled(collector, monkeypatch):
+    backend = StuckBackend()
+    monkeypatch.setattr(llm_batch, "get_batch_backend", lambda provider, collector: backend)
+
+    assert run_batch(collector, poll_interval=0.01, timeout=0.05) == 0
+    assert backend.cancelled == ["stuck-job"]
+
+
+def test_timeout_comes_from_the_environment(collector, monkeypatch):
+    backend = StuckBackend()
+    monkeypatch.setattr(llm_batch, "get_batch_backend", lambda provider, collector: backend)
+    monkeypatch.setenv("LLM_BATCH_TIMEOUT", "0.05")
+
+    assert run_batch(collector, poll_interval=0.01) == 0
+    assert backend.cancelled == ["stuck-job"]
+
+
+def test_job_is_abandoned_after_repeated_poll_errors(collector, monkeypatch):
+    backend = StuckBackend(error=ConnectionError("provider unreachable"))
+    monkeypatch.setattr(llm_batch, "get_batch_backend", lambda provider, collector: backend)
+
+    assert run_batch(collector, poll_interval=0.0, timeout=60) == 0
+    assert backend.polls == MAX_POLL_ERRORS
+    assert backend.cancelled == ["stuck-job"]
+
+
+def test_abandoned_prompts_run_live(collector, monkeypatch):
+    monkeypatch.setattr(llm_batch, "get_batch_backend", lambda provider, collector: StuckBackend())
+    run_batch(collector, poll_interval=0.01, timeout=0.02)
+
+    call_llm(PROMPTS[0], "mock", "Mock", Signal, agent_name="test_agent")
+
+    assert [record.cached for record in get_usage_tracker().records()] == [False]
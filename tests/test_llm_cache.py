@@ -0,0 +1,68 @@
+import pytest
+
+import utils.llm_cache as llm_cache
+from utils.llm import call_llm
+from utils.llm_cache import LLMResponseCache, get_llm_cache, make_cache_key
+from utils.llm_usage import get_usage_tracker
+
+from helpers import Signal
+
+SIGNAL = Signal(signal="bullish", confidence=70, reasoning="cached")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setenv("LLM_CACHE", "1")
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+    return cache
+
+
+def test_cache_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+
+    assert get_llm_cache() is None
+
+
+def test_key_depends_on_prompt_model_and_schema():
+    key = make_cache_key("Analyze AAPL", "mock", "Mock", Signal)
+
+    assert key == make_cache_key("Analyze AAPL", "mock", "Mock", Signal)
+    assert key != make_cache_key("Analyze MSFT", "mock", "Mock", Signal)
+    assert key != make_cache_key("Analyze AAPL", "other", "Mock", Signal)
+
+
+def test_get_returns_what_was_set_until_the_ttl(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"), ttl=60)
+    cache.set("key", "mock", SIGNAL)
+
+    assert cache.get("key", Signal) == SIGNAL
+    cache.ttl = -1
+    assert cache.get("key", Signal) is None
+
+
+def test_database_errors_are_treated_as_misses(tmp_path, capsys):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"))
+    cache._conn.close()
+
+    cache.set("key", "mock", SIGNAL)
+
+    assert cache.get("key", Signal) is None
+    assert "Error writing LLM response cache" in capsys.readouterr().out
+
+
+def test_repeated_prompt_is_answered_from_the_cache(cache):
+    first = call_llm("Analyze AAPL and give a signal", "mock", "Mock", Signal, agent_name="test_agent")
+    second = call_llm("Analyze AAPL and give a signal", "mock", "Mock", Signal, agent_name="test_agent")
+
+    assert second == first
+    assert [record.cached for record in get_usage_tracker().records()] == [False, True]
+
+
+def test_call_llm_survives_a_broken_cache(cache):
+    cache._conn.close()
+
+    result = call_llm("Analyze AAPL and give a signal", "mock", "Mock", Signal, agent_name="test_agent", max_retries=1)
+
+    assert result.reasoning != ""
+    assert [record.ok for record in get_usage_tracker().records()] == [True]
@@ -0,0 +1,68 @@
+import asyncio
+import contextvars
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import llm.models as models
+from llm.models import ModelProvider, clear_model_pool, get_model, get_structured_model
+from utils.llm import call_llm_batch
+
+from helpers import Signal
+
+
+def test_clients_and_structured_wrappers_are_pooled():
+    clear_model_pool()
+
+    client = get_model("mock", ModelProvider.MOCK)
+    structured = get_structured_model("mock", ModelProvider.MOCK, Signal, include_raw=True)
+
+    assert get_model("mock", ModelProvider.MOCK) is client
+    assert get_structured_model("mock", ModelProvider.MOCK, Signal, include_raw=True) is structured
+    assert get_structured_model("mock", ModelProvider.MOCK, Signal, include_raw=False) is not structured
+    clear_model_pool()
+    assert get_model("mock", ModelProvider.MOCK) is not client
+
+
+def _loop_bound_client():
+    """Stand-in for a pooled provider client whose async connection pool belongs to the first loop that used it."""
+    bound = []
+
+    async def ainvoke(prompt):
+        loop = asyncio.get_running_loop()
+        bound.append(bound[0] if bound else loop)
+        if loop is not bound[0]:
+            raise RuntimeError("connection pool is bound to a different event loop")
+        parsed = Signal(signal="bullish", confidence=80, reasoning="pooled")
+        return {"raw": AIMessage(content=parsed.model_dump_json()), "parsed": parsed, "parsing_error": None}
+
+    return RunnableLambda(lambda prompt: None, afunc=ainvoke)
+
+
+def test_successive_batches_reuse_pooled_async_clients(monkeypatch):
+    client = _loop_bound_client()
+    monkeypatch.setattr(models, "get_structured_model", lambda *args, **kwargs: client)
+
+    for day in range(3):
+        results = call_llm_batch(
+            [f"Analyze AAPL on day {day}", f"Analyze MSFT on day {day}"], "mock", "Mock", Signal,
+            max_retries=1, default_factory=lambda: Signal(signal="neutral", confidence=0, reasoning="default"),
+        )
+        assert [result.reasoning for result in results] == ["pooled", "pooled"]
+
+
+def test_batches_run_in_the_callers_context(monkeypatch):
+    seen = []
+    marker = contextvars.ContextVar("marker", default=None)
+
+    async def ainvoke(prompt):
+        seen.append(marker.get())
+        parsed = Signal(signal="neutral", confidence=50, reasoning="ok")
+        return {"raw": AIMessage(content=parsed.model_dump_json()), "parsed": parsed, "parsing_error": None}
+
+    monkeypatch.setattr(models, "get_structured_model", lambda *args, **kwargs: RunnableLambda(lambda prompt: None, afunc=ainvoke))
+    marker.set("caller")
+
+    call_llm_batch(["one", "two"], "mock", "Mock", Signal, max_retries=1)
+
+    assert seen == ["caller", "caller"]
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.llm_hedge import ahedged_call, get_hedge_plan, hedged_call, is_hedged
+from utils.llm_usage import get_usage_tracker
+
+
+def slow(value, seconds):
+    def call():
+        time.sleep(seconds)
+        return value
+    return call
+
+
+def failing():
+    raise RuntimeError("provider error")
+
+
+def test_hedging_is_off_unless_configured(monkeypatch):
+    assert get_hedge_plan("wsb_agent", "mock", "Mock") is None
+
+    monkeypatch.setenv("LLM_HEDGE", "wsb_agent, portfolio_management_agent")
+    assert is_hedged("portfolio_management_agent")
+    assert not is_hedged("ben_graham_agent")
+    assert get_hedge_plan("ben_graham_agent", "mock", "Mock", hedge=True) is not None
+
+
+def test_delay_follows_the_agents_latency_once_known(monkeypatch):
+    monkeypatch.setenv("LLM_HEDGE", "all")
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "7")
+
+    assert get_hedge_plan("agent", "mock", "Mock").delay == 7.0
+
+    for latency in range(1, 11):
+        get_usage_tracker().record("agent", "mock", "Mock", latency=float(latency))
+    assert get_hedge_plan("agent", "mock", "Mock").delay == 10.0
+
+
+def test_duplicate_can_go_to_another_model(monkeypatch):
+    monkeypatch.setenv("LLM_HEDGE", "all")
+    monkeypatch.setenv("LLM_HEDGE_MODEL", "gpt-4o-mini")
+
+    plan = get_hedge_plan("agent", "mock", "Mock")
+
+    assert (plan.model_name, plan.model_provider) == ("gpt-4o-mini", "OpenAI")
+
+
+def test_fast_primary_is_not_duplicated():
+    calls = []
+
+    assert hedged_call(lambda: "primary", lambda: calls.append(1), delay=1.0) == "primary"
+    assert calls == []
+
+
+def test_slow_primary_loses_to_the_duplicate():
+    assert hedged_call(slow("primary", 1.0), slow("duplicate", 0.0), delay=0.05) == "duplicate"
+
+
+def test_failed_request_falls_back_to_the_other():
+    assert hedged_call(slow("primary", 0.1), failing, delay=0.01) == "primary"
+
+    with pytest.raises(RuntimeError):
+        hedged_call(failing, failing, delay=0.01)
+
+
+def test_async_hedge_cancels_the_loser():
+    cancelled = []
+
+    async def primary():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "primary"
+
+    async def duplicate():
+        return "duplicate"
+
+    async def run():
+        result = await ahedged_call(primary, duplicate, delay=0.05)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == "duplicate"
+    assert cancelled == [True]
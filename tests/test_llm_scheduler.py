@@ -0,0 +1,60 @@
+import threading
+
+from langchain_core.messages import HumanMessage
+
+from utils.llm_scheduler import EXPECTED_OUTPUT_TOKENS, LLMScheduler, backoff_seconds, estimate_tokens, is_rate_limit_error, retry_after_seconds
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def test_estimate_tokens_counts_message_text():
+    assert estimate_tokens("x" * 400) == 100 + EXPECTED_OUTPUT_TOKENS
+    assert estimate_tokens([HumanMessage(content="x" * 400), HumanMessage(content="y" * 400)]) == 200 + EXPECTED_OUTPUT_TOKENS
+
+
+def test_rate_limit_errors_are_recognized():
+    assert is_rate_limit_error(RateLimitError("slow down"))
+    assert is_rate_limit_error(Exception("RESOURCE_EXHAUSTED: quota"))
+    assert not is_rate_limit_error(ValueError("bad request"))
+
+
+def test_retry_after_is_read_from_the_message():
+    assert retry_after_seconds(Exception("Please try again in 1.5s")) == 1.5
+    assert retry_after_seconds(Exception("try again in 2m3.5s")) == 123.5
+    assert retry_after_seconds(Exception("no hint")) is None
+
+
+def test_backoff_stays_under_the_cap():
+    assert all(0 <= backoff_seconds(attempt, cap=5.0) <= 5.0 for attempt in range(10))
+
+
+def test_call_retries_rate_limit_errors(monkeypatch):
+    monkeypatch.setattr("utils.llm_scheduler.time.sleep", lambda seconds: None)
+    scheduler = LLMScheduler()
+    attempts = []
+
+    def request():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitError("try again in 0.01s")
+        return "ok"
+
+    assert scheduler.call("Mock", request, 10) == "ok"
+    assert len(attempts) == 3
+
+
+def test_requests_within_the_quota_are_not_delayed(monkeypatch):
+    monkeypatch.setenv("LLM_RPM_MOCK", "1000")
+    scheduler = LLMScheduler()
+    sleeps = []
+    monkeypatch.setattr("utils.llm_scheduler.time.sleep", sleeps.append)
+
+    threads = [threading.Thread(target=scheduler.acquire, args=("Mock", 10)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sleeps == []
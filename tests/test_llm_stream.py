@@ -0,0 +1,74 @@
+import importlib
+import json
+import os
+import sys
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+import utils.llm_stream as llm_stream
+from utils.llm import call_llm
+from utils.llm_stream import StreamAccumulator
+from utils.progress import progress
+
+from helpers import Signal
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.updates = []
+
+    def update_status(self, agent, ticker, status):
+        pass
+
+    def stream(self, agent, ticker, text, fields=None, delta=None):
+        self.updates.append((agent, ticker, text, fields, delta))
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    handler = RecordingHandler()
+    monkeypatch.setattr(progress, "handler", handler)
+    monkeypatch.setattr(llm_stream, "STREAM_INTERVAL", 0.0)
+    return handler
+
+
+def test_updates_carry_the_text_added_since_the_last_one(handler):
+    accumulator = StreamAccumulator("agent", "AAPL")
+    for piece in ('{"signal": "bull', 'ish", "confidence": 80', "}"):
+        accumulator.add(AIMessageChunk(content=piece))
+    result = accumulator.finish()
+
+    assert result.content == '{"signal": "bullish", "confidence": 80}'
+    assert [delta for *_, delta in handler.updates] == ['{"signal": "bull', 'ish", "confidence": 80', "}"]
+    assert handler.updates[-1][3] == {"signal": "bullish", "confidence": 80}
+
+
+def test_each_response_streams_from_its_start(handler):
+    # Two calls by the same agent for the same ticker, e.g. successive round-table phases
+    first = call_llm("Analyze AAPL briefly", "mock", "Mock", Signal, agent_name="round_table", ticker="AAPL", stream=True)
+    second = call_llm("Analyze AAPL in depth", "mock", "Mock", Signal, agent_name="round_table", ticker="AAPL", stream=True)
+
+    deltas = [delta for *_, delta in handler.updates]
+    assert [Signal.model_validate_json(delta) for delta in deltas] == [first, second]
+
+
+def test_web_ui_sends_the_delta(monkeypatch):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        webui = importlib.import_module("webui")
+    finally:
+        sys.path.pop(0)
+
+    sent = []
+
+    class Client:
+        def send(self, payload):
+            sent.append(payload)
+
+    monkeypatch.setattr(webui, "websocket_clients", [Client()])
+    webui_handler = webui.WebUIProgressHandler()
+    webui_handler.stream("agent", "AAPL", "hello world", None, " world")
+    webui_handler.stream("agent", "AAPL", "again", None, "again")
+
+    assert [json.loads(payload)["delta"] for payload in sent] == [" world", "again"]
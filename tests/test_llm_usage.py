@@ -0,0 +1,78 @@
+import threading
+
+from utils.llm import call_llm_batch
+from utils.llm_usage import LLMUsageTracker, estimate_cost, get_usage_tracker, run_scope
+
+from helpers import Signal
+
+
+def test_summary_totals_by_agent_and_phase():
+    tracker = LLMUsageTracker()
+    tracker.record("warren_buffett_agent", "gpt-4o", "OpenAI", input_tokens=1000, output_tokens=100, latency=2.0)
+    tracker.record("round_table", "gpt-4o", "OpenAI", input_tokens=500, output_tokens=50, latency=1.0, phase="debate")
+    tracker.record("round_table", "gpt-4o", "OpenAI", phase="debate", cached=True)
+
+    summary = tracker.summary()
+
+    assert summary["total"]["calls"] == 3
+    assert summary["total"]["cached"] == 1
+    assert summary["total"]["input_tokens"] == 1500
+    assert summary["by_agent"]["round_table"]["calls"] == 2
+    assert summary["by_phase"]["debate"]["output_tokens"] == 50
+    assert summary["total"]["cost"] == estimate_cost("gpt-4o", 1000, 100) + estimate_cost("gpt-4o", 500, 50)
+
+
+def test_latency_percentile_skips_cached_and_failed_calls():
+    tracker = LLMUsageTracker()
+    for latency in range(1, 11):
+        tracker.record("agent", "mock", "Mock", latency=float(latency))
+    tracker.record("agent", "mock", "Mock", latency=100.0, ok=False)
+    tracker.record("agent", "mock", "Mock", latency=100.0, cached=True)
+
+    assert tracker.latency_percentile("mock") == (10.0, 10)
+    assert tracker.latency_percentile("mock", agent="other") == (0.0, 0)
+
+
+def test_history_is_saved_once(tmp_path):
+    path = str(tmp_path / "usage.jsonl")
+    tracker = LLMUsageTracker()
+    tracker.record("agent", "mock", "Mock", input_tokens=10)
+    tracker.save_history(path)
+    tracker.save_history(path)
+    tracker.record("agent", "mock", "Mock", input_tokens=20)
+
+    assert [r.input_tokens for r in tracker.history(path)] == [10, 20]
+    assert [r.input_tokens for r in LLMUsageTracker().history(path)] == [10]
+
+
+def test_run_scope_tags_records_with_the_job():
+    tracker = LLMUsageTracker()
+    tracker.record("agent", "mock", "Mock", input_tokens=5)
+    with run_scope() as first:
+        tracker.record("agent", "mock", "Mock", input_tokens=10)
+    with run_scope("second"):
+        tracker.record("agent", "mock", "Mock", input_tokens=20)
+
+    assert [r.input_tokens for r in tracker.records(first)] == [10]
+    assert tracker.summary("second")["total"]["input_tokens"] == 20
+    assert tracker.summary()["total"]["input_tokens"] == 35
+
+
+def test_concurrent_jobs_report_only_their_own_calls():
+    prompts = {job: [f"Analyze {ticker} for {job}" for ticker in ("AAPL", "MSFT")] for job in ("job-a", "job-b")}
+
+    def run(job):
+        with run_scope(job):
+            call_llm_batch(prompts[job], "mock", "Mock", Signal, agent_name="test_agent")
+
+    threads = [threading.Thread(target=run, args=(job,)) for job in prompts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    tracker = get_usage_tracker()
+    assert len(tracker.records()) == 4
+    assert all(len(tracker.records(job)) == 2 for job in prompts)
+    # Samples other calls rely on (hedge delay, routing health) are kept across jobs
+    assert tracker.latency_percentile("mock")[1] == 4
@@ -0,0 +1,67 @@
+from typing import Literal, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+import llm.mock as mock
+from llm.mock import MockChatModel, mock_output, prompt_tickers
+from llm.models import ModelProvider, get_model
+
+
+class Signal(BaseModel):
+    signal: Literal["bullish", "bearish", "neutral"]
+    confidence: float
+    reasoning: str
+    tags: list[str]
+    target: Optional[int] = None
+
+
+class Portfolio(BaseModel):
+    decisions: dict[str, Signal]
+
+
+def test_registered_as_a_provider():
+    assert isinstance(get_model("mock", ModelProvider.MOCK), MockChatModel)
+
+
+def test_same_prompt_gives_the_same_answer():
+    model = MockChatModel().with_structured_output(Signal)
+
+    assert model.invoke("Analyze AAPL") == model.invoke("Analyze AAPL")
+    assert MockChatModel().invoke("hello").content == MockChatModel().invoke("hello").content
+
+
+def test_output_is_schema_valid():
+    for seed in range(50):
+        signal = mock_output(Signal, seed)
+        assert signal.signal in ("bullish", "bearish", "neutral")
+        assert 0 <= signal.confidence <= 100
+        assert len(signal.tags) == 2
+
+
+def test_ticker_maps_cover_the_prompt_tickers():
+    prompt = 'Decide for these tickers: {"AAPL":{"price":1},"BRK.B":{"price":2},"BTC-USD":0.5}'
+
+    assert prompt_tickers(prompt) == ["AAPL", "BRK.B", "BTC-USD"]
+    assert list(MockChatModel().with_structured_output(Portfolio).invoke(prompt).decisions) == ["AAPL", "BRK.B", "BTC-USD"]
+
+
+def test_usage_is_reported_like_a_provider(monkeypatch):
+    monkeypatch.setenv("MOCK_LLM_OUTPUT_TOKENS", "123")
+
+    message = MockChatModel().invoke("x" * 400)
+
+    assert message.usage_metadata["input_tokens"] == 100
+    assert message.usage_metadata["output_tokens"] == 123
+
+
+def test_marked_prefix_is_read_from_cache_on_the_second_call(monkeypatch):
+    monkeypatch.setattr(mock, "_prefix_cache", set())
+    system = SystemMessage(content=[{"type": "text", "text": "s" * 4000, "cache_control": {"type": "ephemeral"}}])
+    model = MockChatModel()
+
+    first = model.invoke([system, HumanMessage(content="AAPL")]).usage_metadata
+    second = model.invoke([system, HumanMessage(content="MSFT")]).usage_metadata
+
+    assert first["input_token_details"] == {"cache_read": 0, "cache_creation": 1000}
+    assert second["input_token_details"] == {"cache_read": 1000, "cache_creation": 0}
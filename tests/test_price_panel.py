@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+
+from data.models import Price
+from data.price_panel import PANEL_FIELDS, PricePanel, export_price_panel, get_price_panel, set_price_panel
+
+
+def _prices(closes, start_day=2):
+    return [Price(open=c, close=c, high=c + 1, low=c - 1, volume=100, time=f"2024-01-{start_day + i:02d}") for i, c in enumerate(closes)]
+
+
+def test_from_prices_aligns_tickers_on_the_union_of_dates():
+    panel = PricePanel.from_prices({"AAPL": _prices([1.0, 2.0, 3.0]), "BTC": _prices([10.0, 11.0], start_day=3)})
+
+    assert panel.tickers == ["AAPL", "BTC"]
+    assert len(panel.dates) == 3
+    assert np.isnan(panel.values[0, 1, PANEL_FIELDS.index("close")])
+
+
+def test_to_df_drops_days_the_ticker_did_not_trade():
+    panel = PricePanel.from_prices({"AAPL": _prices([1.0, 2.0, 3.0]), "BTC": _prices([10.0, 11.0], start_day=3)})
+
+    df = panel.to_df("BTC", "2024-01-01", "2024-01-31")
+
+    assert list(df["close"]) == [10.0, 11.0]
+    assert list(df.columns) == list(PANEL_FIELDS)
+
+
+def test_saved_panel_is_a_read_only_memory_map(tmp_path):
+    panel = PricePanel.from_prices({"AAPL": _prices([1.0, 2.0, 3.0])}, start_date="2024-01-01", end_date="2024-01-31")
+
+    attached = panel.save(str(tmp_path / "panel"))
+
+    assert isinstance(attached.values, np.memmap)
+    assert not attached.values.flags.writeable
+    assert attached.covers("AAPL", "2024-01-02", "2024-01-31")
+    assert not attached.covers("AAPL", "2023-12-01", "2024-01-31")
+    dates, values = attached.slice("AAPL", "2024-01-03", "2024-01-04")
+    assert list(values[:, PANEL_FIELDS.index("close")]) == [2.0, 3.0]
+
+
+def test_export_points_child_processes_at_the_panel(tmp_path, monkeypatch):
+    monkeypatch.delenv("PRICE_PANEL_PATH", raising=False)
+    path = str(tmp_path / "panel")
+    try:
+        export_price_panel(PricePanel.from_prices({"AAPL": _prices([1.0])}), path)
+
+        assert get_price_panel().path == path
+        assert os.environ["PRICE_PANEL_PATH"] == path
+    finally:
+        set_price_panel(None)
@@ -0,0 +1,68 @@
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+import llm.mock as mock
+from utils.llm import call_llm
+from utils.llm_usage import estimate_cost, get_usage_tracker
+from utils.prompt_cache import get_cache_read_tokens, mark_static_prefix
+
+from helpers import Signal
+
+STATIC = "You are Warren Buffett. " * 200
+
+
+@pytest.fixture(autouse=True)
+def empty_prefix_cache(monkeypatch):
+    monkeypatch.setattr(mock, "_prefix_cache", set())
+
+
+def test_last_system_message_is_marked():
+    prompt = [SystemMessage(content="Rules"), SystemMessage(content=STATIC), HumanMessage(content="AAPL data")]
+
+    marked = mark_static_prefix(prompt, "Anthropic")
+
+    assert marked[0] == prompt[0]
+    assert marked[1].content == [{"type": "text", "text": STATIC, "cache_control": {"type": "ephemeral"}}]
+    assert marked[2] == prompt[2]
+
+
+def test_prompts_are_left_alone_when_they_cannot_be_cached(monkeypatch):
+    prompt = [SystemMessage(content=STATIC), HumanMessage(content="AAPL data")]
+
+    assert mark_static_prefix(prompt, "OpenAI") is prompt
+    assert mark_static_prefix([HumanMessage(content="AAPL data")], "Anthropic") == [HumanMessage(content="AAPL data")]
+    monkeypatch.setenv("LLM_PROMPT_CACHE", "0")
+    assert mark_static_prefix(prompt, "Anthropic") is prompt
+
+
+def test_templates_are_marked_through_their_messages():
+    template = ChatPromptTemplate.from_messages([("system", STATIC), ("human", "{ticker}")])
+
+    marked = mark_static_prefix(template.invoke({"ticker": "AAPL"}), "Anthropic")
+
+    assert marked[0].content[0]["cache_control"] == {"type": "ephemeral"}
+    assert marked[1].content == "AAPL"
+
+
+def test_cached_prefix_tokens_are_recorded_and_billed_at_the_read_price():
+    template = ChatPromptTemplate.from_messages([("system", STATIC), ("human", "Analyze {ticker}")])
+    for ticker in ("AAPL", "MSFT"):
+        call_llm(template.invoke({"ticker": ticker}), "mock", "Mock", Signal, agent_name="warren_buffett_agent", ticker=ticker)
+
+    first, second = get_usage_tracker().records()
+    assert first.cache_read_tokens == 0
+    assert second.cache_read_tokens == len(STATIC) // 4
+    assert get_usage_tracker().summary()["total"]["cache_read_tokens"] == len(STATIC) // 4
+
+
+def test_cache_reads_lower_the_cost():
+    assert estimate_cost("claude-3-5-haiku-latest", 10_000, 0, cache_read_tokens=8_000) < estimate_cost("claude-3-5-haiku-latest", 10_000, 0)
+
+
+def test_cache_read_tokens_come_from_usage_metadata():
+    class Message:
+        usage_metadata = {"input_tokens": 100, "input_token_details": {"cache_read": 60}}
+
+    assert get_cache_read_tokens(Message()) == 60
+    assert get_cache_read_tokens(object()) == 0
@@ -0,0 +1,47 @@
+import json
+
+from utils.prompt_compaction import compact_json, compact_ticker_data, count_tokens, get_prompt_token_budget, round_number
+
+
+def test_numbers_are_rounded_to_useful_precision():
+    assert round_number(123456.789) == 123457
+    assert round_number(12.34567) == 12.35
+    assert round_number(0.000123456) == 0.0001235
+    assert round_number(float("nan")) is None
+
+
+def test_empty_and_low_value_fields_are_dropped():
+    data = {"score": 7.123456, "url": "https://example.com", "notes": None, "details": "ok"}
+
+    assert json.loads(compact_json(data)) == {"score": 7.12, "details": "ok"}
+
+
+def test_payload_is_tightened_until_it_fits_the_budget():
+    data = {"prices": [float(i) for i in range(500)], "news": ["headline " * 50] * 20}
+    text = compact_json(data, budget=200)
+
+    assert count_tokens(text) <= 200
+    compacted = json.loads(text)
+    assert compacted["prices"] == {"count": 500, "min": 0, "max": 499, "mean": 249.5}
+    assert len(compacted["news"]) < 20 and compacted["news"][-1].endswith(" more")
+
+
+def test_data_within_the_budget_keeps_every_item():
+    data = {"prices": [1.0, 2.0, 3.0]}
+
+    assert json.loads(compact_json(data, budget=100)) == data
+
+
+def test_ticker_budget_scales_with_the_number_of_tickers(monkeypatch):
+    monkeypatch.setenv("LLM_PROMPT_TOKEN_BUDGET", "100")
+    data = {ticker: {"series": [float(i) for i in range(60)]} for ticker in ("AAPL", "MSFT")}
+
+    assert get_prompt_token_budget() == 100
+    assert count_tokens(compact_ticker_data(data)) <= 200
+    assert json.loads(compact_ticker_data(data, budget=0)) == data
+
+
+def test_invalid_budget_falls_back_to_the_default(monkeypatch):
+    monkeypatch.setenv("LLM_PROMPT_TOKEN_BUDGET", "lots")
+
+    assert get_prompt_token_budget() == 1500
@@ -0,0 +1,62 @@
+import importlib
+
+import pytest
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+from round_table.engine import INITIAL_POSITION_TEMPLATE, text_prompt
+
+PERSONA_TEMPLATES = [
+    ("agents.ben_graham", "BEN_GRAHAM_TEMPLATE"),
+    ("agents.bill_ackman", "BILL_ACKMAN_TEMPLATE"),
+    ("agents.cathie_wood", "CATHIE_WOOD_TEMPLATE"),
+    ("agents.charlie_munger", "CHARLIE_MUNGER_TEMPLATE"),
+    ("agents.nancy_pelosi", "NANCY_PELOSI_TEMPLATE"),
+    ("agents.warren_buffett", "WARREN_BUFFETT_TEMPLATE"),
+    ("agents.wsb_agent", "WSB_TEMPLATE"),
+]
+
+
+@pytest.mark.parametrize("module, name", PERSONA_TEMPLATES)
+def test_persona_templates_are_built_once(module, name):
+    template = getattr(importlib.import_module(module), name)
+
+    assert isinstance(template, ChatPromptTemplate)
+    assert set(template.input_variables) == {"analysis_data", "ticker"}
+
+
+@pytest.mark.parametrize("module, name", PERSONA_TEMPLATES)
+def test_persona_prompts_start_with_a_static_system_message(module, name):
+    template = getattr(importlib.import_module(module), name)
+    first = template.invoke({"analysis_data": '{"AAPL":{"score":1}}', "ticker": "AAPL"}).to_messages()
+    second = template.invoke({"analysis_data": '{"MSFT":{"score":9}}', "ticker": "MSFT"}).to_messages()
+
+    assert isinstance(first[0], SystemMessage)
+    assert first[0] == second[0]
+
+
+def test_variable_values_with_braces_are_not_parsed():
+    prompt = INITIAL_POSITION_TEMPLATE.invoke({
+        "analyst_name": "Warren Buffett",
+        "analyst_style": "value",
+        "ticker": "AAPL",
+        "signal": "bullish",
+        "confidence": 80,
+        "reasoning": 'moat score {"moat": 9}',
+    })
+
+    assert 'moat score {"moat": 9}' in prompt.to_string()
+
+
+def test_text_prompts_keep_transcript_braces():
+    text = 'Moderator: the data was {"pe": 12} and {unknown}'
+
+    assert text_prompt(text).to_messages()[0].content == text
+
+
+def test_portfolio_and_round_table_templates_are_module_constants():
+    from agents.portfolio_manager import PORTFOLIO_MANAGER_TEMPLATE
+    from agents.round_table import ROUND_TABLE_TEMPLATE
+
+    assert "signals_by_ticker" in PORTFOLIO_MANAGER_TEMPLATE.input_variables
+    assert set(ROUND_TABLE_TEMPLATE.input_variables) == {"ticker_signals", "ticker"}
@@ -0,0 +1,47 @@
+from data.models import Price
+from data.replay import recordable
+
+
+def _make_fetch(calls):
+    @recordable(Price, default=list)
+    def fetch_prices(ticker: str, end_date: str, limit: int = 10) -> list[Price]:
+        calls.append(ticker)
+        return [Price(open=1.0, close=2.0, high=3.0, low=0.5, volume=10, time=end_date)]
+
+    return fetch_prices
+
+
+def test_recorded_calls_replay_without_calling_the_provider(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_REPLAY_DIR", str(tmp_path / "fixtures"))
+    calls = []
+    fetch_prices = _make_fetch(calls)
+
+    monkeypatch.setenv("DATA_REPLAY_MODE", "record")
+    recorded = fetch_prices("AAPL", "2024-01-02")
+    monkeypatch.setenv("DATA_REPLAY_MODE", "replay")
+    # Keyword and default arguments map to the same fixture as the recorded call
+    replayed = fetch_prices(ticker="AAPL", end_date="2024-01-02", limit=10)
+
+    assert calls == ["AAPL"]
+    assert replayed == recorded
+    assert isinstance(replayed[0], Price)
+
+
+def test_replay_without_a_fixture_returns_the_default(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_REPLAY_DIR", str(tmp_path / "fixtures"))
+    monkeypatch.setenv("DATA_REPLAY_MODE", "replay")
+    calls = []
+
+    assert _make_fetch(calls)("MSFT", "2024-01-02") == []
+    assert calls == []
+
+
+def test_calls_pass_through_when_replay_is_off(monkeypatch):
+    monkeypatch.delenv("DATA_REPLAY_MODE", raising=False)
+    calls = []
+    fetch_prices = _make_fetch(calls)
+
+    fetch_prices("AAPL", "2024-01-02")
+    fetch_prices("AAPL", "2024-01-02")
+
+    assert calls == ["AAPL", "AAPL"]
@@ -0,0 +1,39 @@
+import round_table.engine as engine
+from utils.llm_usage import get_usage_tracker
+
+SIGNALS = {
+    "warren_buffett_agent": {"signal": "bullish", "confidence": 80, "reasoning": "Durable moat and fair price"},
+    "cathie_wood_agent": {"signal": "bullish", "confidence": 70, "reasoning": "Innovation tailwinds"},
+    "ben_graham_agent": {"signal": "bearish", "confidence": 60, "reasoning": "No margin of safety"},
+}
+KEYS = {"signal", "confidence", "reasoning", "discussion_summary", "consensus_view", "dissenting_opinions"}
+
+
+def test_final_analysis_goes_through_call_llm():
+    analysis = engine.generate_final_analysis("NVDA", "Moderator: Welcome.", SIGNALS, "mock", "Mock")
+
+    assert set(analysis) == KEYS
+    assert analysis["signal"] in ("bullish", "bearish", "neutral")
+    records = get_usage_tracker().records()
+    assert [(r.agent, r.phase, r.ticker) for r in records] == [("round_table", "final_analysis", "NVDA")]
+
+
+def test_final_analysis_falls_back_to_the_signals_on_error(monkeypatch):
+    def failing_call_llm(**kwargs):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(engine, "call_llm", failing_call_llm)
+
+    assert engine.generate_final_analysis("NVDA", "", SIGNALS, "mock", "Mock") == engine.generate_fallback_analysis(SIGNALS)
+
+
+def test_final_analysis_default_is_the_signal_fallback(monkeypatch):
+    def default_call_llm(**kwargs):
+        return kwargs["default_factory"]()
+
+    monkeypatch.setattr(engine, "call_llm", default_call_llm)
+
+    analysis = engine.generate_final_analysis("NVDA", "", SIGNALS, "mock", "Mock")
+
+    assert analysis == engine.generate_fallback_analysis(SIGNALS)
+    assert analysis["signal"] == "bullish"
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from llm.routing import RoutingConfig, RoutingPolicy, load_routing_config, route_model, set_routing_config
+from utils.llm_usage import get_usage_tracker
+
+
+@pytest.fixture(autouse=True)
+def reset_routing():
+    yield
+    set_routing_config(None)
+
+
+def test_no_routing_file_keeps_the_run_model():
+    assert route_model("wsb_agent", "gpt-4o", "OpenAI") == ("gpt-4o", "OpenAI")
+
+
+def test_agent_and_phase_policies_override_the_run_model():
+    set_routing_config(RoutingConfig(agents={
+        "wsb_agent": RoutingPolicy(model="mock"),
+        "round_table:debate": RoutingPolicy(model="gpt-4o-mini"),
+        "round_table": RoutingPolicy(model="custom", provider="Custom"),
+    }))
+
+    assert route_model("wsb_agent", "gpt-4o", "OpenAI") == ("mock", "Mock")
+    assert route_model("round_table", "gpt-4o", "OpenAI", "debate") == ("gpt-4o-mini", "OpenAI")
+    assert route_model("round_table", "gpt-4o", "OpenAI", "synthesis") == ("custom", "Custom")
+    assert route_model("ben_graham_agent", "gpt-4o", "OpenAI") == ("gpt-4o", "OpenAI")
+
+
+def test_unhealthy_model_falls_back():
+    set_routing_config(RoutingConfig(fallbacks={"gpt-4o": "mock"}, max_latency=10, min_samples=3))
+    tracker = get_usage_tracker()
+    for _ in range(3):
+        tracker.record("agent", "gpt-4o", "OpenAI", latency=5.0)
+
+    assert route_model("agent", "gpt-4o", "OpenAI") == ("gpt-4o", "OpenAI")
+
+    for _ in range(3):
+        tracker.record("agent", "gpt-4o", "OpenAI", latency=30.0)
+
+    assert route_model("agent", "gpt-4o", "OpenAI") == ("mock", "Mock")
+
+
+def test_failing_model_falls_back():
+    set_routing_config(RoutingConfig(fallbacks={"gpt-4o": "mock"}, max_error_rate=0.3, min_samples=3))
+    for ok in (True, False, False):
+        get_usage_tracker().record("agent", "gpt-4o", "OpenAI", ok=ok)
+
+    assert route_model("agent", "gpt-4o", "OpenAI") == ("mock", "Mock")
+
+
+def test_routing_file_is_read_and_invalid_files_are_ignored(tmp_path):
+    path = tmp_path / "routing.json"
+    path.write_text(json.dumps({"agents": {"wsb_agent": {"model": "mock"}}}))
+
+    assert load_routing_config(str(path)).agents["wsb_agent"].model == "mock"
+
+    path.write_text("{not json")
+    assert load_routing_config(str(path)) == RoutingConfig()
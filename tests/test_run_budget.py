@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.llm import abatch, call_llm
+from utils.run_budget import BudgetExceeded, RunBudget, budget_scope
+
+from helpers import Signal
+
+
+def test_no_budget_without_limits(monkeypatch):
+    for name in ("LLM_RUN_MAX_CONCURRENT", "LLM_RUN_MAX_TOKENS", "LLM_RUN_MAX_COST"):
+        monkeypatch.delenv(name, raising=False)
+
+    assert RunBudget.from_env() is None
+
+    monkeypatch.setenv("LLM_RUN_MAX_TOKENS", "1000")
+    assert RunBudget.from_env().max_tokens == 1000
+    assert RunBudget.from_env(max_tokens=50).max_tokens == 50
+
+
+def test_check_raises_once_the_budget_is_used_up():
+    budget = RunBudget(max_tokens=100, max_cost=1.0)
+    budget.check(50)
+    budget.charge(80, 0.1)
+
+    with pytest.raises(BudgetExceeded):
+        budget.check(50)
+    budget.charge(0, 1.0)
+    with pytest.raises(BudgetExceeded):
+        budget.check()
+
+
+def test_exhaustion_is_reported_once(capsys):
+    budget = RunBudget(max_tokens=10)
+    budget.charge(20, 0.0)
+
+    def check():
+        with pytest.raises(BudgetExceeded):
+            budget.check()
+
+    threads = [threading.Thread(target=check) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert capsys.readouterr().out.count("LLM budget exhausted") == 1
+
+
+def test_calls_past_the_budget_return_defaults():
+    budget = RunBudget(max_tokens=10)
+    with budget_scope(budget):
+        result = call_llm("Analyze AAPL", "mock", "Mock", Signal, default_factory=lambda: Signal(signal="neutral", confidence=0, reasoning="over budget"))
+
+    assert result.reasoning == "over budget"
+
+
+def test_async_slots_cap_concurrency():
+    budget = RunBudget(max_concurrent=2)
+    in_flight, peak = 0, 0
+
+    async def call():
+        nonlocal in_flight, peak
+        async with budget.aslot():
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def run():
+        await asyncio.gather(*(call() for _ in range(10)))
+
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_async_callers_wait_for_slots_held_by_threads():
+    budget = RunBudget(max_concurrent=1)
+    order = []
+
+    def hold():
+        with budget.slot():
+            order.append("thread")
+            time.sleep(0.1)
+
+    async def run():
+        async with budget.aslot():
+            order.append("async")
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    time.sleep(0.02)
+    asyncio.run(run())
+    thread.join()
+
+    assert order == ["thread", "async"]
+
+
+def test_cancelled_waiter_does_not_keep_a_slot():
+    budget = RunBudget(max_concurrent=1)
+    release = threading.Event()
+
+    def hold():
+        with budget.slot():
+            release.wait()
+
+    async def run():
+        waiter = asyncio.ensure_future(budget.aslot().__aenter__())
+        await asyncio.sleep(0.02)
+        waiter.cancel()
+        release.set()
+        await asyncio.sleep(0.05)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    time.sleep(0.02)
+    asyncio.run(run())
+    thread.join()
+
+    assert budget._slots.acquire(timeout=1)
+
+
+def test_budget_applies_to_batched_calls():
+    budget = RunBudget(max_concurrent=1, max_tokens=100_000)
+    prompts = [f"Analyze {ticker}" for ticker in ("AAPL", "MSFT", "NVDA")]
+
+    with budget_scope(budget):
+        results = asyncio.run(abatch(prompts, "mock", "Mock", Signal))
+
+    assert len(results) == 3
+    assert budget.tokens > 0
@@ -0,0 +1,63 @@
+import pytest
+
+from utils.llm_usage import get_usage_tracker
+from utils.run_estimate import DEFAULT_LATENCY, estimate_backtest, estimate_run, max_tickers_within
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "TSLA"]
+ANALYSTS = ["ben_graham", "warren_buffett", "cathie_wood"]
+
+
+@pytest.fixture(autouse=True)
+def mock_concurrency(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY_MOCK", "2")
+    monkeypatch.delenv("LLM_TICKER_BATCH_SIZE", raising=False)
+
+
+def test_calls_and_tokens_per_agent():
+    estimate = estimate_run(TICKERS, ANALYSTS + ["technical_analyst"], "mock", "Mock")
+
+    assert set(estimate.by_agent) == {"ben_graham_agent", "warren_buffett_agent", "cathie_wood_agent", "portfolio_management_agent"}
+    assert estimate.by_agent["ben_graham_agent"].llm_calls == 4
+    assert estimate.llm_calls == 13
+    assert all(agent.samples == 0 for agent in estimate.by_agent.values())
+
+
+def test_persona_agents_share_the_provider_concurrency():
+    estimate = estimate_run(TICKERS, ANALYSTS, "mock", "Mock")
+
+    # Alone, each agent needs two rounds of two requests
+    assert estimate.by_agent["ben_graham_agent"].day_wall_time == 2 * DEFAULT_LATENCY
+    # Together, their 12 requests go through the provider's 2 slots, then the portfolio manager decides
+    assert estimate.day_wall_time == 12 / 2 * DEFAULT_LATENCY + DEFAULT_LATENCY
+
+
+def test_run_concurrency_cap_applies_across_agents():
+    estimate = estimate_run(TICKERS, ANALYSTS, "mock", "Mock", max_concurrent=1)
+
+    assert estimate.day_wall_time == 12 * DEFAULT_LATENCY + DEFAULT_LATENCY
+
+
+def test_history_drives_latency():
+    tracker = get_usage_tracker()
+    for _ in range(3):
+        tracker.record("ben_graham_agent", "mock", "Mock", input_tokens=1000, output_tokens=100, latency=2.0, ticker="AAPL")
+
+    estimate = estimate_run(TICKERS, ["ben_graham"], "mock", "Mock")
+    agent = estimate.by_agent["ben_graham_agent"]
+
+    assert agent.samples == 3
+    assert agent.input_tokens == 4000
+    assert agent.day_wall_time == 2 * 2.0
+
+
+def test_backtest_repeats_each_business_day():
+    estimate = estimate_backtest(TICKERS, ANALYSTS, "mock", "Mock", "2024-01-01", "2024-01-05")
+
+    assert estimate.trading_days == 5
+    assert estimate.wall_time == 5 * estimate.day_wall_time
+
+
+def test_max_tickers_within_a_deadline():
+    assert max_tickers_within(1000, TICKERS, ANALYSTS, "mock", "Mock") == 4
+    assert max_tickers_within(3 * DEFAULT_LATENCY + DEFAULT_LATENCY, TICKERS, ANALYSTS, "mock", "Mock") == 2
+    assert max_tickers_within(1, TICKERS, ANALYSTS, "mock", "Mock") == 0
@@ -0,0 +1,68 @@
+import json
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from pydantic import BaseModel
+
+import utils.serialization as serialization
+from utils.serialization import dumps, loads
+
+
+class Signal(BaseModel):
+    signal: str
+    confidence: float
+
+
+class Holder:
+    def __init__(self):
+        self.shares = 10
+
+
+VALUE = {
+    "signal": Signal(signal="bullish", confidence=80.0),
+    "prices": np.array([1.5, 2.5]),
+    "volume": np.int64(1000),
+    "series": pd.Series({"a": 1, "b": 2}),
+    "date": date(2024, 1, 2),
+    "time": datetime(2024, 1, 2, 9, 30),
+    "holder": Holder(),
+    1: "integer key",
+}
+EXPECTED = {
+    "signal": {"signal": "bullish", "confidence": 80.0},
+    "prices": [1.5, 2.5],
+    "volume": 1000,
+    "series": {"a": 1, "b": 2},
+    "date": "2024-01-02",
+    "time": "2024-01-02T09:30:00",
+    "holder": {"shares": 10},
+    "1": "integer key",
+}
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+def test_values_without_native_support_are_converted(encoder):
+    assert loads(dumps(VALUE)) == EXPECTED
+
+
+def test_indent_pretty_prints(encoder):
+    assert dumps({"a": [1]}, indent=True) == json.dumps({"a": [1]}, indent=2)
+
+
+def test_integers_beyond_64_bits_fall_back_to_the_stdlib(encoder):
+    assert loads(dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+
+
+def test_invalid_json_raises_a_decode_error(encoder):
+    with pytest.raises(json.JSONDecodeError):
+        loads("{not json")
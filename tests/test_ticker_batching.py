@@ -0,0 +1,51 @@
+from langchain_core.prompts import ChatPromptTemplate
+
+import llm.mock as mock
+from utils.llm import call_llm_for_tickers
+from utils.llm_usage import get_usage_tracker
+
+from helpers import Signal
+
+TEMPLATE = ChatPromptTemplate.from_messages([
+    ("system", "You are a value investor. Return JSON with signal, confidence and reasoning."),
+    ("human", "Analysis data for {ticker}:\n{analysis_data}"),
+])
+TICKERS = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"]
+ANALYSIS = {ticker: {"signal": "neutral", "score": 5, "max_score": 10} for ticker in TICKERS}
+
+
+def call(batch_size):
+    return call_llm_for_tickers(TEMPLATE, TICKERS, ANALYSIS, "mock", "Mock", Signal, agent_name="test_agent", batch_size=batch_size)
+
+
+def test_each_ticker_gets_its_own_request_by_default():
+    signals = call(1)
+
+    assert list(signals) == TICKERS
+    assert sorted(r.ticker for r in get_usage_tracker().records()) == sorted(TICKERS)
+
+
+def test_batched_requests_cover_several_tickers():
+    signals = call(2)
+
+    assert list(signals) == TICKERS
+    assert all(isinstance(signal, Signal) for signal in signals.values())
+    assert sorted(r.ticker for r in get_usage_tracker().records()) == ["AAPL,MSFT", "AMZN", "NVDA,TSLA"]
+
+
+def test_batch_size_comes_from_the_environment(monkeypatch):
+    monkeypatch.setenv("LLM_TICKER_BATCH_SIZE", "5")
+
+    call(None)
+
+    assert [r.ticker for r in get_usage_tracker().records()] == [",".join(TICKERS)]
+
+
+def test_tickers_missing_from_a_batched_response_are_retried_alone(monkeypatch):
+    # The model only answers for the first ticker of each prompt
+    monkeypatch.setattr(mock, "prompt_tickers", lambda text: mock._TICKER_KEY.findall(text)[:1])
+
+    signals = call(5)
+
+    assert list(signals) == TICKERS
+    assert sorted(r.ticker for r in get_usage_tracker().records()) == sorted([",".join(TICKERS)] + TICKERS[1:])
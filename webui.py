@@ -38,6 +38,8 @@ import io
 import sys
 import traceback
 
+from utils.serialization import dumps
+
 # Then move the VerboseLogger class near the top of the file,
 # right after your imports and before functions that use it
 # (around line 40 after the imports and before start_api_server)
@@ -47,18 +49,16 @@ websocket_clients = []
 
 def broadcast_log(message, level="info"):
     # Send to WebSocket clients
-    log_data = {"level": level, "message": message}
+    # Serialize once for all clients
+    payload = dumps({"level": level, "message": message})
     for client in websocket_clients[:]:
         try:
-            client.send(json.dumps(log_data))
+            client.send(payload)
         except Exception:
             websocket_clients.remove(client)
 
 # Create a custom progress handler that forwards to websocket
 class WebUIProgressHandler:
-    def __init__(self):
-        pass
-        
     def update_status(self, agent, ticker, status):
         # Format the status message
         if ticker:
@@ -69,6 +69,27 @@ class WebUIProgressHandler:
         # Broadcast to all websocket clients
         broadcast_log(message, "info")
         
+    def stream(self, agent, ticker, text, fields=None, delta=None):
+        # Send only the text generated since this response's last update, plus the fields parsed so far
+        if delta is None:
+            delta = text
+        preview = text[-120:].replace("\n", " ")
+        event = {
+            "type": "stream",
+            "level": "info",
+            "agent": agent,
+            "ticker": ticker,
+            "delta": delta,
+            "fields": fields,
+            "message": f"[{agent}] {ticker}: {preview}" if ticker else f"[{agent}] {preview}",
+        }
+        payload = dumps(event)
+        for client in websocket_clients[:]:
+            try:
+                client.send(payload)
+            except Exception:
+                websocket_clients.remove(client)
+
     def start(self):
         broadcast_log("Starting analysis process", "info")
         
@@ -158,7 +179,7 @@ def copy_env_file():
         print("Warning: .env file not found in project root")
 
 # API server implementation
-def start_api_server(host=DEFAULT_HOST, port=API_PORT):
+def start_api_server(host=DEFAULT_HOST, port=API_PORT, stream=False):
     # Try importing the main hedge fund modules
     try:
         from src.main import run_hedge_fund
@@ -205,6 +226,10 @@ def start_api_server(host=DEFAULT_HOST, port=API_PORT):
     # Replace the default progress handler with our web UI version
     from utils.progress import progress
     progress.handler = WebUIProgressHandler()
+    # Stream LLM output to the console while it is generated (--stream, or LLM_STREAM=1)
+    if stream:
+        from utils.llm_stream import LLM_STREAM_ENV
+        os.environ[LLM_STREAM_ENV] = "1"
 
     # API endpoints
     @app.route('/api/models', methods=['GET'])
@@ -237,20 +262,44 @@ def start_api_server(host=DEFAULT_HOST, port=API_PORT):
             print(f"Selected analysts: {selected_analysts}")
             print(f"Using model: {model_name}")
             
+            # Reject jobs expected to overrun the caller's wall-time limit, with a ticker count that fits
+            if data.get('maxWallTime'):
+                from utils.run_estimate import estimate_run, max_tickers_within
+                model_info = get_model_info(model_name)
+                model_provider = model_info.provider.value if model_info else "Unknown"
+                # Same settings as the run itself: its LLM concurrency cap and, when asked for, the round table
+                estimate_options = {"round_table": data.get('roundTable', False), "max_concurrent": data.get('maxConcurrentLlm')}
+                estimate = estimate_run(ticker_list, selected_analysts, model_name, model_provider, **estimate_options)
+                if not estimate.fits(float(data['maxWallTime'])):
+                    return jsonify({
+                        "error": f"Expected to take {estimate.wall_time:.0f}s, over the {float(data['maxWallTime']):.0f}s limit",
+                        "estimate": estimate.model_dump(),
+                        "maxTickers": max_tickers_within(float(data['maxWallTime']), ticker_list, selected_analysts, model_name, model_provider, **estimate_options),
+                    }), 422
+
             # Try to run the web-specific analysis function
             try:
-                result = run_hedge_fund_for_web(
-                    tickers=ticker_list,
-                    selected_analysts=selected_analysts,
-                    model_name=model_name,
-                    start_date=data.get('startDate') or None,
-                    end_date=data.get('endDate') or None,
-                    initial_cash=data.get('initialCash', 100000),
-                    is_crypto=data.get('isCrypto', False)
-                )
+                # Optional end-to-end deadline in seconds; slower calls fall back to defaults
+                from utils.deadline import deadline_scope
+                # Optional per-request LLM budget, defaulting to the LLM_RUN_* settings
+                from utils.run_budget import RunBudget, budget_scope
+                # LLM calls are tagged with this job's id, for /api/usage?runId=...
+                from utils.llm_usage import get_usage_tracker, run_scope
+                budget = RunBudget.from_env(data.get('maxConcurrentLlm'), data.get('maxTokens'), data.get('maxCost'))
+                with deadline_scope(data.get('deadline')), budget_scope(budget), run_scope() as run_id:
+                    result = run_hedge_fund_for_web(
+                        tickers=ticker_list,
+                        selected_analysts=selected_analysts,
+                        model_name=model_name,
+                        start_date=data.get('startDate') or None,
+                        end_date=data.get('endDate') or None,
+                        initial_cash=data.get('initialCash', 100000),
+                        is_crypto=data.get('isCrypto', False)
+                    )
                 
                 print("Analysis completed successfully")
-                return jsonify(result)
+                get_usage_tracker().save_history()
+                return jsonify({**result, "runId": run_id})
                 
             except Exception as e:
                 # If real analysis fails, fall back to simulated results
@@ -345,20 +394,53 @@ def start_api_server(host=DEFAULT_HOST, port=API_PORT):
                 is_crypto=is_crypto
             )
             
-            performance_metrics = backtester.run_backtest()
+            # LLM calls are tagged with this job's id, for /api/usage?runId=...
+            from utils.llm_usage import get_usage_tracker, run_scope
+            with run_scope() as run_id:
+                performance_metrics = backtester.run_backtest()
             performance_df = backtester.analyze_performance()
+            get_usage_tracker().save_history()
             
             # Convert dataframe to dict for JSON serialization
             performance_data = performance_df.to_dict(orient='records')
             
             return jsonify({
                 "metrics": performance_metrics,
-                "performance": performance_data
+                "performance": performance_data,
+                "runId": run_id
             })
             
         except Exception as e:
             return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
 
+    @app.route('/api/estimate', methods=['POST'])
+    def estimate_llm_usage():
+        """Estimate a run's or backtest's LLM calls, tokens, cost and wall time from past usage"""
+        try:
+            from utils.run_estimate import estimate_backtest, estimate_run, max_tickers_within
+
+            data = request.get_json()
+            tickers = data.get('tickers', '').split(',')
+            selected_analysts = data.get('selectedAnalysts', [])
+            model_name = data.get('modelName')
+            model_info = get_model_info(model_name)
+            model_provider = model_info.provider.value if model_info else "Unknown"
+
+            if data.get('backtest'):
+                estimate = estimate_backtest(tickers, selected_analysts, model_name, model_provider, data.get('startDate'), data.get('endDate'))
+            else:
+                estimate = estimate_run(tickers, selected_analysts, model_name, model_provider, round_table=data.get('roundTable', False))
+
+            # Per trading day for a backtest, for the whole run otherwise
+            deadline = data.get('deadline')
+            response = {**estimate.model_dump(), "fits": estimate.fits(deadline)}
+            if deadline is not None and not response["fits"]:
+                response["maxTickers"] = max_tickers_within(float(deadline), tickers, selected_analysts, model_name, model_provider, round_table=data.get('roundTable', False))
+            return jsonify(response)
+
+        except Exception as e:
+            return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
+
     @app.route('/api/round-table', methods=['POST'])
     def run_round_table():
         """Run a round table discussion for a ticker"""
@@ -404,6 +486,23 @@ def start_api_server(host=DEFAULT_HOST, port=API_PORT):
             "gemini_api_configured": bool(os.getenv("GEMINI_API_KEY")),
         })
 
+    @app.route('/api/data-metrics', methods=['GET'])
+    def get_data_metrics_snapshot():
+        """Return data cache hit/miss counters and provider latencies"""
+        from data.metrics import get_data_metrics
+        return jsonify(get_data_metrics().snapshot())
+
+    @app.route('/api/usage', methods=['GET'])
+    def get_llm_usage():
+        """Return LLM token, latency and cost totals plus the individual calls, for one job with ?runId=..."""
+        from utils.llm_usage import get_usage_tracker
+        tracker = get_usage_tracker()
+        run_id = request.args.get('runId')
+        return jsonify({
+            **tracker.summary(run_id),
+            "calls": [record.model_dump() for record in tracker.records(run_id)],
+        })
+
     # WebSocket endpoint for logs
     @sock.route('/ws/logs')
     def logs(ws):
@@ -842,12 +941,13 @@ def run_hedge_fund_for_web(tickers, selected_analysts, model_name, start_date=No
                         
                         # Print formatted analysis like in CLI with colors
                         print(f"\n{Fore.CYAN}{Style.BRIGHT}{'=' * 10}     {formatted_name} Agent     {'=' * 10}{Style.RESET_ALL}")
-                        print(json.dumps(analyst_output, indent=2))
+                        formatted_output = dumps(analyst_output, indent=True)
+                        print(formatted_output)
                         print(f"{Fore.CYAN}{Style.BRIGHT}{'=' * 48}{Style.RESET_ALL}\n")
                         
                         # Also broadcast to WebSocket
                         broadcast_log(f"===== {formatted_name} Analysis =====", "info")
-                        broadcast_log(json.dumps(analyst_output, indent=2), "info")
+                        broadcast_log(formatted_output, "info")
                 
                 broadcast_log(f"Completed {analyst_name} analysis", "success")
             except Exception as e:
@@ -869,12 +969,13 @@ def run_hedge_fund_for_web(tickers, selected_analysts, model_name, start_date=No
                 if "risk_management_agent" in state["data"]["analyst_signals"]:
                     risk_output = state["data"]["analyst_signals"]["risk_management_agent"]
                     print(f"\n{Fore.CYAN}{Style.BRIGHT}{'=' * 10}    Risk Management Agent     {'=' * 10}{Style.RESET_ALL}")
-                    print(json.dumps(risk_output, indent=2))
+                    formatted_output = dumps(risk_output, indent=True)
+                    print(formatted_output)
                     print(f"{Fore.CYAN}{Style.BRIGHT}{'=' * 48}{Style.RESET_ALL}\n")
                     
                     # Also broadcast to WebSocket
                     broadcast_log("===== Risk Management Analysis =====", "info")
-                    broadcast_log(json.dumps(risk_output, indent=2), "info")
+                    broadcast_log(formatted_output, "info")
                 
             broadcast_log("Completed risk management analysis", "success")
         except Exception as e:
@@ -894,12 +995,13 @@ def run_hedge_fund_for_web(tickers, selected_analysts, model_name, start_date=No
                 if "portfolio_decision" in state["data"]:
                     portfolio_decisions = state["data"]["portfolio_decision"]
                     print(f"\n{Fore.CYAN}{Style.BRIGHT}{'=' * 10}    Portfolio Management Agent     {'=' * 10}{Style.RESET_ALL}")
-                    print(json.dumps(portfolio_decisions, indent=2))
+                    formatted_output = dumps(portfolio_decisions, indent=True)
+                    print(formatted_output)
                     print(f"{Fore.CYAN}{Style.BRIGHT}{'=' * 48}{Style.RESET_ALL}\n")
                     
                     # Also broadcast to WebSocket
                     broadcast_log("===== Portfolio Decisions =====", "info")
-                    broadcast_log(json.dumps(portfolio_decisions, indent=2), "info")
+                    broadcast_log(formatted_output, "info")
                 
             broadcast_log("Completed portfolio management analysis", "success")
         except Exception as e:
@@ -958,6 +1060,7 @@ def main():
     parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port for the web server")
     parser.add_argument("--host", default=DEFAULT_HOST, help="Host for the web server")
     parser.add_argument("--api-port", type=int, default=API_PORT, help="Port for the API server")
+    parser.add_argument("--stream", action="store_true", help="Stream LLM responses to the web console while they are generated")
     
     args = parser.parse_args()
     
@@ -978,7 +1081,7 @@ def main():
     if args.api or args.dev:
         api_thread = threading.Thread(
             target=start_api_server,
-            kwargs={"host": args.host, "port": args.api_port}
+            kwargs={"host": args.host, "port": args.api_port, "stream": args.stream}
         )
         api_thread.daemon = True
         api_thread.start()
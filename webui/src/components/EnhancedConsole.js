@@ -28,7 +28,19 @@ function ConsoleComponent() {
       ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
-          setMessages(prev => [...prev, data.message]);
+          if (data.type === 'stream') {
+            // Streaming output updates its agent's line in place instead of adding one per chunk
+            const prefix = data.ticker ? `[${data.agent}] ${data.ticker}:` : `[${data.agent}]`;
+            setMessages(prev => {
+              const last = prev.length - 1;
+              if (last >= 0 && typeof prev[last] === 'string' && prev[last].startsWith(prefix)) {
+                return [...prev.slice(0, last), data.message];
+              }
+              return [...prev, data.message];
+            });
+          } else {
+            setMessages(prev => [...prev, data.message]);
+          }
           
           // Auto-scroll
           if (consoleRef.current) {